@@ -47,6 +47,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so latency and queries of the whole stack are measured
+    'restaurant.metrics.RequestMetricsMiddleware',
+    'restaurant.routers.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -63,18 +66,28 @@ TEMPLATES = [
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         # The settings for templates updated for the Graded assessment
         'DIRS': ['restaurant/templates' ],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'restaurant.context_processors.static_version',
+            ],
+            'loaders': [
+                'django.template.loaders.filesystem.Loader',
+                'django.template.loaders.app_directories.Loader',
             ],
         },
     },
 ]
 
+# Outside development, compile each template once per process
+if not DEBUG:
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', TEMPLATES[0]['OPTIONS']['loaders']),
+    ]
+
 WSGI_APPLICATION = 'littlelemon.wsgi.application'
 
 
@@ -83,12 +96,64 @@ WSGI_APPLICATION = 'littlelemon.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.mysql',
+        # django.db.backends.mysql with pooled connections (restaurant/db/pool.py)
+        'ENGINE': 'restaurant.db.backends.mysql_pool',
         'NAME': 'reservations',
         'HOST' : '127.0.0.1',
         'PORT' : '3306',
         'USER' : 'root',
         'PASSWORD' : 'root@123',
+        # Connections go back to the pool at the end of each request
+        'CONN_MAX_AGE': 0,
+        'POOL': {
+            'min_size': 2,
+            'max_size': 10,
+            'max_overflow': 10,
+            'timeout': 5,
+            'max_lifetime': 1800,
+            'leak_timeout': 300,
+        },
+    }
+}
+
+# Read replicas
+# Add replica aliases to DATABASES and weight them here; see
+# restaurant/routers.py for which requests read from them, e.g.
+#   DATABASES['replica1'] = {**DATABASES['default'], 'HOST': '10.0.0.2',
+#                            'TEST': {'MIRROR': 'default'}}
+#   DATABASE_REPLICAS = {'replica1': 1}
+
+DATABASE_REPLICAS = {}
+DATABASE_ROUTERS = ['restaurant.routers.ReplicaRouter']
+# Seconds between replica health checks, and how long a failed replica is skipped
+REPLICA_HEALTH_CHECK_INTERVAL = 5
+REPLICA_COOLDOWN = 30
+
+# Each server process writes its connection pool statistics to a file here
+# for `manage.py pool_stats`; every process must be able to reach it.
+# Defaults to littlelemon-pool-stats in the system temp directory.
+POOL_STATS_DIR = None
+
+# /metrics is readable by staff users and by scrapers sending this value as
+# 'Authorization: Bearer <token>' (e.g. Prometheus' authorization setting).
+METRICS_TOKEN = None
+
+# Cache
+# https://docs.djangoproject.com/en/4.1/topics/cache/
+# The menu cache keeps an in-process copy in front of this backend. Version
+# counters (ETags), token revocation and slot holds need every worker to
+# share it: with DEBUG off, `manage.py check` warns (restaurant.W001) while
+# it is per process. For several processes use e.g.
+#   CACHES = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+#                         'LOCATION': 'redis://127.0.0.1:6379'}}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'littlelemon',
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
     }
 }
 
@@ -136,6 +201,23 @@ STATICFILES_DIRS = [
     "restaurant/static",
 ]
 
+# collectstatic writes here; serve it with a far-future Cache-Control header
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+# Outside development, collectstatic content-hashes file names and writes
+# WebP/resized image variants and .gz/.br copies (restaurant/storage.py)
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': (
+            'django.contrib.staticfiles.storage.StaticFilesStorage' if DEBUG
+            else 'restaurant.storage.OptimizedStaticFilesStorage'
+        ),
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.1/ref/settings/#default-auto-field
 
@@ -144,14 +226,24 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Django REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'restaurant.authentication.CachedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'restaurant.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PAGINATION_CLASS': 'restaurant.pagination.StandardCursorPagination',
+    'PAGE_SIZE': 50,
 }
 
+# Token -> user resolutions cached by CachedTokenAuthentication
+TOKEN_CACHE_TIMEOUT = 300
+TOKEN_CACHE_MAX_ENTRIES = 1000
+
 # Djoser settings
 DJOSER = {
     "USER_ID_FIELD": "username"
@@ -3,7 +3,9 @@ from django.contrib import admin
 # Register your models here.
 from .models import Menu
 from .models import Booking
+from .models import Table
 
 
 admin.site.register(Menu)
-admin.site.register(Booking)
\ No newline at end of file
+admin.site.register(Booking)
+admin.site.register(Table)
\ No newline at end of file
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class RestaurantConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'restaurant'
+
+    def ready(self):
+        from . import checks, signals  # noqa: F401
+        # Connect the query recorder before the first connection is opened.
+        from . import metrics  # noqa: F401
@@ -0,0 +1,94 @@
+import hashlib
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+from .cache import bump_version, get_version
+
+
+class TokenCache:
+    """token key -> (user, token), in a bounded LRU with TTL over the shared cache.
+
+    Every lookup reads the 'tokens' version counter, so revoke() empties
+    the in-process tier of every worker at once while the shared entries
+    of other tokens survive. The in-process tier keeps pickled values and
+    every lookup returns its own copy, so a request that changes
+    request.user never affects the objects other requests receive.
+    """
+
+    def __init__(self, max_entries=1000, timeout=300):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        version = get_version('tokens')
+        now = time.monotonic()
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is not None:
+                entry_version, expires, data = entry
+                if entry_version == version and expires > now:
+                    self._local.move_to_end(key)
+                    return pickle.loads(data)
+                del self._local[key]
+        value = cache.get(self._shared_key(key))
+        if value is not None:
+            self._remember(key, version, value)
+        return value
+
+    def set(self, key, value):
+        cache.set(self._shared_key(key), value, self.timeout)
+        self._remember(key, get_version('tokens'), value)
+
+    def revoke(self, keys):
+        keys = list(keys)
+        if not keys:
+            return
+        cache.delete_many([self._shared_key(key) for key in keys])
+        bump_version('tokens')
+        with self._lock:
+            for key in keys:
+                self._local.pop(key, None)
+
+    def _remember(self, key, version, value):
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._local[key] = (version, time.monotonic() + self.timeout, data)
+            self._local.move_to_end(key)
+            while len(self._local) > self.max_entries:
+                self._local.popitem(last=False)
+
+    @staticmethod
+    def _shared_key(key):
+        # Hash so raw tokens never appear in cache keys.
+        return 'littlelemon:token:' + hashlib.sha256(key.encode()).hexdigest()
+
+
+token_cache = TokenCache(
+    max_entries=getattr(settings, 'TOKEN_CACHE_MAX_ENTRIES', 1000),
+    timeout=getattr(settings, 'TOKEN_CACHE_TIMEOUT', 300),
+)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication that skips the Token/User query on cache hits.
+
+    Entries are revoked when a token is deleted (djoser's logout) and when
+    its user is saved, which covers deactivation.
+    """
+
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is None:
+            cached = super().authenticate_credentials(key)
+            token_cache.set(key, cached)
+        user, token = cached
+        if not user.is_active:
+            raise AuthenticationFailed('User inactive or deleted.')
+        return user, token
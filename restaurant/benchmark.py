@@ -0,0 +1,178 @@
+import asyncio
+import threading
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection, connections
+from django.test import AsyncClient, Client, override_settings
+
+
+def allow_test_client():
+    """Accept the 'testserver' Host the in-process clients always send."""
+    return override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'])
+
+
+# A private in-process cache for benchmark runs, which clear it: the shared
+# cache of a live host holds slot holds, cached tokens and version counters.
+BENCH_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'littlelemon-bench',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+
+
+def isolated_cache():
+    return override_settings(CACHES=BENCH_CACHES)
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(latencies, elapsed, errors=0, queries=None):
+    """Latencies in seconds -> requests/sec and percentiles in milliseconds."""
+    count = len(latencies)
+    return {
+        'requests': count,
+        'errors': errors,
+        'rps': round(count / elapsed, 1) if elapsed else 0.0,
+        'mean_ms': round(sum(latencies) / count * 1000, 3) if count else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'queries_per_request': round(queries / count, 2) if count and queries is not None else None,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Return the regressions of ``results`` against ``baseline``.
+
+    A route regresses when its p95 latency grows, or its throughput drops,
+    by more than ``tolerance`` (0.2 = 20%), or when it makes more queries
+    per request than before.
+    """
+    regressions = []
+    for route, current in results.items():
+        before = baseline.get(route)
+        if not before:
+            continue
+        if before['p95_ms'] and current['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{route}: p95 {before['p95_ms']} ms -> {current['p95_ms']} ms")
+        if before['rps'] and current['rps'] < before['rps'] * (1 - tolerance):
+            regressions.append(f"{route}: {before['rps']} req/s -> {current['rps']} req/s")
+        if (before.get('queries_per_request') is not None
+                and current.get('queries_per_request') is not None
+                and current['queries_per_request'] > before['queries_per_request']):
+            regressions.append(f"{route}: {before['queries_per_request']} -> "
+                               f"{current['queries_per_request']} queries/request")
+    return regressions
+
+
+def _shares(requests, concurrency):
+    return [requests // concurrency + (1 if i < requests % concurrency else 0)
+            for i in range(concurrency)]
+
+
+def run_wsgi(path, requests, concurrency, headers=None):
+    """Drive ``path`` through the WSGI handler from ``concurrency`` threads."""
+    latencies = []
+    errors = []
+    queries = []
+    lock = threading.Lock()
+
+    def worker(count):
+        client = Client()
+        mine, failed, executed = [], 0, 0
+
+        def count_query(execute, sql, params, many, context):
+            nonlocal executed
+            executed += 1
+            return execute(sql, params, many, context)
+
+        try:
+            with connection.execute_wrapper(count_query):
+                for _ in range(count):
+                    start = time.perf_counter()
+                    response = client.get(path, headers=headers)
+                    if response.streaming:
+                        # Streamed bodies are only produced as they are read.
+                        b''.join(response.streaming_content)
+                    mine.append(time.perf_counter() - start)
+                    failed += response.status_code >= 400
+        finally:
+            connections.close_all()
+        with lock:
+            latencies.extend(mine)
+            errors.append(failed)
+            queries.append(executed)
+
+    threads = [threading.Thread(target=worker, args=(count,))
+               for count in _shares(requests, concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(latencies, time.perf_counter() - start, sum(errors), sum(queries))
+
+
+def run_asgi(path, requests, concurrency):
+    """Drive ``path`` through the ASGI handler from ``concurrency`` tasks
+    sharing one event loop, as a single uvicorn worker would."""
+    latencies = []
+    errors = 0
+
+    async def worker(client, count):
+        nonlocal errors
+        for _ in range(count):
+            start = time.perf_counter()
+            response = await client.get(path)
+            latencies.append(time.perf_counter() - start)
+            errors += response.status_code >= 400
+
+    async def main():
+        client = AsyncClient()
+        await asyncio.gather(*(worker(client, count)
+                               for count in _shares(requests, concurrency)))
+
+    start = time.perf_counter()
+    asyncio.run(main())
+    elapsed = time.perf_counter() - start
+    connections.close_all()
+    return summarize(latencies, elapsed, errors)
+
+
+def seed(menu_items, bookings, start, rng):
+    """Fill an empty database with ``menu_items`` and ``bookings`` rows.
+
+    Bookings take distinct (date, slot) pairs from the opening slots of
+    consecutive days starting at ``start``, at their best-fit tables.
+    """
+    from .bulk import insert_free_bookings
+    from .models import OPENING_SLOTS, Booking, Menu
+
+    Menu.objects.bulk_create(
+        [Menu(name=f'Dish {i}', price=rng.randint(5, 40),
+              menu_item_description=f'Benchmark dish number {i}')
+         for i in range(menu_items)],
+        batch_size=1000,
+    )
+    slots = list(OPENING_SLOTS)
+    batch = []
+    for i in range(bookings):
+        batch.append(Booking(
+            first_name=f'Guest {i}',
+            reservation_date=start + timedelta(days=i // len(slots)),
+            reservation_slot=slots[i % len(slots)],
+        ))
+        if len(batch) == 5000:
+            insert_free_bookings(batch, batch_size=1000)
+            batch = []
+    if batch:
+        insert_free_bookings(batch, batch_size=1000)
@@ -0,0 +1,64 @@
+from django.db import IntegrityError, transaction
+from .models import Booking
+from .signals import bookings_bulk_created
+from .tables import assign_tables
+
+
+def insert_bookings(bookings, batch_size=500):
+    """Insert unsaved ``bookings``, which must have tables, with bulk_create
+    in one transaction.
+
+    bulk_create skips save() and its signals, so receivers that maintain
+    derived tables listen to ``bookings_bulk_created`` instead.
+    """
+    with transaction.atomic():
+        created = Booking.objects.bulk_create(bookings, batch_size=batch_size)
+        fill_primary_keys(created)
+        bookings_bulk_created.send(sender=Booking, bookings=created)
+    return created
+
+
+def fill_primary_keys(bookings):
+    """Set the ids bulk_create() left unset, on backends that cannot return
+    rows from a bulk INSERT (MySQL), by reading them back through the
+    (date, slot, table) unique key: one query for the batch."""
+    missing = {}
+    to_date = Booking._meta.get_field('reservation_date').to_python
+    for booking in bookings:
+        if booking.pk is None:
+            key = (to_date(booking.reservation_date), int(booking.reservation_slot), booking.table_id)
+            missing[key] = booking
+    if not missing:
+        return
+    rows = Booking.objects.filter(
+        reservation_date__in={reservation_date for reservation_date, _, _ in missing},
+        reservation_slot__in={reservation_slot for _, reservation_slot, _ in missing},
+        table_id__in={table_id for _, _, table_id in missing},
+    ).values_list('pk', 'reservation_date', 'reservation_slot', 'table_id')
+    for pk, *key in rows:
+        booking = missing.get(tuple(key))
+        if booking is not None:
+            booking.pk = pk
+
+
+def insert_free_bookings(bookings, attempts=3, batch_size=500):
+    """Assign best-fit tables to ``bookings`` and insert those that got one.
+
+    Tables are assigned in order with one query for the whole batch (see
+    restaurant.tables.assign_tables), so several bookings of the batch may
+    share a slot. Returns ``(created, taken, failed)``: ``taken`` found no
+    free table, and ``failed`` is only non-empty when concurrent writers
+    took tables between the check and the insert on every attempt.
+    """
+    pending = list(bookings)
+    taken = []
+    for _ in range(attempts):
+        placed, unplaced = assign_tables(pending)
+        taken.extend(unplaced)
+        try:
+            return insert_bookings(placed, batch_size=batch_size), taken, []
+        except IntegrityError:
+            # A concurrent request took one of the tables; assign again.
+            pending = placed
+            continue
+    return [], taken, pending
@@ -0,0 +1,240 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import wraps
+from asgiref.sync import iscoroutinefunction
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.db import DEFAULT_DB_ALIAS
+from .models import Menu
+from .storage import static_version
+
+
+MENU_FIELDS = ('id', 'name', 'price', 'menu_item_description')
+
+_MISSING = object()
+
+
+def get_version(name):
+    """Return the current version counter for ``name`` from the shared cache.
+
+    Versions are nanosecond timestamps, so a counter lost to eviction comes
+    back as a new value and can never match data cached before it was lost.
+    """
+    key = f'littlelemon:version:{name}'
+    version = cache.get(key)
+    if version is None:
+        version = time.time_ns()
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+async def aget_version(name):
+    key = f'littlelemon:version:{name}'
+    version = await cache.aget(key)
+    if version is None:
+        version = time.time_ns()
+        if not await cache.aadd(key, version, None):
+            version = await cache.aget(key, version)
+    return version
+
+
+def bump_version(name):
+    cache.set(f'littlelemon:version:{name}', time.time_ns(), None)
+
+
+def bump_versions(names, chunk_size=1000):
+    """bump_version() for many names, with one set_many per chunk."""
+    names = list(names)
+    version = time.time_ns()
+    for i in range(0, len(names), chunk_size):
+        cache.set_many({f'littlelemon:version:{name}': version for name in names[i:i + chunk_size]}, None)
+
+
+def version_etag(name):
+    return f'"{name}-{get_version(name)}"'
+
+
+def version_last_modified(name):
+    return datetime.fromtimestamp(get_version(name) / 1e9, tz=timezone.utc)
+
+
+def bookings_version_name(reservation_date):
+    return f'bookings:{reservation_date}'
+
+
+class VersionedCache:
+    """Two-tier read cache invalidated by bumping a version counter.
+
+    Values live in a bounded in-process LRU in front of the shared Django
+    cache. Both tiers are keyed on the current version, so one bump makes
+    every process miss on its next read.
+    """
+
+    def __init__(self, name, max_entries=256, timeout=24 * 60 * 60, version_name=None):
+        self.name = name
+        # Several caches can follow one version, e.g. menu rows and menu pages.
+        self.version_name = version_name or name
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    def get(self, key, loader):
+        version = get_version(self.version_name)
+        value = self._get_local(version, key)
+        if value is not _MISSING:
+            return value
+        shared_key = self._shared_key(version, key)
+        value = cache.get(shared_key, _MISSING)
+        if value is _MISSING:
+            value = loader()
+            cache.set(shared_key, value, self.timeout)
+            self._remember(version, key, value, 'misses')
+        else:
+            self._remember(version, key, value, 'shared_hits')
+        return value
+
+    async def aget(self, key, loader):
+        """Like get(), for async views; ``loader`` is a coroutine function."""
+        version = await aget_version(self.version_name)
+        value = self._get_local(version, key)
+        if value is not _MISSING:
+            return value
+        shared_key = self._shared_key(version, key)
+        value = await cache.aget(shared_key, _MISSING)
+        if value is _MISSING:
+            value = await loader()
+            await cache.aset(shared_key, value, self.timeout)
+            self._remember(version, key, value, 'misses')
+        else:
+            self._remember(version, key, value, 'shared_hits')
+        return value
+
+    def _get_local(self, version, key):
+        with self._lock:
+            value = self._local.get((version, key), _MISSING)
+            if value is not _MISSING:
+                self._local.move_to_end((version, key))
+                self.local_hits += 1
+            return value
+
+    def _shared_key(self, version, key):
+        digest = hashlib.md5(key.encode()).hexdigest()
+        return f'littlelemon:{self.name}:{version}:{digest}'
+
+    def _remember(self, version, key, value, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+            self._local[(version, key)] = value
+            self._local.move_to_end((version, key))
+            while len(self._local) > self.max_entries:
+                self._local.popitem(last=False)
+
+    def invalidate(self):
+        bump_version(self.version_name)
+        with self._lock:
+            self._local.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'local_hits': self.local_hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'local_entries': len(self._local),
+            }
+
+
+menu_cache = VersionedCache('menu')
+table_cache = VersionedCache('tables', max_entries=8)
+# Rendered pages: the menu pages follow the menu version, the marketing
+# pages depend on no model and simply expire.
+menu_page_cache = VersionedCache('menu-pages', max_entries=1024, version_name='menu')
+site_page_cache = VersionedCache('site-pages', max_entries=32, timeout=10 * 60)
+
+
+def _freeze(response):
+    # Only plain successful pages that set no cookies are shared.
+    if response.status_code != 200 or response.streaming or response.cookies:
+        return None
+    return response.content, list(response.items())
+
+
+def _thaw(frozen):
+    content, headers = frozen
+    response = HttpResponse(content)
+    for header, value in headers:
+        response[header] = value
+    return response
+
+
+def cache_page_versioned(page_cache):
+    """Serve GET/HEAD responses of the decorated (sync or async) view from
+    ``page_cache``, keyed on the full path, the cache's version and the
+    static manifest's, so a hit costs no template rendering and no queries."""
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def wrapper(request, *args, **kwargs):
+                if request.method not in ('GET', 'HEAD'):
+                    return await view(request, *args, **kwargs)
+                response = None
+
+                async def render():
+                    nonlocal response
+                    response = await view(request, *args, **kwargs)
+                    return _freeze(response)
+                frozen = await page_cache.aget(f'page:{static_version()}:{request.get_full_path()}', render)
+                if frozen is None:
+                    return response or await view(request, *args, **kwargs)
+                return _thaw(frozen)
+        else:
+            @wraps(view)
+            def wrapper(request, *args, **kwargs):
+                if request.method not in ('GET', 'HEAD'):
+                    return view(request, *args, **kwargs)
+                response = None
+
+                def render():
+                    nonlocal response
+                    response = view(request, *args, **kwargs)
+                    return _freeze(response)
+                frozen = page_cache.get(f'page:{static_version()}:{request.get_full_path()}', render)
+                if frozen is None:
+                    return response or view(request, *args, **kwargs)
+                return _thaw(frozen)
+        return wrapper
+    return decorator
+
+# Cached rows live until the next version bump, so they are loaded from the
+# primary: a lagging replica could otherwise pin stale data in the cache.
+_menu = Menu.objects.using(DEFAULT_DB_ALIAS)
+
+
+def menu_items():
+    """All menu items as dicts in MenuSerializer's shape, ordered by id."""
+    return menu_cache.get('all', lambda: list(_menu.order_by('id').values(*MENU_FIELDS)))
+
+
+def menu_item(pk):
+    """A single menu item as a dict, or None if it does not exist."""
+    return menu_cache.get(
+        f'item:{pk}', lambda: _menu.filter(pk=pk).values(*MENU_FIELDS).first())
+
+
+async def amenu_items():
+    async def load():
+        return [item async for item in _menu.order_by('id').values(*MENU_FIELDS)]
+    return await menu_cache.aget('all', load)
+
+
+async def amenu_item(pk):
+    return await menu_cache.aget(
+        f'item:{pk}', lambda: _menu.filter(pk=pk).values(*MENU_FIELDS).afirst())
@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+
+# Backends whose entries only the process that wrote them can see.
+PER_PROCESS_CACHES = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """Warn when the default cache is per process outside DEBUG.
+
+    The version counters behind the menu and bookings ETags, token
+    revocation and slot holds (cache.add) all rely on one cache that every
+    worker reads; with a per-process backend each worker keeps its own.
+    """
+    backend = settings.CACHES.get('default', {}).get('BACKEND')
+    if settings.DEBUG or backend not in PER_PROCESS_CACHES:
+        return []
+    return [Warning(
+        f'The default cache ({backend}) is not shared between processes.',
+        hint='With more than one worker, logouts are not revoked elsewhere, workers disagree '
+             'on ETags and cached menus, and a hold only blocks its own process. Point '
+             'CACHES["default"] at Redis or Memcached.',
+        id='restaurant.W001',
+    )]
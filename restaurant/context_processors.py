@@ -0,0 +1,7 @@
+from . import storage
+
+
+def static_version(request):
+    """``static_version`` for cache tags whose fragments embed hashed asset
+    URLs, e.g. ``{% cache 3600 site_header static_version %}``."""
+    return {'static_version': storage.static_version()}
@@ -0,0 +1,10 @@
+from django.db.backends.mysql import base
+from restaurant.db.pool import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+    """django.db.backends.mysql with pooled, persistent connections, so
+    requests skip the mysqlclient connect and auth handshake."""
+
+    def check_raw_connection(self, raw):
+        raw.ping()
@@ -0,0 +1,11 @@
+from django.db.backends.sqlite3 import base
+from restaurant.db.pool import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+    """django.db.backends.sqlite3 with pooled connections, for exercising the
+    pool without a MySQL server. Use a file database: in-memory ones are
+    never closed, so they never go back to the pool."""
+
+    def check_raw_connection(self, raw):
+        raw.execute('SELECT 1')
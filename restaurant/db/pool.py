@@ -0,0 +1,321 @@
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+from collections import deque
+from django.conf import settings
+from django.db.utils import OperationalError
+
+
+# How often a process writes its pool statistics to POOL_STATS_DIR, and how
+# long a worker's file counts as current after it stopped writing.
+PUBLISH_INTERVAL = 5
+STATS_TIMEOUT = 60
+
+
+class PoolTimeout(OperationalError):
+    """No connection became available within the pool's timeout."""
+
+
+class ConnectionPool:
+    """Thread-safe pool of raw DB-API connections.
+
+    Up to ``max_size`` connections are kept open between checkouts; under
+    load up to ``max_overflow`` more are opened and closed again when they
+    are returned. When all of them are checked out, checkout() waits up to
+    ``timeout`` seconds and then raises PoolTimeout. Idle connections older
+    than ``max_lifetime`` are replaced, and every reused connection must
+    pass ``check`` first. Connections held longer than ``leak_timeout`` are
+    reported as leaked.
+    """
+
+    def __init__(self, connect, close=None, check=None, min_size=0, max_size=10,
+                 max_overflow=0, timeout=30, max_lifetime=3600, leak_timeout=300):
+        self.connect = connect
+        self.close = close or (lambda raw: raw.close())
+        self.check = check
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.leak_timeout = leak_timeout
+        self._idle = deque()
+        self._in_use = {}
+        self._size = 0
+        self._filled = False
+        self._condition = threading.Condition()
+        self.counters = dict.fromkeys(
+            ('checkouts', 'waits', 'wait_seconds', 'timeouts', 'created', 'closed',
+             'failed_checks', 'expired'), 0)
+
+    def checkout(self):
+        if not self._filled:
+            self._fill()
+        deadline = time.monotonic() + self.timeout
+        while True:
+            raw, created = self._take(deadline)
+            if raw is None:
+                # _take() reserved room for a new connection.
+                try:
+                    raw = self.connect()
+                except Exception:
+                    with self._condition:
+                        self._size -= 1
+                        self._condition.notify()
+                    raise
+                created = time.monotonic()
+                with self._condition:
+                    self.counters['created'] += 1
+            elif self.check is not None and not self._healthy(raw):
+                self._discard(raw, 'failed_checks')
+                continue
+            with self._condition:
+                self._in_use[id(raw)] = (raw, created, time.monotonic())
+                self.counters['checkouts'] += 1
+            return raw
+
+    def _take(self, deadline):
+        """Pop an idle (raw, created) pair, or reserve room for a new
+        connection and return (None, None); wait while neither is possible."""
+        with self._condition:
+            waiting = False
+            while True:
+                while self._idle:
+                    raw, created = self._idle.pop()
+                    if time.monotonic() - created < self.max_lifetime:
+                        self._record_wait(waiting)
+                        return raw, created
+                    self._size -= 1
+                    self.counters['expired'] += 1
+                    self.counters['closed'] += 1
+                    self._close_quietly(raw)
+                if self._size < self.max_size + self.max_overflow:
+                    self._size += 1
+                    self._record_wait(waiting)
+                    return None, None
+                if not waiting:
+                    waiting = time.monotonic()
+                    self.counters['waits'] += 1
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.counters['timeouts'] += 1
+                    self._record_wait(waiting)
+                    raise PoolTimeout(
+                        f'No database connection available within {self.timeout}s '
+                        f'({self._size} open, all checked out).')
+                self._condition.wait(remaining)
+
+    def _record_wait(self, waiting_since):
+        if waiting_since:
+            self.counters['wait_seconds'] += time.monotonic() - waiting_since
+
+    def release(self, raw, discard=False):
+        """Return a connection; it is closed instead when ``discard`` is set,
+        when it is past its lifetime, or when it was an overflow connection."""
+        with self._condition:
+            entry = self._in_use.pop(id(raw), None)
+            if entry is None:
+                close = True
+            else:
+                created = entry[1]
+                close = (discard or self._size > self.max_size
+                         or time.monotonic() - created >= self.max_lifetime)
+                if close:
+                    self._size -= 1
+                    self.counters['closed'] += 1
+                else:
+                    self._idle.append((raw, created))
+                self._condition.notify()
+        if close:
+            self._close_quietly(raw)
+
+    def _discard(self, raw, counter):
+        with self._condition:
+            self._size -= 1
+            self.counters[counter] += 1
+            self.counters['closed'] += 1
+            self._condition.notify()
+        self._close_quietly(raw)
+
+    def _healthy(self, raw):
+        try:
+            return self.check(raw) is not False
+        except Exception:
+            return False
+
+    def _close_quietly(self, raw):
+        try:
+            self.close(raw)
+        except Exception:
+            pass
+
+    def _fill(self):
+        with self._condition:
+            if self._filled:
+                return
+            self._filled = True
+            missing = max(self.min_size - self._size, 0)
+            self._size += missing
+        opened = []
+        try:
+            for _ in range(missing):
+                opened.append((self.connect(), time.monotonic()))
+        finally:
+            with self._condition:
+                self._size -= missing - len(opened)
+                self.counters['created'] += len(opened)
+                self._idle.extend(opened)
+                self._condition.notify_all()
+
+    def closeall(self):
+        """Close idle connections; checked-out ones close when released."""
+        with self._condition:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self.counters['closed'] += len(idle)
+            self._filled = False
+        for raw, _ in idle:
+            self._close_quietly(raw)
+
+    def stats(self):
+        now = time.monotonic()
+        with self._condition:
+            stats = dict(self.counters)
+            stats.update(
+                size=self._size,
+                idle=len(self._idle),
+                in_use=len(self._in_use),
+                leaked=sum(1 for _, _, out in self._in_use.values()
+                           if now - out > self.leak_timeout),
+                max_size=self.max_size,
+                max_overflow=self.max_overflow,
+            )
+        stats['wait_seconds'] = round(stats['wait_seconds'], 6)
+        return stats
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+_published = [0.0]
+
+
+def get_pool(alias, params_key, factory):
+    """The process-wide pool for ``alias``; a new one is made when the
+    connection parameters change (e.g. when the test database is created)."""
+    with _pools_lock:
+        entry = _pools.get(alias)
+        if entry is None or entry[0] != params_key:
+            if entry is not None:
+                entry[1].closeall()
+            entry = _pools[alias] = (params_key, factory())
+        return entry[1]
+
+
+def pool_stats():
+    """{alias: stats} for the pools of this process."""
+    with _pools_lock:
+        pools = {alias: pool for alias, (_, pool) in _pools.items()}
+    return {alias: pool.stats() for alias, pool in pools.items()}
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def stats_dir():
+    return (getattr(settings, 'POOL_STATS_DIR', None)
+            or os.path.join(tempfile.gettempdir(), 'littlelemon-pool-stats'))
+
+
+def publish_stats(force=False):
+    """Write this process's pool statistics to its own file in
+    POOL_STATS_DIR, at most once every PUBLISH_INTERVAL seconds, so
+    `manage.py pool_stats` can read them from outside the server process.
+    A file per worker needs no locking, and the rename makes every update
+    atomic for readers."""
+    now = time.monotonic()
+    if not force and now - _published[0] < PUBLISH_INTERVAL:
+        return
+    _published[0] = now
+    directory = stats_dir()
+    entry = {'worker': worker_name(), 'time': time.time(), 'pools': pool_stats()}
+    try:
+        os.makedirs(directory, exist_ok=True)
+        handle, path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(handle, 'w') as stats_file:
+            json.dump(entry, stats_file)
+        os.replace(path, os.path.join(directory, f'{socket.gethostname()}-{os.getpid()}.json'))
+    except OSError:
+        # Statistics are best effort; never fail the request closing the connection.
+        pass
+
+
+def published_stats():
+    """{worker: {'time': ..., 'pools': {alias: stats}}} of the workers that
+    wrote to POOL_STATS_DIR within the last STATS_TIMEOUT seconds."""
+    directory = stats_dir()
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return {}
+    cutoff = time.time() - STATS_TIMEOUT
+    workers = {}
+    for name in names:
+        if not name.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(directory, name)) as stats_file:
+                entry = json.load(stats_file)
+        except (OSError, ValueError):
+            continue
+        if entry['time'] >= cutoff:
+            workers[entry.pop('worker')] = entry
+    return workers
+
+
+class PooledDatabaseWrapperMixin:
+    """Check raw connections out of a ConnectionPool instead of opening them.
+
+    Options come from the ``POOL`` key of the database settings, e.g.
+    ``'POOL': {'min_size': 2, 'max_size': 10, 'max_overflow': 5,
+    'timeout': 5, 'max_lifetime': 1800}``. Keep CONN_MAX_AGE at 0: Django
+    then "closes" the connection at the end of each request, which returns
+    it to the pool.
+    """
+
+    @property
+    def pool(self):
+        params = self.get_connection_params()
+        return get_pool(self.alias, repr(sorted(params.items(), key=lambda item: item[0])),
+                        lambda: self._create_pool(params))
+
+    def _create_pool(self, params):
+        connect = super().get_new_connection
+        return ConnectionPool(
+            connect=lambda: connect(params),
+            check=self.check_raw_connection,
+            **(self.settings_dict.get('POOL') or {}),
+        )
+
+    def get_new_connection(self, conn_params):
+        return self.pool.checkout()
+
+    def check_raw_connection(self, raw):
+        raise NotImplementedError
+
+    def _close(self):
+        if self.connection is None:
+            return
+        # Never hand out a connection in the middle of a transaction.
+        discard = self.in_atomic_block
+        if not discard:
+            try:
+                self.connection.rollback()
+            except Exception:
+                discard = True
+        self.pool.release(self.connection, discard=discard)
+        publish_stats()
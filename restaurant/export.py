@@ -0,0 +1,51 @@
+import csv
+import io
+from django.utils.text import compress_sequence
+from .pagination import BOOKING_ORDERING, keyset_iterator
+from .renderers import dumps
+
+
+EXPORT_FIELDS = ('id', 'first_name', 'reservation_date', 'reservation_slot', 'party_size', 'table')
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+EXPORT_CHUNK_SIZE = 5000
+
+
+def export_bookings(queryset, export_format, chunk_size=EXPORT_CHUNK_SIZE, gzip=False):
+    """Yield ``queryset``'s bookings as CSV or NDJSON bytes, one piece per
+    chunk of rows read, optionally gzip-compressed on the fly."""
+    rows = keyset_iterator(queryset.values(*EXPORT_FIELDS), BOOKING_ORDERING, chunk_size)
+    encode = {'csv': _csv_chunks, 'ndjson': _ndjson_chunks}[export_format]
+    chunks = encode(rows, chunk_size)
+    return compress_sequence(chunks) if gzip else chunks
+
+
+def _csv_chunks(rows, chunk_size):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    for i, row in enumerate(rows, 1):
+        writer.writerow([row[field] for field in EXPORT_FIELDS])
+        if i % chunk_size == 0:
+            yield _drain(buffer)
+    yield _drain(buffer)
+
+
+def _drain(buffer):
+    data = buffer.getvalue().encode()
+    buffer.seek(0)
+    buffer.truncate()
+    return data
+
+
+def _ndjson_chunks(rows, chunk_size):
+    lines = []
+    for row in rows:
+        lines.append(dumps(row))
+        if len(lines) == chunk_size:
+            yield b'\n'.join(lines) + b'\n'
+            lines = []
+    if lines:
+        yield b'\n'.join(lines) + b'\n'
@@ -1,9 +1,24 @@
+from django.db import IntegrityError, transaction
 from django.forms import ModelForm
-from .models import Booking
+from .models import Booking, SlotFull
 
 
 # Code added for loading form data on the Booking page
 class BookingForm(ModelForm):
     class Meta:
         model = Booking
-        fields = "__all__"
+        # Booking.save() picks the table.
+        exclude = ['table']
+
+    def save(self, commit=True):
+        # A full slot is only known when save() looks for a table; this also
+        # catches a table taken between that lookup and the INSERT.
+        try:
+            with transaction.atomic():
+                return super().save(commit)
+        except SlotFull as exc:
+            self.add_error(None, str(exc))
+            return None
+        except IntegrityError:
+            self.add_error(None, 'This reservation slot is already booked.')
+            return None
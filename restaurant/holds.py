@@ -0,0 +1,81 @@
+import secrets
+from datetime import datetime, timedelta, timezone
+from django.core.cache import cache
+
+
+# A hold keeps a table free for a guest while they fill in the form.
+HOLD_MINUTES = 5
+MAX_HOLD_MINUTES = 15
+
+
+def _table_key(reservation_date, reservation_slot, table_id):
+    return f'littlelemon:hold:{reservation_date}:{reservation_slot}:{table_id}'
+
+
+def _token_key(token):
+    return f'littlelemon:hold-token:{token}'
+
+
+def claim_table(reservation_date, reservation_slot, table_id, party_size, minutes=HOLD_MINUTES):
+    """Hold ``table_id`` in the slot for ``minutes``, or return None if it is
+    already held. cache.add() makes the claim atomic across processes, and
+    the cache's expiry releases it."""
+    token = secrets.token_urlsafe(16)
+    timeout = minutes * 60
+    if not cache.add(_table_key(reservation_date, reservation_slot, table_id), token, timeout):
+        return None
+    hold = {
+        'hold': token,
+        'reservation_date': reservation_date.isoformat(),
+        'reservation_slot': reservation_slot,
+        'party_size': party_size,
+        'table': table_id,
+        'expires': (datetime.now(timezone.utc) + timedelta(seconds=timeout)).isoformat(),
+    }
+    cache.set(_token_key(token), hold, timeout)
+    return hold
+
+
+def get_hold(token):
+    """The active hold of ``token``, or None once it expired or was released."""
+    hold = cache.get(_token_key(token))
+    if hold is None:
+        return None
+    key = _table_key(hold['reservation_date'], hold['reservation_slot'], hold['table'])
+    return hold if cache.get(key) == token else None
+
+
+def release_hold(hold):
+    cache.delete_many([
+        _table_key(hold['reservation_date'], hold['reservation_slot'], hold['table']),
+        _token_key(hold['hold']),
+    ])
+
+
+def _keys(pairs, table_ids):
+    return {
+        _table_key(reservation_date, reservation_slot, table_id): (reservation_date, reservation_slot, table_id)
+        for reservation_date, reservation_slot in pairs for table_id in table_ids
+    }
+
+
+def _group(pairs, keys, found):
+    held = {pair: set() for pair in pairs}
+    for key in found:
+        reservation_date, reservation_slot, table_id = keys[key]
+        held[reservation_date, reservation_slot].add(table_id)
+    return held
+
+
+def held_tables(pairs, table_ids):
+    """{(reservation_date, reservation_slot): {table id, ...}} of the tables
+    of ``table_ids`` held in ``pairs``, from one cache round trip."""
+    pairs = set(pairs)
+    keys = _keys(pairs, table_ids)
+    return _group(pairs, keys, cache.get_many(list(keys)) if keys else {})
+
+
+async def aheld_tables(pairs, table_ids):
+    pairs = set(pairs)
+    keys = _keys(pairs, table_ids)
+    return _group(pairs, keys, await cache.aget_many(list(keys)) if keys else {})
@@ -0,0 +1,121 @@
+import json
+import platform
+import random
+from datetime import date, datetime, timezone
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework.authtoken.models import Token
+from restaurant.benchmark import allow_test_client, compare, isolated_cache, run_wsgi, seed
+from restaurant.models import Menu
+
+
+# Every GET route in restaurant/urls.py except the holds, whose tokens come
+# from a POST, and the cache-stats and message diagnostics; {date} and
+# {menu_id} point at seeded data.
+ROUTES = [
+    ('home', '/restaurant/'),
+    ('about', '/restaurant/about/'),
+    ('book', '/restaurant/book/'),
+    ('menu', '/restaurant/menu/'),
+    ('menu_item', '/restaurant/menu_item/{menu_id}/'),
+    ('reservations', '/restaurant/reservations/?date={date}'),
+    ('reservations-dump', '/restaurant/reservations/dump/?date={date}'),
+    ('bookings', '/restaurant/bookings?date={date}'),
+    ('availability', '/restaurant/availability?date={date}'),
+    ('next-available', '/restaurant/availability/next?date={date}'),
+    ('menu-items', '/restaurant/api/menu-items/'),
+    ('menu-search', '/restaurant/api/menu-items/search/?q=dish'),
+    ('single-menu-item', '/restaurant/api/menu-items/{menu_id}/'),
+    ('occupancy-heatmap', '/restaurant/api/occupancy/heatmap/'),
+    ('tables', '/restaurant/api/tables/'),
+    ('tables-export', '/restaurant/api/tables/export/?format=csv'),
+    ('users', '/restaurant/api/users/'),
+]
+
+
+class Command(BaseCommand):
+    help = ('Seed a throwaway database and measure latency, throughput and '
+            'queries per request for every route')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--menu-items', type=int, default=200)
+        parser.add_argument('--bookings', type=int, default=10000)
+        parser.add_argument('--requests', type=int, default=200, help='Requests per route')
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--route', action='append', dest='routes',
+                            help='Only run this route (repeatable)')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--output', default='bench_output.json')
+        parser.add_argument('--baseline', help='Earlier --output file to compare against')
+        parser.add_argument('--tolerance', type=float, default=0.2,
+                            help='Allowed p95/throughput change before failing (0.2 = 20%%)')
+        parser.add_argument('--keepdb', action='store_true',
+                            help='Reuse the benchmark database between runs')
+
+    def handle(self, *args, **options):
+        routes = [(name, path) for name, path in ROUTES
+                  if not options['routes'] or name in options['routes']]
+        if not routes:
+            raise CommandError('No matching routes.')
+
+        # A test database on the configured backend (test_<NAME> on MySQL,
+        # an in-memory database on SQLite), never the real one; likewise a
+        # private cache instead of the shared one.
+        old_name = connection.settings_dict['NAME']
+        with isolated_cache():
+            connection.creation.create_test_db(
+                verbosity=0, autoclobber=True, serialize=False, keepdb=options['keepdb'])
+            try:
+                results = self.run(routes, options)
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+
+        report = {
+            'created': datetime.now(timezone.utc).isoformat(),
+            'settings': {key: options[key] for key in
+                         ('menu_items', 'bookings', 'requests', 'concurrency', 'seed')},
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'routes': results,
+        }
+        with open(options['output'], 'w') as output:
+            json.dump(report, output, indent=2)
+        self.stdout.write(f'Results written to {options["output"]}')
+
+        if options['baseline']:
+            with open(options['baseline']) as baseline:
+                regressions = compare(results, json.load(baseline)['routes'], options['tolerance'])
+            if regressions:
+                for regression in regressions:
+                    self.stderr.write(self.style.ERROR(regression))
+                raise CommandError(f'{len(regressions)} regression(s) against {options["baseline"]}')
+            self.stdout.write(self.style.SUCCESS('No regressions against the baseline'))
+
+    def run(self, routes, options):
+        cache.clear()
+        start = date.today()
+        if not Menu.objects.exists():
+            self.stdout.write(f'Seeding {options["menu_items"]} menu items and '
+                              f'{options["bookings"]} bookings...')
+            seed(options['menu_items'], options['bookings'], start, random.Random(options['seed']))
+        user, _ = User.objects.get_or_create(username='bench', defaults={'is_staff': True})
+        token, _ = Token.objects.get_or_create(user=user)
+        headers = {'authorization': f'Token {token.key}'}
+        values = {'date': start.isoformat(), 'menu_id': Menu.objects.order_by('id').first().id}
+
+        self.stdout.write(
+            f'{"route":18} {"req/s":>9} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9} {"q/req":>6} {"errors":>6}')
+        results = {}
+        with allow_test_client():
+            for name, path in routes:
+                path = path.format(**values)
+                run_wsgi(path, 1, 1, headers=headers)  # warm caches, not measured
+                result = run_wsgi(path, options['requests'], options['concurrency'], headers=headers)
+                results[name] = result
+                self.stdout.write(
+                    f'{name:18} {result["rps"]:>9} {result["p50_ms"]:>9} {result["p95_ms"]:>9} '
+                    f'{result["p99_ms"]:>9} {result["queries_per_request"]:>6} {result["errors"]:>6}'
+                )
+        return results
@@ -0,0 +1,32 @@
+from datetime import date
+from django.core.management.base import BaseCommand
+from restaurant.benchmark import allow_test_client, run_asgi, run_wsgi
+
+
+class Command(BaseCommand):
+    help = 'Compare WSGI and ASGI throughput of the public booking and menu endpoints'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', action='append', dest='paths',
+                            help='Path to request (repeatable). Defaults to the async endpoints.')
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, default=20)
+
+    def handle(self, *args, **options):
+        today = date.today().isoformat()
+        paths = options['paths'] or [
+            f'/restaurant/bookings?date={today}',
+            f'/restaurant/availability?date={today}',
+            '/restaurant/menu/',
+        ]
+        self.stdout.write(
+            f'{options["requests"]} requests per run, {options["concurrency"]} concurrent clients\n')
+        self.stdout.write(f'{"path":45} {"interface":9} {"req/s":>9} {"p50 ms":>9} {"p99 ms":>9} {"errors":>6}')
+        with allow_test_client():
+            for path in paths:
+                for interface, run in (('wsgi', run_wsgi), ('asgi', run_asgi)):
+                    result = run(path, options['requests'], options['concurrency'])
+                    self.stdout.write(
+                        f'{path:45} {interface:9} {result["rps"]:>9} {result["p50_ms"]:>9} '
+                        f'{result["p99_ms"]:>9} {result["errors"]:>6}'
+                    )
@@ -0,0 +1,43 @@
+import sys
+import time
+from django.core.management.base import BaseCommand, CommandError
+from restaurant.export import EXPORT_CHUNK_SIZE, EXPORT_FORMATS, export_bookings
+from restaurant.models import Booking
+from restaurant.views import filter_bookings
+
+
+class Command(BaseCommand):
+    help = 'Stream bookings to a CSV or NDJSON file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(EXPORT_FORMATS), default='csv')
+        parser.add_argument('--date', help='Only bookings on this date (YYYY-MM-DD).')
+        parser.add_argument('--from', dest='from', help='First reservation date (YYYY-MM-DD).')
+        parser.add_argument('--to', help='Last reservation date (YYYY-MM-DD).')
+        parser.add_argument('--output', '-o', default='-',
+                            help='File to write; "-" for standard output. A .gz suffix implies --gzip.')
+        parser.add_argument('--gzip', action='store_true', help='Compress the output with gzip.')
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            bookings = filter_bookings(Booking.objects.all(), options)
+        except ValueError as exc:
+            raise CommandError(exc)
+        output = options['output']
+        compress = options['gzip'] or output.endswith('.gz')
+        chunks = export_bookings(bookings, options['format'], options['chunk_size'], gzip=compress)
+        
+        began = time.monotonic()
+        written = 0
+        stream = sys.stdout.buffer if output == '-' else open(output, 'wb')
+        try:
+            for chunk in chunks:
+                stream.write(chunk)
+                written += len(chunk)
+        finally:
+            if stream is not sys.stdout.buffer:
+                stream.close()
+        if output != '-':
+            self.stdout.write(self.style.SUCCESS(
+                f'Wrote {written} bytes to {output} in {time.monotonic() - began:.1f}s'))
@@ -0,0 +1,141 @@
+import csv
+import gzip
+import json
+import os
+import time
+from itertools import islice
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from restaurant.bulk import insert_free_bookings
+from restaurant.models import Booking
+
+FIELDS = ('first_name', 'reservation_date', 'reservation_slot')
+# Columns that may be missing or empty; the model default applies.
+OPTIONAL_FIELDS = ('party_size',)
+
+
+class Command(BaseCommand):
+    help = 'Import bookings from a CSV or NDJSON file, rejecting invalid rows and taken slots'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV (with a header row) or NDJSON file, optionally .gz.')
+        parser.add_argument('--format', choices=['csv', 'ndjson'],
+                            help='Input format. Defaults to the file extension.')
+        parser.add_argument('--chunk-size', type=int, default=2000,
+                            help='Rows validated, conflict-checked and inserted per transaction.')
+        parser.add_argument('--rejects', help='CSV file for rejected rows. Defaults to <path>.rejects.csv.')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1.')
+        path = options['path']
+        input_format = options['format'] or self.detect_format(path)
+        rejects_path = options['rejects'] or f'{path}.rejects.csv'
+        read = imported = rejected = 0
+        began = time.monotonic()
+
+        with self.open_input(path) as source, open(rejects_path, 'w', newline='') as rejects_file:
+            rejects = csv.writer(rejects_file)
+            rejects.writerow(('line', *FIELDS, *OPTIONAL_FIELDS, 'error'))
+            rows = self.read_csv(source) if input_format == 'csv' else self.read_ndjson(source)
+            while True:
+                chunk = list(islice(rows, options['chunk_size']))
+                if not chunk:
+                    break
+                read += len(chunk)
+                created, chunk_rejects = self.import_chunk(chunk)
+                imported += created
+                rejected += len(chunk_rejects)
+                for line, row, error in chunk_rejects:
+                    rejects.writerow((line, *(row.get(field, '') for field in FIELDS + OPTIONAL_FIELDS), error))
+                self.stdout.write(
+                    f'{read} rows read, {imported} imported, {rejected} rejected '
+                    f'({read / max(time.monotonic() - began, 1e-9):.0f} rows/s)'
+                )
+
+        if not rejected:
+            os.remove(rejects_path)
+        elapsed = time.monotonic() - began
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {imported} of {read} bookings in {elapsed:.1f}s '
+            f'({read / max(elapsed, 1e-9):.0f} rows/s)'
+        ))
+        if rejected:
+            self.stdout.write(self.style.WARNING(f'{rejected} rejected rows written to {rejects_path}'))
+
+    def import_chunk(self, chunk):
+        """Validate ``chunk`` and give its bookings best-fit tables in file
+        order, inserting those that got one: one table query and one
+        transaction per chunk. Earlier chunks are committed by then, so
+        their tables count as taken."""
+        rejects = []
+        valid = []
+        for line, row, error in chunk:
+            if error is None:
+                booking, error = self.parse(row)
+            if error is None:
+                valid.append((line, row, booking))
+            else:
+                rejects.append((line, row, error))
+
+        source_of = {id(booking): (line, row) for line, row, booking in valid}
+        created, taken, failed = insert_free_bookings(
+            [booking for _, _, booking in valid], batch_size=1000)
+        for reason, bookings in (('This reservation slot is already booked.', taken),
+                                 ('Slots changed concurrently, please retry.', failed)):
+            for booking in bookings:
+                rejects.append((*source_of[id(booking)], reason))
+        rejects.sort(key=lambda reject: reject[0])
+        return len(created), rejects
+
+    def parse(self, row):
+        values = {}
+        errors = []
+        for name in FIELDS + OPTIONAL_FIELDS:
+            if name in OPTIONAL_FIELDS and row.get(name) in (None, ''):
+                continue
+            try:
+                values[name] = Booking._meta.get_field(name).clean(row.get(name), None)
+            except ValidationError as exc:
+                errors.append(f'{name}: {" ".join(exc.messages)}')
+        if errors:
+            return None, '; '.join(errors)
+        return Booking(**values), None
+
+    def read_csv(self, source):
+        reader = csv.DictReader(source)
+        missing = set(FIELDS).difference(reader.fieldnames or ())
+        if missing:
+            raise CommandError(f'Missing CSV columns: {", ".join(sorted(missing))}')
+        for row in reader:
+            yield reader.line_num, row, None
+
+    def read_ndjson(self, source):
+        for line, text in enumerate(source, 1):
+            if not text.strip():
+                continue
+            try:
+                row = json.loads(text)
+            except ValueError as exc:
+                yield line, {}, f'Invalid JSON: {exc}'
+                continue
+            if not isinstance(row, dict):
+                yield line, {}, 'Expected a JSON object.'
+                continue
+            yield line, row, None
+
+    def detect_format(self, path):
+        name = path[:-3] if path.endswith('.gz') else path
+        if name.endswith('.csv'):
+            return 'csv'
+        if name.endswith(('.ndjson', '.jsonl')):
+            return 'ndjson'
+        raise CommandError('Cannot tell the format from the file name; pass --format.')
+
+    def open_input(self, path):
+        try:
+            if path.endswith('.gz'):
+                return gzip.open(path, 'rt', encoding='utf-8', newline='')
+            return open(path, encoding='utf-8', newline='')
+        except OSError as exc:
+            raise CommandError(exc)
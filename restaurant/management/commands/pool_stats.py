@@ -0,0 +1,33 @@
+import json
+import time
+from django.core.management.base import BaseCommand
+from restaurant.db.pool import pool_stats, published_stats, stats_dir, worker_name
+
+COLUMNS = ('size', 'idle', 'in_use', 'checkouts', 'waits', 'wait_seconds', 'timeouts',
+           'failed_checks', 'expired', 'leaked')
+
+
+class Command(BaseCommand):
+    help = 'Show database connection pool statistics published by the running server processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--json', action='store_true', help='Print the raw statistics as JSON.')
+
+    def handle(self, *args, **options):
+        workers = published_stats()
+        local = pool_stats()
+        if local:
+            workers[worker_name()] = {'time': time.time(), 'pools': local}
+        if options['json']:
+            self.stdout.write(json.dumps(workers, indent=2, sort_keys=True))
+            return
+        if not workers:
+            self.stdout.write(f'No pool statistics published in {stats_dir()}. Is a pooled backend '
+                              '(restaurant.db.backends.mysql_pool) configured and serving requests, '
+                              'with the same POOL_STATS_DIR?')
+            return
+        self.stdout.write(f'{"worker":28} {"alias":10} ' + ' '.join(f'{c:>13}' for c in COLUMNS))
+        for worker, entry in sorted(workers.items()):
+            for alias, stats in sorted(entry['pools'].items()):
+                self.stdout.write(f'{worker:28} {alias:10} '
+                                  + ' '.join(f'{stats[c]:>13}' for c in COLUMNS))
@@ -1,55 +1,96 @@
-from django.core.management.base import BaseCommand
-from restaurant.models import Booking
+import math
+import random
+import time
+from collections import Counter
 from datetime import date, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from restaurant.cache import bookings_version_name, bump_versions
+from restaurant.models import OPENING_SLOTS, Booking, OccupancySummary, SlotAvailability, slot_mask
+from restaurant.synthetic import generate_bookings, truncate
+from restaurant.tables import floor_plan
 
 
 class Command(BaseCommand):
     help = 'Populate the database with sample bookings'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=5, help='Number of bookings.')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed.')
+        parser.add_argument('--start', type=date.fromisoformat,
+                            help='First reservation date (YYYY-MM-DD). Defaults to tomorrow.')
+        parser.add_argument('--days', type=int,
+                            help='Number of days to spread the bookings over. '
+                                 'Defaults to what --occupancy needs.')
+        parser.add_argument('--occupancy', type=float, default=0.6,
+                            help='Average share of slots booked when --days is not given.')
+        parser.add_argument('--batch-size', type=int, default=5000)
+
     def handle(self, *args, **options):
-        # Clear existing bookings
-        Booking.objects.all().delete()
+        if not 0 < options['occupancy'] <= 1:
+            raise CommandError('--occupancy must be above 0 and at most 1.')
+        count = options['count']
+        tables = floor_plan().tables
+        if not tables:
+            raise CommandError('There are no tables; add some in the admin first.')
+        cells_per_day = len(OPENING_SLOTS) * len(tables)
+        start = options['start'] or date.today() + timedelta(days=1)
+        days = options['days'] or max(1, math.ceil(count / (cells_per_day * options['occupancy'])))
+        if count > days * cells_per_day:
+            raise CommandError(
+                f'{count} bookings do not fit in {days} days of {len(OPENING_SLOTS)} slots '
+                f'at {len(tables)} tables.')
         
-        # Create sample bookings for the next few days
-        today = date.today()
+        # Clear existing bookings, remembering their dates for the cache bump
+        # (every booked date has summary rows; only full slots have bitmaps).
+        stale_dates = list(OccupancySummary.objects.values_list('reservation_date', flat=True).distinct())
+        truncate(Booking, SlotAvailability, OccupancySummary)
         
-        sample_bookings = [
-            {
-                'first_name': 'John Smith',
-                'reservation_date': today + timedelta(days=1),
-                'reservation_slot': 18
-            },
-            {
-                'first_name': 'Mary Johnson',
-                'reservation_date': today + timedelta(days=1),
-                'reservation_slot': 19
-            },
-            {
-                'first_name': 'David Wilson',
-                'reservation_date': today + timedelta(days=2),
-                'reservation_slot': 17
-            },
-            {
-                'first_name': 'Sarah Davis',
-                'reservation_date': today + timedelta(days=2),
-                'reservation_slot': 20
-            },
-            {
-                'first_name': 'Michael Brown',
-                'reservation_date': today + timedelta(days=3),
-                'reservation_slot': 18
-            }
-        ]
+        # Days are never split across batches, so every batch can insert its
+        # own SlotAvailability and OccupancySummary rows instead of updating
+        # them per booking.
+        rng = random.Random(options['seed'])
+        written = 0
+        began = time.monotonic()
+        batch, masks = [], []
+        for reservation_date, bookings in generate_bookings(count, start, days, tables, rng):
+            batch.extend(bookings)
+            per_slot = Counter(booking.reservation_slot for booking in bookings)
+            masks.append(SlotAvailability(
+                reservation_date=reservation_date,
+                booked_slots=slot_mask(slot for slot, n in per_slot.items() if n >= len(tables)),
+            ))
+            if len(batch) >= options['batch_size']:
+                written += self.write_batch(batch, masks)
+                self.progress(written, count, began)
+                batch, masks = [], []
+        if batch:
+            written += self.write_batch(batch, masks)
+            self.progress(written, count, began)
         
-        for booking_data in sample_bookings:
-            Booking.objects.create(**booking_data)
-            self.stdout.write(
-                self.style.SUCCESS(
-                    f'Successfully created booking for: {booking_data["first_name"]} '
-                    f'on {booking_data["reservation_date"]} at {booking_data["reservation_slot"]}:00'
-                )
-            )
+        bump_versions(bookings_version_name(reservation_date) for reservation_date in
+                      set(stale_dates).union(start + timedelta(days=i) for i in range(days)))
         
         self.stdout.write(
-            self.style.SUCCESS(f'Successfully created {len(sample_bookings)} sample bookings')
+            self.style.SUCCESS(
+                f'Successfully created {written} sample bookings '
+                f'from {start} to {start + timedelta(days=days - 1)}'
+            )
         )
+
+    def write_batch(self, bookings, masks):
+        with transaction.atomic():
+            Booking.objects.bulk_create(bookings, batch_size=1000)
+            SlotAvailability.objects.bulk_create(masks, batch_size=1000)
+            per_slot = Counter((booking.reservation_date, booking.reservation_slot) for booking in bookings)
+            OccupancySummary.objects.bulk_create(
+                [OccupancySummary(reservation_date=reservation_date, reservation_slot=reservation_slot,
+                                  weekday=reservation_date.isoweekday(), bookings=n)
+                 for (reservation_date, reservation_slot), n in per_slot.items()],
+                batch_size=1000,
+            )
+        return len(bookings)
+
+    def progress(self, written, count, began):
+        rate = written / max(time.monotonic() - began, 1e-9)
+        self.stdout.write(f'{written}/{count} bookings ({rate:.0f} rows/s)')
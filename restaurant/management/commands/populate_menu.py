@@ -1,13 +1,23 @@
+import random
 from django.core.management.base import BaseCommand
+from restaurant.cache import menu_cache
 from restaurant.models import Menu
+from restaurant.synthetic import generate_menu_items, truncate
 
 
 class Command(BaseCommand):
     help = 'Populate the database with sample menu items'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=5,
+                            help='Number of menu items. The first five are the house classics, '
+                                 'the rest are generated.')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for generated items.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
     def handle(self, *args, **options):
         # Clear existing menu items
-        Menu.objects.all().delete()
+        truncate(Menu)
         
         # Create sample menu items
         menu_items = [
@@ -37,12 +47,17 @@ class Command(BaseCommand):
                 'menu_item_description': 'Our Bruschetta is made from grilled bread that has been smeared with garlic and seasoned with salt and olive oil.'
             }
         ]
-          for item_data in menu_items:
-            Menu.objects.create(**item_data)
-            self.stdout.write(
-                self.style.SUCCESS(f'Successfully created menu item: {item_data["name"]}')
-            )
+        count = options['count']
+        items = [Menu(**item_data) for item_data in menu_items[:count]]
+        items.extend(generate_menu_items(max(count - len(items), 0), random.Random(options['seed'])))
+        
+        batch_size = options['batch_size']
+        for start in range(0, len(items), batch_size):
+            Menu.objects.bulk_create(items[start:start + batch_size])
+            self.stdout.write(f'{min(start + batch_size, len(items))}/{len(items)} menu items')
+        # bulk_create and the truncate send no signals
+        menu_cache.invalidate()
         
         self.stdout.write(
-            self.style.SUCCESS(f'Successfully populated {len(menu_items)} menu items')
+            self.style.SUCCESS(f'Successfully populated {len(items)} menu items')
         )
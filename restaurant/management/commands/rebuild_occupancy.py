@@ -0,0 +1,54 @@
+import time
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max, Min
+from restaurant.models import Booking, OccupancySummary, SlotAvailability
+from restaurant.tables import floor_plan
+
+
+class Command(BaseCommand):
+    help = ('Recompute the occupancy summary from the bookings, and the availability '
+            'bitmaps from it, a range of dates at a time')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='from', type=date.fromisoformat,
+                            help='First date to rebuild (YYYY-MM-DD). Defaults to the earliest booking.')
+        parser.add_argument('--to', type=date.fromisoformat,
+                            help='Last date to rebuild (YYYY-MM-DD). Defaults to the latest booking.')
+        parser.add_argument('--chunk-days', type=int, default=31,
+                            help='Dates recomputed per transaction.')
+
+    def handle(self, *args, **options):
+        if options['chunk_days'] < 1:
+            raise CommandError('--chunk-days must be at least 1.')
+        # Cover summary rows left over from deleted bookings too.
+        bounds = [
+            model.objects.aggregate(first=Min('reservation_date'), last=Max('reservation_date'))
+            for model in (Booking, OccupancySummary)
+        ]
+        start = options['from'] or min((b['first'] for b in bounds if b['first']), default=None)
+        end = options['to'] or max((b['last'] for b in bounds if b['last']), default=None)
+        if start is None or end is None:
+            self.stdout.write('No bookings to summarize.')
+            return
+        if start > end:
+            raise CommandError('--from is after --to.')
+
+        began = time.monotonic()
+        table_count = len(floor_plan())
+        written = 0
+        chunk_start = start
+        while chunk_start <= end:
+            chunk_end = min(chunk_start + timedelta(days=options['chunk_days'] - 1), end)
+            # SlotAvailability derives from the summary: repair both together.
+            with transaction.atomic():
+                written += OccupancySummary.objects.rebuild(chunk_start, chunk_end)
+                SlotAvailability.objects.rebuild(table_count, chunk_start, chunk_end)
+            self.stdout.write(f'{chunk_start} to {chunk_end}: {written} rows so far')
+            chunk_start = chunk_end + timedelta(days=1)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt occupancy from {start} to {end}: {written} rows '
+            f'in {time.monotonic() - began:.1f}s'
+        ))
@@ -0,0 +1,222 @@
+import hmac
+import threading
+import time
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden
+from .cache import menu_cache
+
+
+# Upper bounds, in seconds, of the request latency histogram buckets.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _ViewStats:
+    __slots__ = ('requests', 'seconds', 'buckets', 'queries', 'db_seconds', 'response_bytes')
+
+    def __init__(self):
+        self.requests = 0
+        self.seconds = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.response_bytes = 0
+
+
+class _Shard:
+    """Counters written by a single thread only, so updates need no lock."""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.views = {}
+
+
+_shards = []
+_shards_lock = threading.Lock()
+_local = threading.local()
+
+
+def _shard():
+    shard = getattr(_local, 'shard', None)
+    if shard is None:
+        shard = _local.shard = _Shard()
+        with _shards_lock:
+            _shards.append(shard)
+    return shard
+
+
+# {'queries', 'seconds'} of the current request. Async views run their
+# queries in a worker thread under sync_to_async, which copies the context,
+# so the queries still reach the request that ran them.
+_request_db = ContextVar('request_db', default=None)
+
+
+def _record_query(execute, sql, params, many, context):
+    db = _request_db.get()
+    if db is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        db['queries'] += 1
+        db['seconds'] += time.perf_counter() - start
+
+
+def _install_recorder(connection, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+connection_created.connect(_install_recorder)
+
+
+class RequestMetricsMiddleware:
+    """Record latency, in-flight requests, DB queries/time and response size
+    per URL name. Each thread writes to its own shard; the shards are only
+    summed when /metrics is scraped.
+
+    Runs natively under WSGI and ASGI, so async views stay on the event
+    loop. Coroutines share the loop thread's shard, but each update is done
+    between awaits, so they cannot interleave.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        # Connections opened before this module was imported.
+        _install_recorder(connection)
+        shard, db, token = self.begin()
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            self.end(shard, token)
+        self.record(shard, request, response, db, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        shard, db, token = self.begin()
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            self.end(shard, token)
+        self.record(shard, request, response, db, time.perf_counter() - start)
+        return response
+
+    def begin(self):
+        shard = _shard()
+        db = {'queries': 0, 'seconds': 0.0}
+        shard.in_flight += 1
+        return shard, db, _request_db.set(db)
+
+    def end(self, shard, token):
+        shard.in_flight -= 1
+        _request_db.reset(token)
+
+    def record(self, shard, request, response, db, elapsed):
+        match = getattr(request, 'resolver_match', None)
+        view = (match.url_name if match else None) or 'unmatched'
+        stats = shard.views.get(view)
+        if stats is None:
+            stats = shard.views[view] = _ViewStats()
+        stats.requests += 1
+        stats.seconds += elapsed
+        bucket = 0
+        while bucket < len(LATENCY_BUCKETS) and elapsed > LATENCY_BUCKETS[bucket]:
+            bucket += 1
+        stats.buckets[bucket] += 1
+        stats.queries += db['queries']
+        stats.db_seconds += db['seconds']
+        if not response.streaming:
+            stats.response_bytes += len(response.content)
+
+
+def collect():
+    """Sum every thread's shard into one {view: _ViewStats} and in-flight count."""
+    with _shards_lock:
+        shards = list(_shards)
+    in_flight = 0
+    totals = {}
+    for shard in shards:
+        in_flight += shard.in_flight
+        for view, stats in list(shard.views.items()):
+            total = totals.get(view)
+            if total is None:
+                total = totals[view] = _ViewStats()
+            total.requests += stats.requests
+            total.seconds += stats.seconds
+            total.queries += stats.queries
+            total.db_seconds += stats.db_seconds
+            total.response_bytes += stats.response_bytes
+            for i, count in enumerate(stats.buckets):
+                total.buckets[i] += count
+    return totals, in_flight
+
+
+def render_metrics():
+    totals, in_flight = collect()
+    lines = [
+        '# HELP littlelemon_http_requests_in_flight Requests currently being served.',
+        '# TYPE littlelemon_http_requests_in_flight gauge',
+        f'littlelemon_http_requests_in_flight {in_flight}',
+        '# HELP littlelemon_http_request_duration_seconds Request latency by URL name.',
+        '# TYPE littlelemon_http_request_duration_seconds histogram',
+    ]
+    for view, stats in sorted(totals.items()):
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS + ('+Inf',), stats.buckets):
+            cumulative += count
+            lines.append(f'littlelemon_http_request_duration_seconds_bucket'
+                         f'{{view="{view}",le="{bound}"}} {cumulative}')
+        lines.append(f'littlelemon_http_request_duration_seconds_sum{{view="{view}"}} {stats.seconds:.6f}')
+        lines.append(f'littlelemon_http_request_duration_seconds_count{{view="{view}"}} {stats.requests}')
+    for name, kind, help_text, attribute, fmt in (
+        ('db_queries_total', 'counter', 'Database queries by URL name.', 'queries', '{}'),
+        ('db_query_duration_seconds_total', 'counter', 'Time spent in the database by URL name.',
+         'db_seconds', '{:.6f}'),
+        ('http_response_size_bytes_total', 'counter', 'Response body bytes by URL name.',
+         'response_bytes', '{}'),
+    ):
+        lines.append(f'# HELP littlelemon_{name} {help_text}')
+        lines.append(f'# TYPE littlelemon_{name} {kind}')
+        for view, stats in sorted(totals.items()):
+            value = fmt.format(getattr(stats, attribute))
+            lines.append(f'littlelemon_{name}{{view="{view}"}} {value}')
+    cache_stats = menu_cache.stats()
+    lines += [
+        '# HELP littlelemon_menu_cache_requests_total Menu cache lookups by result.',
+        '# TYPE littlelemon_menu_cache_requests_total counter',
+    ]
+    for result in ('local_hits', 'shared_hits', 'misses'):
+        lines.append(f'littlelemon_menu_cache_requests_total{{result="{result}"}} {cache_stats[result]}')
+    return '\n'.join(lines) + '\n'
+
+
+def can_read_metrics(request):
+    """Staff users, and scrapers sending settings.METRICS_TOKEN as a
+    bearer token, may read the metrics."""
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if token:
+        scheme, _, credentials = request.headers.get('Authorization', '').partition(' ')
+        if scheme.lower() == 'bearer' and hmac.compare_digest(credentials.encode(), token.encode()):
+            return True
+    return request.user.is_staff
+
+
+def metrics(request):
+    if not can_read_metrics(request):
+        return HttpResponseForbidden()
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:34
+
+from django.db import migrations, models
+
+
+def check_duplicate_bookings(apps, schema_editor):
+    # The unique constraint cannot be added to a database that is already
+    # double-booked. Which reservation to keep is the restaurant's call, so
+    # stop and list them instead of deleting guests' bookings.
+    Booking = apps.get_model('restaurant', 'Booking')
+    slots = (
+        Booking.objects.values('reservation_date', 'reservation_slot')
+        .annotate(total=models.Count('id'))
+        .filter(total__gt=1)
+    )
+    conflicts = Booking.objects.none()
+    for row in slots:
+        conflicts |= Booking.objects.filter(
+            reservation_date=row['reservation_date'],
+            reservation_slot=row['reservation_slot'],
+        )
+    conflicts = list(conflicts.order_by('reservation_date', 'reservation_slot', 'id'))
+    if conflicts:
+        lines = '\n'.join(
+            f'  {booking.reservation_date} slot {booking.reservation_slot}: '
+            f'booking {booking.id} ({booking.first_name})'
+            for booking in conflicts
+        )
+        raise RuntimeError(
+            'Several bookings share a reservation date and slot. Move or delete '
+            'all but one of each before migrating again:\n' + lines
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0003_remove_booking_comment_remove_booking_guest_number_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicate_bookings, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='booking',
+            constraint=models.UniqueConstraint(fields=('reservation_date', 'reservation_slot'), name='unique_booking_slot'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:35
+
+from django.db import migrations, models
+
+
+def build_availability(apps, schema_editor):
+    Booking = apps.get_model('restaurant', 'Booking')
+    SlotAvailability = apps.get_model('restaurant', 'SlotAvailability')
+    masks = {}
+    rows = Booking.objects.values_list('reservation_date', 'reservation_slot').iterator()
+    for reservation_date, reservation_slot in rows:
+        if 0 <= reservation_slot < 24:
+            masks[reservation_date] = masks.get(reservation_date, 0) | (1 << reservation_slot)
+    SlotAvailability.objects.bulk_create(
+        [SlotAvailability(reservation_date=d, booked_slots=m) for d, m in masks.items()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0004_booking_unique_slot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlotAvailability',
+            fields=[
+                ('reservation_date', models.DateField(primary_key=True, serialize=False)),
+                ('booked_slots', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(build_availability, migrations.RunPython.noop),
+    ]
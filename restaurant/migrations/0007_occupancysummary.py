@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:18
+
+from django.db import migrations, models
+
+
+def build_occupancy(apps, schema_editor):
+    Booking = apps.get_model('restaurant', 'Booking')
+    OccupancySummary = apps.get_model('restaurant', 'OccupancySummary')
+    counts = (
+        Booking.objects.order_by().values_list('reservation_date', 'reservation_slot')
+        .annotate(count=models.Count('id')).iterator()
+    )
+    OccupancySummary.objects.bulk_create(
+        (OccupancySummary(reservation_date=d, reservation_slot=s, weekday=d.isoweekday(), bookings=n) for d, s, n in counts),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0006_booking_first_name_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OccupancySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reservation_date', models.DateField()),
+                ('reservation_slot', models.SmallIntegerField()),
+                ('weekday', models.SmallIntegerField()),
+                ('bookings', models.IntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('reservation_date', 'reservation_slot'), name='unique_occupancy_slot')],
+            },
+        ),
+        migrations.RunPython(build_occupancy, migrations.RunPython.noop),
+    ]
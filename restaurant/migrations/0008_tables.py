@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:40
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def seat_existing_bookings(apps, schema_editor):
+    # Until now the restaurant took one party per slot: one table. Operators
+    # replace it with the real floor plan in the admin.
+    Table = apps.get_model('restaurant', 'Table')
+    Booking = apps.get_model('restaurant', 'Booking')
+    table, _ = Table.objects.get_or_create(number=1, defaults={'seats': 8})
+    Booking.objects.filter(table__isnull=True).update(table=table)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0007_occupancysummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Table',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveSmallIntegerField(unique=True)),
+                ('seats', models.PositiveSmallIntegerField(validators=[django.core.validators.MinValueValidator(1)])),
+            ],
+            options={
+                'ordering': ['number'],
+            },
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='party_size',
+            field=models.PositiveSmallIntegerField(default=2, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(20)]),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='table',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='bookings', to='restaurant.table'),
+        ),
+        migrations.RunPython(seat_existing_bookings, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='booking',
+            name='table',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='bookings', to='restaurant.table'),
+        ),
+        migrations.RemoveConstraint(
+            model_name='booking',
+            name='unique_booking_slot',
+        ),
+        migrations.AddConstraint(
+            model_name='booking',
+            constraint=models.UniqueConstraint(fields=('reservation_date', 'reservation_slot', 'table'), name='unique_booking_table'),
+        ),
+    ]
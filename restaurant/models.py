@@ -1,16 +1,289 @@
-from django.db import models
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.db import IntegrityError, models, router, transaction
+from django.db.models import F
+
+
+# Reservation slots offered on the booking page (10 AM to 7 PM).
+OPENING_SLOTS = range(10, 20)
+
+# Slots are hours of the day, one bit each in SlotAvailability.booked_slots.
+ALL_SLOTS_MASK = (1 << 24) - 1
+
+
+# Largest party the booking forms accept.
+MAX_PARTY_SIZE = 20
+# Times a booking looks for another table after losing one to a concurrent
+# booking.
+TABLE_ATTEMPTS = 3
+
+
+class SlotFull(IntegrityError):
+    """No free table seats the party in the requested slot.
+
+    An IntegrityError, like the unique violation a concurrent booking of the
+    same table raises, so callers handle both the same way.
+    """
+
+    def __init__(self, message='This reservation slot is already booked.'):
+        super().__init__(message)
+
+
+class BookingQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        # Like save(), give bookings without a table their best-fit one,
+        # with one query for the batch; raise SlotFull if any is left over.
+        from .tables import assign_tables
+        objs = list(objs)
+        unseated = [obj for obj in objs if obj.table_id is None]
+        if unseated:
+            _, unplaced = assign_tables(unseated, self._db or router.db_for_write(self.model))
+            if unplaced:
+                raise SlotFull()
+        return super().bulk_create(objs, *args, **kwargs)
 
 
 # Create your models here.
+class Table(models.Model):
+    number = models.PositiveSmallIntegerField(unique=True)
+    seats = models.PositiveSmallIntegerField(validators=[MinValueValidator(1)])
+
+    class Meta:
+        ordering = ['number']
+
+    def __str__(self):
+        return f"Table {self.number} ({self.seats} seats)"
+
+
 class Booking(models.Model):
     first_name = models.CharField(max_length=200)
     reservation_date = models.DateField()
     reservation_slot = models.SmallIntegerField(default=10)
+    party_size = models.PositiveSmallIntegerField(
+        default=2, validators=[MinValueValidator(1), MaxValueValidator(MAX_PARTY_SIZE)])
+    # Assigned by save() and bulk_create() when unset.
+    table = models.ForeignKey(Table, on_delete=models.PROTECT, related_name='bookings')
+
+    objects = BookingQuerySet.as_manager()
+
+    class Meta:
+        # One party per table and slot, enforced by the database so that
+        # concurrent requests cannot double-book a table. The constraint's
+        # index also serves lookups by date and by (date, slot).
+        constraints = [
+            models.UniqueConstraint(
+                fields=['reservation_date', 'reservation_slot', 'table'],
+                name='unique_booking_table',
+            ),
+        ]
+        # Name-prefix lookups from the front desk (``?name=``).
+        indexes = [
+            models.Index(fields=['first_name'], name='booking_first_name_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored slot so an update can release it in the
+        # availability index without reading the row again.
+        instance._loaded_slot = (
+            instance.__dict__.get('reservation_date'),
+            instance.__dict__.get('reservation_slot'),
+        )
+        return instance
+
+    def save(self, *args, **kwargs):
+        # Picks a table when the booking has none, has moved or has outgrown
+        # it. post_save keeps SlotAvailability and OccupancySummary in step;
+        # all of it runs in one transaction.
+        from .tables import assign_table, needs_table
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        allocate = needs_table(self)
+        for attempt in range(TABLE_ATTEMPTS):
+            try:
+                with transaction.atomic(using=using):
+                    if allocate:
+                        assign_table(self, using)
+                    super().save(*args, **kwargs)
+                return
+            except SlotFull:
+                raise
+            except IntegrityError:
+                # A concurrent booking took the table; pick again.
+                if not allocate or attempt == TABLE_ATTEMPTS - 1:
+                    raise
 
     def __str__(self): 
         return f"{self.first_name} - {self.reservation_date}"
 
 
+class SlotAvailabilityManager(models.Manager):
+    def mark_booked(self, reservation_date, slots):
+        self._apply(reservation_date, set_mask=slot_mask(slots))
+
+    def mark_free(self, reservation_date, slots):
+        self._apply(reservation_date, clear_mask=slot_mask(slots))
+
+    def mark(self, reservation_date, booked=(), free=()):
+        """mark_booked() and mark_free() in one UPDATE."""
+        self._apply(reservation_date, set_mask=slot_mask(booked), clear_mask=slot_mask(free))
+
+    def mark_booked_many(self, slots_by_date, chunk_size=500):
+        """mark_booked() for many dates at once: missing rows are created in
+        one batch, then one UPDATE is run per distinct set of slots rather
+        than one per date."""
+        dates_by_mask = {}
+        for reservation_date, slots in slots_by_date.items():
+            mask = slot_mask(slots)
+            if mask:
+                dates_by_mask.setdefault(mask, []).append(reservation_date)
+        if not dates_by_mask:
+            return
+        self.bulk_create(
+            [self.model(reservation_date=reservation_date)
+             for dates in dates_by_mask.values() for reservation_date in dates],
+            ignore_conflicts=True, batch_size=chunk_size,
+        )
+        for mask, dates in dates_by_mask.items():
+            for i in range(0, len(dates), chunk_size):
+                self.filter(pk__in=dates[i:i + chunk_size]).update(
+                    booked_slots=F('booked_slots').bitor(mask))
+
+    def rebuild(self, table_count, start=None, end=None):
+        """Recompute the rows from OccupancySummary for ``table_count``
+        tables, e.g. after tables were added or removed; only those from
+        ``start`` to ``end`` (inclusive) when given."""
+        summary = OccupancySummary.objects.using(self.db).filter(bookings__gte=max(table_count, 1))
+        rows = self.all()
+        if start is not None:
+            summary = summary.filter(reservation_date__range=(start, end))
+            rows = rows.filter(reservation_date__range=(start, end))
+        masks = {}
+        full = summary.values_list('reservation_date', 'reservation_slot')
+        for reservation_date, reservation_slot in full.iterator():
+            masks[reservation_date] = masks.get(reservation_date, 0) | slot_mask([reservation_slot])
+        with transaction.atomic(using=self.db):
+            rows.delete()
+            self.bulk_create(
+                [self.model(reservation_date=d, booked_slots=mask) for d, mask in masks.items()],
+                batch_size=1000,
+            )
+
+    def _apply(self, reservation_date, set_mask=0, clear_mask=0):
+        if not set_mask and not clear_mask:
+            return
+        expression = F('booked_slots')
+        if clear_mask:
+            expression = expression.bitand(ALL_SLOTS_MASK ^ clear_mask)
+        if set_mask:
+            expression = expression.bitor(set_mask)
+        if not self.filter(pk=reservation_date).update(booked_slots=expression):
+            # First booking on this date: create the row, then apply the same
+            # update so a concurrent creator cannot overwrite our bits.
+            self.bulk_create([self.model(reservation_date=reservation_date)], ignore_conflicts=True)
+            self.filter(pk=reservation_date).update(booked_slots=expression)
+
+
+class SlotAvailability(models.Model):
+    """Fully booked slots (no table left) per date as a bitmap, maintained
+    on Booking writes from OccupancySummary."""
+    reservation_date = models.DateField(primary_key=True)
+    booked_slots = models.IntegerField(default=0)
+
+    objects = SlotAvailabilityManager()
+
+    def __str__(self):
+        return f"{self.reservation_date}: {self.booked()}"
+
+    def booked(self):
+        return mask_slots(self.booked_slots)
+
+    def free(self):
+        return [slot for slot in OPENING_SLOTS if not self.booked_slots & (1 << slot)]
+
+
+class OccupancySummaryManager(models.Manager):
+    def add(self, deltas, chunk_size=500):
+        """Add ``{(reservation_date, reservation_slot): delta}`` to the
+        counts: missing rows are created in one batch, then one F() UPDATE
+        is run per (slot, delta) and chunk of dates."""
+        dates_by_change = {}
+        for (reservation_date, reservation_slot), delta in deltas.items():
+            if delta:
+                dates_by_change.setdefault((reservation_slot, delta), []).append(reservation_date)
+        if not dates_by_change:
+            return
+        self.bulk_create(
+            [self.model(reservation_date=reservation_date, reservation_slot=reservation_slot,
+                        weekday=reservation_date.isoweekday())
+             for (reservation_slot, delta), dates in dates_by_change.items() if delta > 0
+             for reservation_date in dates],
+            ignore_conflicts=True, batch_size=chunk_size,
+        )
+        for (reservation_slot, delta), dates in dates_by_change.items():
+            for i in range(0, len(dates), chunk_size):
+                self.filter(
+                    reservation_slot=reservation_slot,
+                    reservation_date__in=dates[i:i + chunk_size],
+                ).update(bookings=F('bookings') + delta)
+
+    def rebuild(self, start, end, batch_size=1000):
+        """Recompute the rows from ``start`` to ``end`` (inclusive) from
+        Booking with one GROUP BY, in one transaction. Returns the number
+        of rows written."""
+        with transaction.atomic(using=self.db):
+            self.filter(reservation_date__range=(start, end)).delete()
+            counts = (
+                Booking.objects.using(self.db)
+                .filter(reservation_date__range=(start, end))
+                .order_by().values_list('reservation_date', 'reservation_slot')
+                .annotate(count=models.Count('id'))
+            )
+            rows = self.bulk_create(
+                [self.model(reservation_date=reservation_date, reservation_slot=reservation_slot,
+                            weekday=reservation_date.isoweekday(), bookings=count)
+                 for reservation_date, reservation_slot, count in counts],
+                batch_size=batch_size,
+            )
+        return len(rows)
+
+
+class OccupancySummary(models.Model):
+    """Bookings per (date, slot), maintained on Booking writes so reports
+    never scan Booking. ``manage.py rebuild_occupancy`` recomputes it."""
+    reservation_date = models.DateField()
+    reservation_slot = models.SmallIntegerField()
+    # ISO weekday (Monday is 1), stored so reports group on a plain column.
+    weekday = models.SmallIntegerField()
+    # Not a PositiveIntegerField: drift must not make booking deletes fail.
+    bookings = models.IntegerField(default=0)
+
+    objects = OccupancySummaryManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['reservation_date', 'reservation_slot'],
+                name='unique_occupancy_slot',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.reservation_date} {self.reservation_slot}:00: {self.bookings}"
+
+
+def slot_mask(slots):
+    mask = 0
+    for slot in slots:
+        slot = int(slot)
+        if 0 <= slot < 24:
+            mask |= 1 << slot
+    return mask
+
+
+def mask_slots(mask):
+    return [slot for slot in range(24) if mask & (1 << slot)]
+
+
 # Add code to create Menu model
 class Menu(models.Model):
    name = models.CharField(max_length=200) 
@@ -18,4 +291,4 @@ class Menu(models.Model):
    menu_item_description = models.TextField(max_length=1000, default='') 
 
    def __str__(self):
-      return f'{self.name} : ${str(self.price)}'
\ No newline at end of file
+      return f'{self.name} : ${str(self.price)}'
@@ -0,0 +1,59 @@
+from django.db.models import Q
+from rest_framework.pagination import CursorPagination
+
+
+# Stable ordering for booking listings; the unique (date, slot) index
+# serves it, and id breaks any remaining ties.
+BOOKING_ORDERING = ('reservation_date', 'reservation_slot', 'id')
+
+
+def keyset_filter(queryset, ordering, values):
+    """Restrict ``queryset`` to rows that sort strictly after ``values``.
+
+    ``ordering`` is a tuple of ascending field names and ``values`` the
+    matching values of the last row already returned. Unlike OFFSET the
+    database seeks straight to the position, so every page costs the same.
+    """
+    condition = Q()
+    for i, field in enumerate(ordering):
+        step = Q(**{f'{field}__gt': values[i]})
+        for previous_field, previous_value in zip(ordering[:i], values[:i]):
+            step &= Q(**{previous_field: previous_value})
+        condition |= step
+    return queryset.filter(condition)
+
+
+def keyset_iterator(queryset, ordering, chunk_size):
+    """Yield every row of a values() ``queryset`` in ``ordering``, reading
+    ``chunk_size`` rows per query with keyset_filter().
+
+    Each query is a short index range scan, so memory stays flat even on
+    backends whose drivers buffer whole result sets (mysqlclient does, so
+    .iterator() alone would not stream there).
+    """
+    queryset = queryset.order_by(*ordering)
+    chunk = list(queryset[:chunk_size])
+    while chunk:
+        yield from chunk
+        if len(chunk) < chunk_size:
+            return
+        last = chunk[-1]
+        chunk = list(keyset_filter(queryset, ordering, [last[field] for field in ordering])[:chunk_size])
+
+
+class StandardCursorPagination(CursorPagination):
+    """Cursor pagination for the API list endpoints.
+
+    Clients may ask for ``?page_size=`` up to ``max_page_size``. Cursors
+    encode the position in the ordering, so deep pages cost the same as
+    the first one.
+    """
+    ordering = 'id'
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
+class BookingCursorPagination(StandardCursorPagination):
+    # The cursor seeks on reservation_date and only skips ties within a
+    # single date, which are bounded by the slots of one day.
+    ordering = BOOKING_ORDERING
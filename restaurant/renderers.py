@@ -0,0 +1,63 @@
+import json
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # optional speedup, see requirements.txt
+    orjson = None
+
+
+def _default(obj):
+    # Types orjson does not know (Decimal, lazy translation strings, ...)
+    # are encoded the way Django's encoder would.
+    return DjangoJSONEncoder().default(obj)
+
+
+def dumps(data):
+    """Encode ``data`` (dicts/lists of plain values and dates) to JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(data, default=_default)
+    return json.dumps(data, cls=DjangoJSONEncoder, separators=(',', ':')).encode()
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer that encodes with orjson when it is installed.
+
+    Indented output (e.g. ``Accept: application/json; indent=4``) and
+    installs without orjson use the stock renderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type or '', renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        return orjson.dumps(data, default=self._default)
+
+    def _default(self, obj):
+        return self.encoder_class().default(obj)
+
+
+class ExportRenderer(BaseRenderer):
+    """Selects an export format through content negotiation (``?format=``
+    or Accept). Export views stream their own body, so only error responses
+    are rendered here, as plain ``key: value`` lines."""
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if isinstance(data, dict):
+            return ''.join(f'{key}: {value}\n' for key, value in data.items()).encode()
+        return f'{data}\n'.encode()
+
+
+class CSVRenderer(ExportRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+
+class NDJSONRenderer(ExportRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
@@ -0,0 +1,164 @@
+import random
+import time
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+# URL names whose GET/HEAD/OPTIONS requests may read from a replica. Views
+# answering conditional GETs from version counters (e.g. 'bookings') are
+# left out: the counters are bumped on primary commit, so a lagging replica
+# would serve a stale body under the new ETag. The menu views read through
+# the menu cache, which always uses the primary.
+REPLICA_VIEWS = {
+    'menu', 'menu_item',
+    'menu-items', 'single-menu-item', 'menu-search',
+    'booking-list', 'booking-detail', 'booking-export', 'user-list', 'user-detail',
+    'occupancy-heatmap',
+}
+# Sessions and tokens must be readable right after login, so they always
+# come from the primary.
+PRIMARY_ONLY_APPS = {'sessions', 'authtoken', 'admin', 'contenttypes'}
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_request_routing = ContextVar('request_routing', default=None)
+_down_until = {}
+_checked_at = {}
+
+
+class _Routing:
+    # Mutable, so a pin set while the ORM runs in another thread under
+    # sync_to_async is seen by the rest of the request.
+    __slots__ = ('request', '_replica_allowed', 'pinned')
+
+    def __init__(self, replica_allowed=False, request=None):
+        self.request = request
+        self._replica_allowed = replica_allowed
+        self.pinned = False
+
+    @property
+    def replica_allowed(self):
+        if self.request is None:
+            return self._replica_allowed
+        # The URL is resolved before the view, the first thing to query, runs.
+        match = getattr(self.request, 'resolver_match', None)
+        return (self.request.method in SAFE_METHODS and match is not None
+                and match.url_name in REPLICA_VIEWS)
+
+
+def replicas():
+    """{alias: weight} from settings.DATABASE_REPLICAS."""
+    return getattr(settings, 'DATABASE_REPLICAS', {})
+
+
+def healthy(alias):
+    """Whether ``alias`` may be used, checking it at most every
+    REPLICA_HEALTH_CHECK_INTERVAL seconds and skipping it for
+    REPLICA_COOLDOWN seconds after a failure."""
+    now = time.monotonic()
+    if _down_until.get(alias, 0) > now:
+        return False
+    interval = getattr(settings, 'REPLICA_HEALTH_CHECK_INTERVAL', 5)
+    if now - _checked_at.get(alias, float('-inf')) < interval:
+        return True
+    _checked_at[alias] = now
+    connection = connections[alias]
+    try:
+        with connection.wrap_database_errors:
+            if connection.connection is not None and not connection.is_usable():
+                connection.close()
+            if connection.connection is None:
+                connection.connect()
+    except Exception:
+        mark_unhealthy(alias)
+        return False
+    return True
+
+
+def mark_unhealthy(alias):
+    _down_until[alias] = time.monotonic() + getattr(settings, 'REPLICA_COOLDOWN', 30)
+    try:
+        connections[alias].close()
+    except Exception:
+        pass
+
+
+def choose_replica():
+    """A weighted random healthy replica, or None to use the primary."""
+    candidates = dict(replicas())
+    while candidates:
+        alias = random.choices(list(candidates), weights=list(candidates.values()))[0]
+        if healthy(alias):
+            return alias
+        del candidates[alias]
+    return None
+
+
+class ReplicaRouter:
+    """Send reads of replica-safe requests to settings.DATABASE_REPLICAS.
+
+    Only safe-method requests to REPLICA_VIEWS may use a replica, and only
+    until the request writes: from then on it reads from the primary so it
+    sees its own writes. Code outside a request (commands, shell, tests)
+    always uses the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        routing = _request_routing.get()
+        if routing is None or not routing.replica_allowed or routing.pinned:
+            return None
+        if model._meta.app_label in PRIMARY_ONLY_APPS:
+            return None
+        return choose_replica()
+
+    def db_for_write(self, model, **hints):
+        routing = _request_routing.get()
+        if routing is not None:
+            routing.pinned = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive the schema through replication.
+        if db in replicas():
+            return False
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """Mark which requests ReplicaRouter may send to a replica.
+
+    Sync and async capable, so it does not force an ASGI stack into a
+    thread; and without process_view, which Django would run through
+    sync_to_async for every async request.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        token = _request_routing.set(_Routing(request=request))
+        try:
+            return self.get_response(request)
+        finally:
+            _request_routing.reset(token)
+
+    async def __acall__(self, request):
+        token = _request_routing.set(_Routing(request=request))
+        try:
+            return await self.get_response(request)
+        finally:
+            _request_routing.reset(token)
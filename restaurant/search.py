@@ -0,0 +1,127 @@
+import heapq
+import math
+import re
+import threading
+import unicodedata
+from bisect import bisect_left, bisect_right
+from .cache import get_version, menu_items
+
+
+# Matches in the name count for more than matches in the description.
+FIELD_WEIGHTS = {'name': 3.0, 'menu_item_description': 1.0}
+# A term that is only a prefix of a word (``gri`` for ``grilled``) scores
+# this fraction of a whole-word match.
+PREFIX_FACTOR = 0.5
+TOKEN = re.compile(r'\w+')
+TERM_CACHE_SIZE = 4096
+
+
+def tokenize(text):
+    """Lowercase, accent-free words of ``text``."""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return TOKEN.findall(text.lower())
+
+
+class MenuIndex:
+    """Inverted index over the names and descriptions of the menu.
+
+    Built once from the cached menu rows; every query after that runs in
+    memory without touching the database or the cache. Terms match whole
+    words or word prefixes, all terms must match, and results are ranked
+    by field weight and by how rare the matched words are.
+    """
+
+    def __init__(self, items):
+        self.items = {item['id']: item for item in items}
+        postings = {}
+        for item in items:
+            for field, weight in FIELD_WEIGHTS.items():
+                for token in tokenize(item[field]):
+                    entry = postings.setdefault(token, {})
+                    # A word repeated in a field counts once.
+                    entry[item['id']] = max(entry.get(item['id'], 0), weight)
+        count = len(items)
+        self.postings = {
+            token: {pk: weight * math.log(1 + count / len(docs)) for pk, weight in docs.items()}
+            for token, docs in postings.items()
+        }
+        # Sorted vocabulary for prefix lookups.
+        self.vocabulary = sorted(self.postings)
+        # Sorted (price, id) for price ranges without a text query.
+        self.by_price = sorted((item['price'], item['id']) for item in items)
+        self.prices = [price for price, _ in self.by_price]
+        self.price = {item['id']: item['price'] for item in items}
+        self.tiebreak = {item['id']: (len(item['name']), item['id']) for item in items}
+        # Short prefixes expand to many words and come back with every
+        # keystroke of a search box, so their merged scores are kept.
+        self._term_cache = {}
+
+    def term_scores(self, term):
+        """{id: score} of the items with a word equal to or starting with ``term``."""
+        scores = self._term_cache.get(term)
+        if scores is None:
+            scores = self._merge_term_scores(term)
+            if len(self._term_cache) >= TERM_CACHE_SIZE:
+                self._term_cache.clear()
+            self._term_cache[term] = scores
+        return scores
+
+    def _merge_term_scores(self, term):
+        scores = dict(self.postings.get(term, {}))
+        # Words starting with ``term`` sort between ``term`` and ``term`` + U+10FFFF.
+        start = bisect_left(self.vocabulary, term)
+        end = bisect_left(self.vocabulary, term + '\U0010ffff', start)
+        for token in self.vocabulary[start:end]:
+            if token == term:
+                continue
+            for pk, score in self.postings[token].items():
+                score *= PREFIX_FACTOR
+                if score > scores.get(pk, 0):
+                    scores[pk] = score
+        return scores
+
+    def search(self, query='', min_price=None, max_price=None, limit=20):
+        """(total, [item, ...]) of the best ``limit`` matches of ``query``
+        priced within [min_price, max_price]. Without a query, items are
+        listed by price."""
+        terms = tokenize(query)
+        if not terms:
+            low = 0 if min_price is None else bisect_left(self.prices, min_price)
+            high = len(self.prices) if max_price is None else bisect_right(self.prices, max_price)
+            return max(high - low, 0), [self.items[pk] for _, pk in self.by_price[low:min(high, low + limit)]]
+
+        # Rarest term first, so the candidate set starts small.
+        per_term = sorted((self.term_scores(term) for term in set(terms)), key=len)
+        scores = per_term[0]
+        for term_scores in per_term[1:]:
+            scores = {pk: score + term_scores[pk] for pk, score in scores.items() if pk in term_scores}
+            if not scores:
+                break
+        if min_price is not None or max_price is not None:
+            low = float('-inf') if min_price is None else min_price
+            high = float('inf') if max_price is None else max_price
+            price = self.price
+            scores = {pk: score for pk, score in scores.items() if low <= price[pk] <= high}
+        # Ties go to the shorter name, then the older item.
+        ranked = heapq.nsmallest(limit, ((-score, self.tiebreak[pk]) for pk, score in scores.items()))
+        return len(scores), [self.items[tiebreak[1]] for _, tiebreak in ranked]
+
+
+# (menu version, MenuIndex), replaced as a whole so readers never see a mix.
+_index = [(None, None)]
+_index_lock = threading.Lock()
+
+
+def menu_index():
+    """The MenuIndex of the current menu, rebuilt after the menu version is
+    bumped (any Menu save or delete)."""
+    version = get_version('menu')
+    built_for, index = _index[0]
+    if built_for != version:
+        with _index_lock:
+            built_for, index = _index[0]
+            if built_for != version:
+                index = MenuIndex(menu_items())
+                _index[0] = (version, index)
+    return index
@@ -1,6 +1,7 @@
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
 from django.contrib.auth.models import User
-from .models import Menu, Booking
+from .models import Menu, Booking, SlotFull
 
 
 class MenuSerializer(serializers.ModelSerializer):
@@ -13,6 +14,22 @@ class BookingSerializer(serializers.ModelSerializer):
     class Meta:
         model = Booking
         fields = '__all__'
+        # Booking.save() picks the table.
+        read_only_fields = ['table']
+        # Table conflicts are left to the unique constraint instead of a
+        # SELECT before every write; see save() below.
+        validators = []
+
+    def save(self, **kwargs):
+        try:
+            with transaction.atomic():
+                return super().save(**kwargs)
+        except SlotFull as exc:
+            raise serializers.ValidationError({'non_field_errors': [str(exc)]})
+        except IntegrityError:
+            raise serializers.ValidationError(
+                {'non_field_errors': ['This reservation slot is already booked.']}
+            )
 
 
 class UserSerializer(serializers.ModelSerializer):
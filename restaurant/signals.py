@@ -0,0 +1,153 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+from rest_framework.authtoken.models import Token
+from .authentication import token_cache
+from .cache import bookings_version_name, bump_versions, menu_cache, table_cache
+from .models import Booking, Menu, OccupancySummary, SlotAvailability, Table
+from .tables import floor_plan
+
+
+# Sent with ``bookings=[...]`` after Booking rows are inserted with
+# bulk_create, which does not send post_save.
+bookings_bulk_created = Signal()
+
+
+def _slot(reservation_date, reservation_slot):
+    # Views may pass the raw request values (e.g. '2024-12-25', '18').
+    field = Booking._meta.get_field('reservation_date')
+    return field.to_python(reservation_date), int(reservation_slot)
+
+
+def refresh_availability(pairs):
+    """Set or clear the SlotAvailability bits of the (date, slot) ``pairs``
+    from their OccupancySummary counts: a slot is booked once every table
+    is."""
+    pairs = set(pairs)
+    if not pairs:
+        return
+    table_count = len(floor_plan())
+    counts = {}
+    rows = OccupancySummary.objects.filter(
+        reservation_date__in={reservation_date for reservation_date, _ in pairs},
+        reservation_slot__in={reservation_slot for _, reservation_slot in pairs},
+    ).values_list('reservation_date', 'reservation_slot', 'bookings')
+    for reservation_date, reservation_slot, bookings in rows:
+        counts[reservation_date, reservation_slot] = bookings
+    by_date = {}
+    for reservation_date, reservation_slot in pairs:
+        booked, free = by_date.setdefault(reservation_date, ([], []))
+        if counts.get((reservation_date, reservation_slot), 0) >= table_count:
+            booked.append(reservation_slot)
+        else:
+            free.append(reservation_slot)
+    for reservation_date, (booked, free) in by_date.items():
+        SlotAvailability.objects.mark(reservation_date, booked=booked, free=free)
+
+
+@receiver(post_save, sender=Booking)
+def update_slot_indexes_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    current = _slot(instance.reservation_date, instance.reservation_slot)
+    previous = getattr(instance, '_loaded_slot', None)
+    if previous and previous[0] is not None and previous[1] is not None:
+        previous = _slot(*previous)
+    else:
+        previous = None
+    # Where the booking moved from, for receivers that run after this one.
+    instance._previous_slot = previous if previous != current else None
+    instance._loaded_slot = current
+    if not created and not instance._previous_slot:
+        return
+    deltas = {current: 1}
+    if instance._previous_slot:
+        deltas[previous] = -1
+    OccupancySummary.objects.add(deltas)
+    refresh_availability(deltas)
+
+
+@receiver(bookings_bulk_created, sender=Booking)
+def update_slot_indexes_on_bulk_create(sender, bookings, **kwargs):
+    deltas = {}
+    for booking in bookings:
+        slot = _slot(booking.reservation_date, booking.reservation_slot)
+        deltas[slot] = deltas.get(slot, 0) + 1
+    OccupancySummary.objects.add(deltas)
+    # Inserts can only fill slots, so only booked bits are set, in bulk.
+    table_count = len(floor_plan())
+    full = OccupancySummary.objects.filter(
+        reservation_date__in={reservation_date for reservation_date, _ in deltas},
+        reservation_slot__in={reservation_slot for _, reservation_slot in deltas},
+        bookings__gte=table_count,
+    ).values_list('reservation_date', 'reservation_slot')
+    slots_by_date = {}
+    for reservation_date, reservation_slot in full:
+        if (reservation_date, reservation_slot) in deltas:
+            slots_by_date.setdefault(reservation_date, []).append(reservation_slot)
+    SlotAvailability.objects.mark_booked_many(slots_by_date)
+
+
+@receiver(post_delete, sender=Booking)
+def update_slot_indexes_on_delete(sender, instance, **kwargs):
+    slot = _slot(instance.reservation_date, instance.reservation_slot)
+    OccupancySummary.objects.add({slot: -1})
+    refresh_availability([slot])
+
+
+@receiver(post_save, sender=Table)
+@receiver(post_delete, sender=Table)
+def invalidate_floor_plan(sender, **kwargs):
+    # Bumped now and on commit, like the menu. The number of tables decides
+    # which slots are full, so the availability bitmaps are recomputed.
+    table_cache.invalidate()
+    transaction.on_commit(table_cache.invalidate)
+    SlotAvailability.objects.rebuild(len(floor_plan()))
+
+
+@receiver(post_save, sender=Menu)
+@receiver(post_delete, sender=Menu)
+def invalidate_menu_cache(sender, **kwargs):
+    # Bump now for this transaction's own reads and again on commit, so a
+    # reader that cached pre-commit rows in between is discarded too.
+    menu_cache.invalidate()
+    transaction.on_commit(menu_cache.invalidate)
+
+
+@receiver(post_delete, sender=Token)
+def revoke_deleted_token(sender, instance, **kwargs):
+    token_cache.revoke([instance.key])
+
+
+@receiver(post_save, sender=User)
+def revoke_user_tokens(sender, instance, created, **kwargs):
+    # Drop cached copies of the user (e.g. deactivated) so the next request
+    # re-reads them.
+    if not created:
+        token_cache.revoke(Token.objects.filter(user=instance).values_list('key', flat=True))
+
+
+def bump_bookings_versions(dates):
+    # Validators for ``/bookings?date=``; bumped again on commit like the menu.
+    names = [bookings_version_name(reservation_date) for reservation_date in set(dates)]
+
+    def bump():
+        bump_versions(names)
+    bump()
+    transaction.on_commit(bump)
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def bump_bookings_version(sender, instance, **kwargs):
+    dates = [_slot(instance.reservation_date, instance.reservation_slot)[0]]
+    previous = getattr(instance, '_previous_slot', None)
+    if previous:
+        dates.append(previous[0])
+    bump_bookings_versions(dates)
+
+
+@receiver(bookings_bulk_created, sender=Booking)
+def bump_bookings_version_on_bulk_create(sender, bookings, **kwargs):
+    bump_bookings_versions(_slot(b.reservation_date, b.reservation_slot)[0] for b in bookings)
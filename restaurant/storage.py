@@ -0,0 +1,132 @@
+import gzip
+import hashlib
+import json
+import os
+from io import BytesIO
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:  # optional, see requirements.txt
+    brotli = None
+
+try:
+    from PIL import Image
+except ImportError:  # optional, see requirements.txt
+    Image = None
+
+
+# Extensions worth precompressing; images are already compressed.
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.txt', '.json', '.ico')
+# Widths, in pixels, of the generated image variants.
+IMAGE_WIDTHS = (480, 960, 1440)
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+# Only the site's own images get variants, not those of admin or DRF.
+IMAGE_DIRECTORIES = ('img/',)
+IMAGE_QUALITY = 80
+
+
+def variant_name(name, width, extension):
+    """Logical name of a resized copy, e.g. img/salad.jpg -> img/salad.480w.webp."""
+    stem = os.path.splitext(name)[0]
+    return f'{stem}.{width}w{extension}'
+
+
+_version = {}
+
+
+def static_version():
+    """A short hash of the loaded staticfiles manifest, or '' without one
+    (e.g. in development). Cached pages and fragments embed hashed asset
+    URLs, so their keys include it and a deploy that changes assets rolls
+    them over."""
+    hashed_files = getattr(staticfiles_storage, 'hashed_files', None)
+    if not hashed_files:
+        return ''
+    # The manifest is loaded once per process; hash it once.
+    if _version.get('manifest') is not hashed_files:
+        digest = hashlib.sha256(json.dumps(hashed_files, sort_keys=True).encode()).hexdigest()
+        _version.update(manifest=hashed_files, version=digest[:12])
+    return _version['version']
+
+
+class OptimizedStaticFilesStorage(ManifestStaticFilesStorage):
+    """ManifestStaticFilesStorage that also writes, at collectstatic time,
+    resized and recompressed image variants (WebP plus the original format)
+    and gzip/brotli copies of text assets.
+
+    Variants are added to the manifest under variant_name(), so templates
+    can look them up (see the ``picture`` tag). The ``.gz`` and ``.br``
+    files sit next to the hashed originals, for web servers that serve
+    precompressed files (nginx gzip_static/brotli_static, WhiteNoise).
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name, hashed_name in list(self.hashed_files.items()):
+            if (Image is not None and name.startswith(IMAGE_DIRECTORIES)
+                    and name.lower().endswith(IMAGE_EXTENSIONS)):
+                yield from self.write_image_variants(name, hashed_name)
+        for hashed_name in set(self.hashed_files.values()):
+            if hashed_name.lower().endswith(COMPRESSIBLE_EXTENSIONS):
+                yield from self.write_compressed(hashed_name)
+        # super() saved the manifest before the variants existed.
+        self.save_manifest()
+
+    def write_image_variants(self, name, hashed_name):
+        with self.open(hashed_name) as original:
+            try:
+                image = Image.open(original)
+                image.load()
+            except OSError as exc:
+                yield name, None, exc
+                return
+            original_size = original.size
+        extension = os.path.splitext(name)[1].lower()
+        widths = [width for width in IMAGE_WIDTHS if width < image.width] + [image.width]
+        for width in widths:
+            height = round(image.height * width / image.width)
+            resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+            for variant_extension in ('.webp', extension):
+                content = self.encode_image(resized, variant_extension)
+                if width == image.width and content.size >= original_size:
+                    # Recompressing did not help; the original serves this width.
+                    continue
+                logical = variant_name(name, width, variant_extension)
+                hashed = self.hashed_name(logical, content)
+                if self.exists(hashed):
+                    self.delete(hashed)
+                self._save(hashed, content)
+                self.hashed_files[self.hash_key(self.clean_name(logical))] = hashed
+                yield logical, hashed, True
+
+    def encode_image(self, image, extension):
+        output = BytesIO()
+        if extension == '.webp':
+            image.save(output, 'WEBP', quality=IMAGE_QUALITY, method=6)
+        elif extension == '.png':
+            image.save(output, 'PNG', optimize=True)
+        else:
+            image.convert('RGB').save(output, 'JPEG', quality=IMAGE_QUALITY,
+                                      optimize=True, progressive=True)
+        return ContentFile(output.getvalue())
+
+    def write_compressed(self, hashed_name):
+        with self.open(hashed_name) as original:
+            data = original.read()
+        encoders = [('.gz', lambda raw: gzip.compress(raw, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            encoders.append(('.br', lambda raw: brotli.compress(raw, quality=11)))
+        for suffix, compress in encoders:
+            compressed = compress(data)
+            # Not worth a file (or a request header check) if it is not smaller.
+            if len(compressed) >= len(data):
+                continue
+            path = hashed_name + suffix
+            if self.exists(path):
+                self.delete(path)
+            self._save(path, ContentFile(compressed))
+            yield hashed_name, path, True
@@ -0,0 +1,130 @@
+from datetime import timedelta
+from itertools import product
+from django.core.management.color import no_style
+from django.db import connections, router
+from .models import OPENING_SLOTS, Booking, Menu
+
+
+# Relative popularity of each opening slot: a lunch peak and a dinner rush.
+SLOT_WEIGHTS = {10: 1, 11: 2, 12: 5, 13: 5, 14: 2, 15: 1, 16: 2, 17: 4, 18: 7, 19: 7}
+# Relative popularity of each weekday, Monday first.
+WEEKDAY_WEIGHTS = (0.6, 0.7, 0.8, 1.0, 1.4, 1.6, 1.1)
+
+FIRST_NAMES = (
+    'Adrian', 'Amara', 'Anna', 'Ben', 'Carla', 'Chen', 'Daniel', 'Dimitra', 'Elena', 'Farah',
+    'George', 'Hana', 'Ivan', 'Jamal', 'John', 'Julia', 'Kofi', 'Laura', 'Leo', 'Lucia',
+    'Marco', 'Mary', 'Mei', 'Michael', 'Nadia', 'Nikos', 'Omar', 'Priya', 'Rosa', 'Sam',
+    'Sarah', 'Sofia', 'Tariq', 'Tom', 'Valentina', 'Wei', 'Yara', 'Yusuf', 'Zara', 'Zoe',
+)
+LAST_NAMES = (
+    'Alvarez', 'Brown', 'Costa', 'Davis', 'Demir', 'Evans', 'Garcia', 'Haddad', 'Ivanova',
+    'Johnson', 'Kim', 'Kowalski', 'Lee', 'Martin', 'Moreau', 'Nakamura', 'Nguyen', 'Okafor',
+    'Papadopoulos', 'Patel', 'Rossi', 'Santos', 'Smith', 'Silva', 'Taylor', 'Wilson',
+)
+
+# (dish, price range)
+DISHES = (
+    ('Bruschetta', (6, 10)), ('Flatbread', (7, 12)),
+    ('Dip Platter', (8, 13)), ('Skewers', (9, 14)),
+    ('Salad', (8, 15)), ('Grain Bowl', (10, 16)),
+    ('Penne', (14, 20)), ('Linguine', (15, 22)), ('Risotto', (16, 24)),
+    ('Plate', (18, 32)), ('Tagine', (19, 30)), ('Souvlaki', (16, 26)),
+    ('Cake', (5, 9)), ('Tart', (6, 10)), ('Gelato', (4, 8)),
+)
+INGREDIENTS = (
+    'Lamb', 'Chicken', 'Sea Bass', 'Octopus', 'Shrimp', 'Halloumi', 'Feta', 'Aubergine',
+    'Artichoke', 'Chickpea', 'Lemon', 'Fig', 'Pistachio', 'Tomato', 'Mushroom', 'Olive',
+)
+STYLES = (
+    'Grilled', 'Roasted', 'Smoked', 'Braised', 'Charred', 'Crispy', 'Herbed', 'Spiced',
+    'Marinated', 'Slow-cooked', 'Citrus', 'Rustic',
+)
+DESCRIPTIONS = (
+    '{style} {ingredient} {dish_lower} with {side}, finished with {finish}.',
+    'Our {dish_lower} of {style_lower} {ingredient_lower}, served with {side} and {finish}.',
+    'A house favourite: {ingredient_lower} prepared {style_lower}, with {side} and {finish}.',
+)
+SIDES = ('warm pita', 'herbed rice', 'roasted peppers', 'charred greens', 'garlic yoghurt',
+         'crushed potatoes', 'toasted almonds', 'pickled onions')
+FINISHES = ('olive oil', 'fresh oregano', 'lemon zest', 'sumac', 'honey', 'sea salt',
+            'chili flakes', 'basil')
+
+
+def truncate(*models):
+    """Empty the tables of ``models`` with the backend's flush SQL (TRUNCATE
+    on MySQL, DELETE without WHERE on SQLite) instead of loading and
+    deleting rows one by one. Sends no delete signals."""
+    connection = connections[router.db_for_write(models[0])]
+    tables = [model._meta.db_table for model in models]
+    connection.ops.execute_sql_flush(
+        connection.ops.sql_flush(no_style(), tables, reset_sequences=True))
+
+
+def generate_menu_items(count, rng):
+    """Yield ``count`` unsaved Menu items with distinct names."""
+    combinations = list(product(STYLES, INGREDIENTS, DISHES))
+    rng.shuffle(combinations)
+    for i in range(count):
+        style, ingredient, (dish, (low, high)) = combinations[i % len(combinations)]
+        name = f'{style} {ingredient} {dish}'
+        if i >= len(combinations):
+            name = f'{name} No. {i // len(combinations) + 1}'
+        description = rng.choice(DESCRIPTIONS).format(
+            style=style, style_lower=style.lower(), ingredient=ingredient,
+            ingredient_lower=ingredient.lower(), dish_lower=dish.lower(),
+            side=rng.choice(SIDES), finish=rng.choice(FINISHES))
+        yield Menu(name=name, price=rng.randint(low, high), menu_item_description=description)
+
+
+def party_sizes(tables):
+    """{table id: (smallest, largest) party} for which best-fit allocation
+    would pick a table of that size: more guests than the next smaller
+    table seats."""
+    sizes = sorted({table['seats'] for table in tables})
+    smallest = {seats: (previous + 1 if previous else 1)
+                for previous, seats in zip([0] + sizes, sizes)}
+    return {table['id']: (smallest[table['seats']], table['seats']) for table in tables}
+
+
+def generate_bookings(count, start, days, tables, rng):
+    """Yield ``(date, [Booking, ...])`` for the days from ``start`` that
+    get bookings, ``count`` bookings in total, spread over ``tables``
+    (dicts with ``id`` and ``seats``).
+
+    Every (date, slot, table) cell is picked with a probability
+    proportional to its weekday and slot weights, scaled so exactly
+    ``count`` cells are chosen in a single pass.
+    """
+    slots = list(OPENING_SLOTS)
+    cells_left = days * len(slots) * len(tables)
+    if count > cells_left:
+        raise ValueError(f'{count} bookings do not fit in {days} days of {len(slots)} slots '
+                         f'at {len(tables)} tables.')
+    sizes = party_sizes(tables)
+    day_weight = sum(SLOT_WEIGHTS.get(slot, 1) for slot in slots) * len(tables)
+    weight_left = day_weight * sum(
+        WEEKDAY_WEIGHTS[(start + timedelta(days=offset)).weekday()] for offset in range(days))
+    remaining = count
+    for offset in range(days):
+        if not remaining:
+            return
+        reservation_date = start + timedelta(days=offset)
+        weekday_weight = WEEKDAY_WEIGHTS[reservation_date.weekday()]
+        bookings = []
+        for slot in slots:
+            weight = weekday_weight * SLOT_WEIGHTS.get(slot, 1)
+            for table in tables:
+                # Take every remaining cell once only that many are left.
+                if remaining >= cells_left or rng.random() * weight_left < remaining * weight:
+                    bookings.append(Booking(
+                        first_name=f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+                        reservation_date=reservation_date,
+                        reservation_slot=slot,
+                        party_size=rng.randint(*sizes[table['id']]),
+                        table_id=table['id'],
+                    ))
+                    remaining -= 1
+                cells_left -= 1
+                weight_left -= weight
+        if bookings:
+            yield reservation_date, bookings
@@ -0,0 +1,150 @@
+from bisect import bisect_left
+from django.db import DEFAULT_DB_ALIAS
+from .cache import table_cache
+from .holds import HOLD_MINUTES, claim_table, held_tables
+from .models import Booking, SlotFull, Table
+
+
+class FloorPlan:
+    """The restaurant's tables, sorted by (seats, number) for best-fit
+    allocation: the smallest free table that seats the party, so large
+    tables stay free for large parties."""
+
+    def __init__(self, tables):
+        self.tables = sorted(tables, key=lambda table: (table['seats'], table['number']))
+        self.seats = [table['seats'] for table in self.tables]
+        self.by_id = {table['id']: table for table in self.tables}
+
+    def __len__(self):
+        return len(self.tables)
+
+    @property
+    def largest(self):
+        return self.seats[-1] if self.seats else 0
+
+    def best_fit(self, party_size, taken=()):
+        """The smallest table seating ``party_size`` whose id is not in
+        ``taken``, or None."""
+        for table in self.tables[bisect_left(self.seats, party_size):]:
+            if table['id'] not in taken:
+                return table
+        return None
+
+    def free_slots(self, taken_by_slot, party_size, slots):
+        """Those of ``slots`` where a table seats ``party_size``, given
+        {slot: {table id, ...}} of the booked tables."""
+        return [slot for slot in slots
+                if self.best_fit(party_size, taken_by_slot.get(slot, ())) is not None]
+
+
+# Cached rows come from the primary, like the menu's.
+_tables = Table.objects.using(DEFAULT_DB_ALIAS)
+
+
+def floor_plan():
+    """The current FloorPlan; cached until a Table is saved or deleted."""
+    return FloorPlan(table_cache.get('all', lambda: list(_tables.values('id', 'number', 'seats'))))
+
+
+async def afloor_plan():
+    async def load():
+        return [table async for table in _tables.values('id', 'number', 'seats')]
+    return FloorPlan(await table_cache.aget('all', load))
+
+
+def _slot(booking):
+    field = Booking._meta.get_field('reservation_date')
+    return field.to_python(booking.reservation_date), int(booking.reservation_slot)
+
+
+def needs_table(booking):
+    """Whether save() must pick a table for ``booking``: it has none, it
+    moved to another slot, or its party outgrew the table."""
+    if booking.table_id is None:
+        return True
+    loaded = getattr(booking, '_loaded_slot', None)
+    if loaded is not None and loaded[0] is not None and loaded != _slot(booking):
+        return True
+    table = floor_plan().by_id.get(booking.table_id)
+    return table is None or table['seats'] < int(booking.party_size)
+
+
+def taken_tables(pairs, using=DEFAULT_DB_ALIAS, exclude=None):
+    """{(reservation_date, reservation_slot): {table id, ...}} of the booked
+    tables of ``pairs``, from one query over the (date, slot, table) index."""
+    pairs = set(pairs)
+    if not pairs:
+        return {}
+    rows = Booking.objects.using(using).filter(
+        reservation_date__in={reservation_date for reservation_date, _ in pairs},
+        reservation_slot__in={reservation_slot for _, reservation_slot in pairs},
+    )
+    if exclude is not None:
+        rows = rows.exclude(pk=exclude)
+    taken = {pair: set() for pair in pairs}
+    for reservation_date, reservation_slot, table_id in rows.values_list(
+            'reservation_date', 'reservation_slot', 'table_id'):
+        if (reservation_date, reservation_slot) in taken:
+            taken[reservation_date, reservation_slot].add(table_id)
+    return taken
+
+
+def unavailable_tables(plan, pairs, using=DEFAULT_DB_ALIAS, exclude=None):
+    """taken_tables() plus the tables held for other guests (see holds)."""
+    taken = taken_tables(pairs, using, exclude)
+    for pair, held in held_tables(taken, plan.by_id).items():
+        taken[pair] |= held
+    return taken
+
+
+def assign_table(booking, using=DEFAULT_DB_ALIAS):
+    """Give ``booking`` the best-fit free table of its slot, or raise SlotFull."""
+    plan = floor_plan()
+    party_size = int(booking.party_size)
+    if party_size > plan.largest:
+        raise SlotFull(f'No table seats a party of {party_size}.')
+    slot = _slot(booking)
+    taken = unavailable_tables(plan, [slot], using, exclude=booking.pk)[slot]
+    table = plan.best_fit(party_size, taken)
+    if table is None:
+        raise SlotFull()
+    booking.table_id = table['id']
+
+
+def hold_table(reservation_date, reservation_slot, party_size, minutes=HOLD_MINUTES):
+    """Hold the best-fit table that is neither booked nor held in the slot
+    for ``minutes``; returns the hold (see holds.claim_table) or raises
+    SlotFull."""
+    plan = floor_plan()
+    if party_size > plan.largest:
+        raise SlotFull(f'No table seats a party of {party_size}.')
+    slot = (reservation_date, reservation_slot)
+    taken = unavailable_tables(plan, [slot])[slot]
+    while True:
+        table = plan.best_fit(party_size, taken)
+        if table is None:
+            raise SlotFull()
+        hold = claim_table(reservation_date, reservation_slot, table['id'], party_size, minutes)
+        if hold is not None:
+            return hold
+        # Held by another guest since the read; try the next table.
+        taken.add(table['id'])
+
+
+def assign_tables(bookings, using=DEFAULT_DB_ALIAS):
+    """Assign best-fit tables to unsaved ``bookings`` in order, with one
+    query (and one cache read for the holds) for the whole batch. Returns
+    (placed, unplaced)."""
+    plan = floor_plan()
+    slots = {id(booking): _slot(booking) for booking in bookings}
+    taken = unavailable_tables(plan, slots.values(), using)
+    placed, unplaced = [], []
+    for booking in bookings:
+        table = plan.best_fit(int(booking.party_size), taken[slots[id(booking)]])
+        if table is None:
+            unplaced.append(booking)
+            continue
+        booking.table_id = table['id']
+        taken[slots[id(booking)]].add(table['id'])
+        placed.append(booking)
+    return placed, unplaced
@@ -0,0 +1,71 @@
+import os
+import re
+from urllib.parse import quote, urljoin
+from django import template
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.utils.encoding import iri_to_uri
+from django.utils.html import format_html, format_html_join
+
+register = template.Library()
+
+
+def static_url(name):
+    """The hashed URL of ``name``, or its plain URL when it is missing from
+    the manifest (e.g. a menu item without a photo) instead of failing."""
+    try:
+        return iri_to_uri(staticfiles_storage.url(name))
+    except ValueError:
+        return urljoin(settings.STATIC_URL, quote(name))
+
+
+VARIANT_NAME = re.compile(r'^(?P<stem>.+)\.(?P<width>\d+)w(?P<extension>\.\w+)$')
+_index = {}
+
+
+def variants(name, extension):
+    """[(url, width)] of the generated variants of ``name`` in ``extension``,
+    narrowest first."""
+    hashed_files = getattr(staticfiles_storage, 'hashed_files', None)
+    if not hashed_files:
+        return []
+    # The manifest is loaded once per process; index its variants once.
+    if _index.get('manifest') is not hashed_files:
+        by_stem = {}
+        for logical in hashed_files:
+            match = VARIANT_NAME.match(logical)
+            if match:
+                key = (match['stem'], match['extension'])
+                by_stem.setdefault(key, []).append((int(match['width']), logical))
+        _index.update(manifest=hashed_files, by_stem=by_stem)
+    found = sorted(_index['by_stem'].get((os.path.splitext(name)[0], extension), []))
+    # Percent-encoded: srcset splits its candidates on whitespace, so a
+    # name like 'Greek salad.jpg' would otherwise drop every variant.
+    return [(iri_to_uri(staticfiles_storage.url(logical)), width) for width, logical in found]
+
+
+@register.simple_tag
+def picture(name, alt='', sizes='100vw', loading='lazy', css_class=''):
+    """Render a <picture> for the static image ``name``, offering the WebP
+    and resized variants written by OptimizedStaticFilesStorage. Without
+    them (e.g. in development) it is a plain <img>."""
+    extension = name[name.rfind('.'):].lower()
+    webp = variants(name, '.webp')
+    fallback = variants(name, extension)
+    img = format_html(
+        '<img src="{}"{} sizes="{}" alt="{}" loading="{}" decoding="async"{}>',
+        static_url(name),
+        format_html(' srcset="{}"', srcset(fallback)) if fallback else '',
+        sizes, alt, loading,
+        format_html(' class="{}"', css_class) if css_class else '',
+    )
+    if not webp:
+        return img
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}" sizes="{}">{}</picture>',
+        srcset(webp), sizes, img,
+    )
+
+
+def srcset(candidates):
+    return format_html_join(', ', '{} {}w', candidates)
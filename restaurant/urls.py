@@ -13,14 +13,23 @@ urlpatterns = [
     path('about/', views.about, name="about"),
     path('book/', views.book, name="book"),
     path('reservations/', views.reservations, name="reservations"),
+    path('reservations/dump/', views.reservations_dump, name="reservations-dump"),
     path('menu/', views.menu, name="menu"),
     path('menu_item/<int:pk>/', views.display_menu_item, name="menu_item"),  
     path('bookings', views.bookings, name='bookings'),
+    path('availability', views.availability, name='availability'),
+    path('availability/next', views.next_available, name='next-available'),
+    path('holds', views.holds, name='holds'),
+    path('holds/<str:token>', views.hold_detail, name='hold-detail'),
+    path('holds/<str:token>/confirm', views.confirm_hold, name='confirm-hold'),
     
     # API URLs
     path('api/menu-items/', views.MenuItemsView.as_view(), name='menu-items'),
+    path('api/menu-items/search/', views.MenuSearchView.as_view(), name='menu-search'),
     path('api/menu-items/<int:pk>/', views.SingleMenuItemView.as_view(), name='single-menu-item'),
     path('api/message/', views.msg, name='protected-message'),
+    path('api/occupancy/heatmap/', views.occupancy_heatmap, name='occupancy-heatmap'),
+    path('api/cache-stats/', views.cache_stats, name='cache-stats'),
     path('api/token/', obtain_auth_token, name='api-token-auth'),
     path('api/', include(router.urls)),
 ]
\ No newline at end of file
@@ -1,32 +1,166 @@
 # from django.http import HttpResponse
-from django.shortcuts import render, get_object_or_404
+from django.shortcuts import render
 from django.contrib.auth.models import User
-from django.core import serializers
-from django.http import HttpResponse
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import IntegrityError, router
+from django.db.models import Count, Sum
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.utils.dateparse import parse_date
+from django.utils.cache import patch_vary_headers
+from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
-from datetime import datetime
+from django.views.decorators.http import condition, require_http_methods, require_POST
+from datetime import datetime, timedelta
+from itertools import islice
 import json
-from rest_framework import generics, viewsets
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
+import re
+from rest_framework import generics, status, viewsets
+from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
+from .bulk import insert_free_bookings
+from .cache import (
+    amenu_item, amenu_items, bookings_version_name, cache_page_versioned, menu_cache,
+    menu_item as cached_menu_item, menu_page_cache, site_page_cache, version_etag,
+    version_last_modified,
+)
+from .export import EXPORT_FORMATS, export_bookings
 from .forms import BookingForm
-from .models import Menu, Booking
+from .holds import MAX_HOLD_MINUTES, HOLD_MINUTES, aheld_tables, get_hold, release_hold
+from .renderers import CSVRenderer, NDJSONRenderer, dumps
+from .search import menu_index
+from .tables import afloor_plan, hold_table
+from .pagination import BOOKING_ORDERING, BookingCursorPagination, keyset_filter, keyset_iterator
+from .models import (
+    OPENING_SLOTS, Menu, Booking, OccupancySummary, SlotAvailability, SlotFull, mask_slots, slot_mask,
+)
 from .serializers import MenuSerializer, BookingSerializer, UserSerializer
 
+BOOKING_FIELDS = ('first_name', 'reservation_date', 'reservation_slot', 'party_size', 'table')
+RESERVATIONS_PAGE_SIZE = 50
+RESERVATIONS_MAX_PAGE_SIZE = 200
+DUMP_CHUNK_SIZE = 2000
+BULK_BOOKING_LIMIT = 1000
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 100
+# ``?group_by=`` values of the bookings API and the column each groups on.
+BOOKING_GROUPS = {'date': 'reservation_date', 'slot': 'reservation_slot'}
+HEATMAP_DEFAULT_DAYS = 90
+NEXT_AVAILABLE_DAYS = 14
+NEXT_AVAILABLE_MAX_DAYS = 90
+NEXT_AVAILABLE_LIMIT = 5
+NEXT_AVAILABLE_MAX_LIMIT = 50
+WEEKDAYS = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+# Same test GZipMiddleware uses
+ACCEPTS_GZIP = re.compile(r"\bgzip\b")
+
 
 # Create your views here.
+@cache_page_versioned(site_page_cache)
 def home(request):
     return render(request, 'index.html')
 
+@cache_page_versioned(site_page_cache)
 def about(request):
     return render(request, 'about.html')
 
 def reservations(request):
-    date = request.GET.get('date', datetime.today().date())
-    bookings = Booking.objects.all()
-    booking_json = serializers.serialize('json', bookings)
-    return render(request, 'bookings.html', {"bookings": booking_json})
+    try:
+        bookings = filter_bookings(Booking.objects.all(), request.GET)
+        limit = max(1, min(int(request.GET.get('limit', RESERVATIONS_PAGE_SIZE)), RESERVATIONS_MAX_PAGE_SIZE))
+        after = request.GET.get('after')
+        if after:
+            after_date, after_slot, after_id = after.split('_')
+            bookings = keyset_filter(bookings, BOOKING_ORDERING, (
+                parse_date(after_date), int(after_slot), int(after_id)))
+    except (ValueError, TypeError):
+        return HttpResponseBadRequest("Invalid filter")
+
+    page = list(booking_envelopes(bookings.order_by(*BOOKING_ORDERING)[:limit + 1]))
+    next_query = None
+    if len(page) > limit:
+        page = page[:limit]
+        last = page[-1]
+        query = request.GET.copy()
+        query['after'] = '_'.join([
+            last['fields']['reservation_date'].isoformat(),
+            str(last['fields']['reservation_slot']),
+            str(last['pk']),
+        ])
+        next_query = query.urlencode()
+
+    dump_query = request.GET.copy()
+    for key in ('after', 'limit'):
+        dump_query.pop(key, None)
+    return render(request, 'bookings.html', {
+        "bookings": page,
+        "next_query": next_query,
+        "dump_query": dump_query.urlencode(),
+        "filters": {key: request.GET.get(key, '') for key in ('date', 'from', 'to')},
+    })
+
+
+def reservations_dump(request):
+    try:
+        bookings = filter_bookings(Booking.objects.all(), request.GET)
+    except ValueError:
+        return HttpResponseBadRequest("Invalid filter")
+    # Keyset chunks rather than .iterator(), which mysqlclient buffers whole.
+    rows = keyset_iterator(bookings.values('id', *BOOKING_FIELDS), BOOKING_ORDERING, DUMP_CHUNK_SIZE)
+
+    def stream():
+        yield b'['
+        separator = b''
+        for row in rows:
+            yield separator + dumps(booking_envelope(row))
+            separator = b','
+        yield b']'
+
+    return StreamingHttpResponse(stream(), content_type='application/json')
+
+
+def filter_bookings(queryset, params):
+    """Apply the ``date``, ``from``/``to``, ``slot`` and ``name`` (prefix)
+    query parameters.
+
+    Date filters are range conditions on the leading column of the unique
+    (date, slot) index, and the name prefix becomes a LIKE 'prefix%' that
+    booking_first_name_idx can serve.
+    """
+    for param, lookup in (('date', 'reservation_date'),
+                          ('from', 'reservation_date__gte'),
+                          ('to', 'reservation_date__lte')):
+        value = params.get(param)
+        if value:
+            parsed = parse_date(value)
+            if parsed is None:
+                raise ValueError(f"Invalid {param}: {value}")
+            queryset = queryset.filter(**{lookup: parsed})
+    slot = params.get('slot')
+    if slot:
+        if not slot.isdigit() or not 0 <= int(slot) < 24:
+            raise ValueError(f"Invalid slot: {slot}")
+        queryset = queryset.filter(reservation_slot=int(slot))
+    name = params.get('name')
+    if name:
+        queryset = queryset.filter(first_name__istartswith=name)
+    return queryset
+
+
+def booking_envelopes(queryset):
+    """Yield bookings in the ``serializers.serialize('json')`` shape.
+
+    Rows are read with values() so no model instances are built.
+    """
+    for row in queryset.values('id', *BOOKING_FIELDS):
+        yield booking_envelope(row)
+
+
+def booking_envelope(row):
+    # Leaves ``row`` alone: keyset_iterator() reads its id after the yield.
+    fields = {field: value for field, value in row.items() if field != 'id'}
+    return {"model": "restaurant.booking", "pk": row['id'], "fields": fields}
 
 def book(request):
     form = BookingForm()
@@ -38,60 +172,475 @@ def book(request):
     return render(request, 'book.html', context)
 
 # Add your code here to create new views
-def menu(request):
-    menu_data = Menu.objects.all()
+# The public menu, availability and bookings views are async so that an ASGI
+# server can interleave many of them on one event loop.
+def menu_etag(request, *args, **kwargs):
+    return version_etag('menu')
+
+
+def menu_last_modified(request, *args, **kwargs):
+    return version_last_modified('menu')
+
+
+def query_date(request, param='date'):
+    """The ``param`` query parameter as a date, today when it is missing.
+    Raises ValueError unless it is a valid YYYY-MM-DD date."""
+    value = request.GET.get(param)
+    if not value:
+        return datetime.today().date()
+    parsed = parse_date(value)
+    if parsed is None:
+        raise ValueError(f"Invalid {param}: {value}")
+    return parsed
+
+
+def bookings_version(request):
+    # Normalized, so '2030-1-5' shares the version the signals bump for
+    # 2030-01-05. Dates that do not parse get a 400 from the view.
+    try:
+        return bookings_version_name(query_date(request))
+    except ValueError:
+        return bookings_version_name(request.GET.get('date'))
+
+
+def bookings_etag(request, *args, **kwargs):
+    return version_etag(bookings_version(request))
+
+
+def bookings_last_modified(request, *args, **kwargs):
+    return version_last_modified(bookings_version(request))
+
+
+# Conditional GETs are answered from the version counters alone, so a 304
+# costs no database work.
+menu_condition = condition(etag_func=menu_etag, last_modified_func=menu_last_modified)
+bookings_condition = condition(etag_func=bookings_etag, last_modified_func=bookings_last_modified)
+
+
+@menu_condition
+@cache_page_versioned(menu_page_cache)
+async def menu(request):
+    menu_data = await amenu_items()
     main_data = {"menu": menu_data}
     return render(request, 'menu.html', {"menu": main_data})
 
 
-def display_menu_item(request, pk=None): 
+@menu_condition
+@cache_page_versioned(menu_page_cache)
+async def display_menu_item(request, pk=None): 
     if pk: 
-        menu_item = get_object_or_404(Menu, pk=pk)
+        menu_item = await amenu_item(pk)
+        if menu_item is None:
+            raise Http404("No Menu matches the given query.")
     else: 
         menu_item = ""
     return render(request, 'menu_item.html', {"menu_item": menu_item})
 
 
 @csrf_exempt
-def bookings(request):
+@bookings_condition
+async def bookings(request):
     if request.method == "POST":
         data = json.loads(request.body)
-        exist = Booking.objects.filter(reservation_date=data['reservation_date']).filter(
-            reservation_slot=data['reservation_slot']).exists()
-        
-        if exist == False:
-            booking = Booking(
+        # Booking.save() gives the party the best-fit free table; the unique
+        # constraint on (date, slot, table) rejects a table taken meanwhile.
+        try:
+            await Booking.objects.acreate(
                 first_name=data['first_name'],
                 reservation_date=data['reservation_date'],
                 reservation_slot=data['reservation_slot'],
+                party_size=clean_party_size(data.get('party_size')),
             )
-            booking.save()
-        else:
+        except (IntegrityError, DjangoValidationError):
             return HttpResponse("{'error':1}", content_type='application/json')
     
-    date = request.GET.get('date', datetime.today().date())
-    bookings = Booking.objects.all().filter(reservation_date=date)
-    booking_json = serializers.serialize('json', bookings)
+    try:
+        date = query_date(request)
+    except ValueError:
+        return HttpResponseBadRequest("Invalid date")
+    bookings = Booking.objects.all().filter(reservation_date=date).values('id', *BOOKING_FIELDS)
+    booking_json = dumps([booking_envelope(row) async for row in bookings])
     return HttpResponse(booking_json, content_type='application/json')
 
 
+def clean_party_size(value, default=True):
+    """``value`` checked like Booking.party_size (1 to MAX_PARTY_SIZE);
+    when it is missing, the field default, or None if not ``default``.
+    Raises ValidationError."""
+    field = Booking._meta.get_field('party_size')
+    if value in (None, ''):
+        return field.get_default() if default else None
+    return field.clean(value, None)
+
+
+async def availability(request):
+    try:
+        date = query_date(request)
+        party_size = clean_party_size(request.GET.get('party_size'), default=False)
+    except (ValueError, DjangoValidationError):
+        return HttpResponseBadRequest("Invalid date or party size")
+    plan = await afloor_plan()
+    if party_size is None:
+        # One primary-key lookup, however many bookings the day has.
+        booked_mask = await SlotAvailability.objects.filter(pk=date).values_list(
+            'booked_slots', flat=True).afirst() or 0
+        free = await without_held([(date, slot) for slot in SlotAvailability(booked_slots=booked_mask).free()], plan)
+        free = [slot for _, slot in free]
+        return JsonResponse({
+            "date": date.isoformat(),
+            "free": free,
+            "booked": sorted(set(mask_slots(booked_mask)).union(
+                slot for slot in OPENING_SLOTS if slot not in free)),
+        })
+    # Slots with a table for the party: the day's booked tables from one
+    # index range query, matched against the cached floor plan.
+    taken = {}
+    async for slot, table_id in Booking.objects.filter(reservation_date=date).values_list(
+            'reservation_slot', 'table_id'):
+        taken.setdefault((date, slot), set()).add(table_id)
+    free = await without_held([(date, slot) for slot in OPENING_SLOTS], plan, party_size, taken)
+    free = [slot for _, slot in free]
+    return JsonResponse({
+        "date": date.isoformat(),
+        "party_size": party_size,
+        "free": free,
+        "booked": [slot for slot in OPENING_SLOTS if slot not in free],
+    })
+
+
+async def without_held(pairs, plan, party_size=None, taken=None):
+    """Those of the (date, slot) ``pairs`` that keep a table for the party
+    once the tables of active holds count as booked.
+
+    Holds are read from the cache in one round trip. With a party size,
+    ``taken`` has the booked tables of each pair; without one, the pairs
+    are those the bitmaps show as not full, and only pairs with holds need
+    their booking counts, in one more query.
+    """
+    held = await aheld_tables(pairs, plan.by_id)
+    if party_size is not None:
+        return [pair for pair in pairs
+                if plan.best_fit(party_size, taken.get(pair, set()) | held[pair]) is not None]
+    held_pairs = [pair for pair in pairs if held[pair]]
+    if not held_pairs:
+        return pairs
+    counts = {}
+    async for day, slot, bookings in OccupancySummary.objects.filter(
+            reservation_date__in={day for day, _ in held_pairs},
+            reservation_slot__in={slot for _, slot in held_pairs}).values_list(
+            'reservation_date', 'reservation_slot', 'bookings'):
+        counts[day, slot] = bookings
+    return [pair for pair in pairs if counts.get(pair, 0) + len(held[pair]) < len(plan)]
+
+
+async def next_available(request):
+    """The first free (date, slot) options from ``date`` on, over ``days``
+    days, trying ``slots`` in the order given on each date."""
+    try:
+        start = query_date(request)
+        days = int(request.GET.get('days') or NEXT_AVAILABLE_DAYS)
+        limit = int(request.GET.get('limit') or NEXT_AVAILABLE_LIMIT)
+        party_size = clean_party_size(request.GET.get('party_size'), default=False)
+        slots = [int(slot) for slot in request.GET.get('slots', '').split(',') if slot.strip()]
+    except (ValueError, DjangoValidationError):
+        return HttpResponseBadRequest("Invalid date, days, limit, party size or slots")
+    slots = list(dict.fromkeys(slots)) or list(OPENING_SLOTS)
+    if (not 1 <= days <= NEXT_AVAILABLE_MAX_DAYS or not 1 <= limit <= NEXT_AVAILABLE_MAX_LIMIT
+            or not set(slots).issubset(OPENING_SLOTS)):
+        return HttpResponseBadRequest(
+            f"days must be 1-{NEXT_AVAILABLE_MAX_DAYS}, limit 1-{NEXT_AVAILABLE_MAX_LIMIT} "
+            f"and slots within opening hours")
+    end = start + timedelta(days=days - 1)
+
+    # One range query for the whole horizon, whatever its length.
+    plan = await afloor_plan()
+    if party_size is None:
+        # The fully booked bitmaps, by primary key.
+        masks = {
+            day: mask async for day, mask in SlotAvailability.objects.filter(
+                pk__range=(start, end)).values_list('reservation_date', 'booked_slots')
+        }
+        taken = None
+
+        def is_free(day, slot):
+            return not masks.get(day, 0) & slot_mask([slot])
+    else:
+        # The booked tables, from the (date, slot, table) index, matched
+        # against the cached floor plan.
+        taken = {}
+        async for day, slot, table_id in Booking.objects.filter(
+                reservation_date__range=(start, end), reservation_slot__in=slots).values_list(
+                'reservation_date', 'reservation_slot', 'table_id'):
+            taken.setdefault((day, slot), set()).add(table_id)
+
+        def is_free(day, slot):
+            return plan.best_fit(party_size, taken.get((day, slot), ())) is not None
+
+    candidates = (
+        (start + timedelta(days=offset), slot)
+        for offset in range(days) for slot in slots
+        if is_free(start + timedelta(days=offset), slot)
+    )
+    # Holds are checked for a batch of candidates at a time, usually one.
+    results = []
+    while len(results) < limit:
+        batch = list(islice(candidates, limit))
+        if not batch:
+            break
+        results.extend(await without_held(batch, plan, party_size, taken))
+    results = [{"date": day.isoformat(), "slot": slot} for day, slot in results[:limit]]
+    return JsonResponse({
+        "from": start.isoformat(),
+        "to": end.isoformat(),
+        "party_size": party_size,
+        "slots": slots,
+        "results": results,
+    })
+
+
+def parse_hold(data):
+    """The cleaned hold fields of ``data``, or raise ValidationError with
+    {field: [messages]}."""
+    values = {}
+    errors = {}
+    for name in ('reservation_date', 'reservation_slot', 'party_size'):
+        field = Booking._meta.get_field(name)
+        try:
+            if data.get(name) in (None, '') and field.has_default():
+                values[name] = field.get_default()
+            else:
+                values[name] = field.clean(data.get(name), None)
+        except DjangoValidationError as exc:
+            errors[name] = exc.messages
+    if 'reservation_slot' in values and values['reservation_slot'] not in OPENING_SLOTS:
+        errors['reservation_slot'] = ['Outside opening hours.']
+    try:
+        values['minutes'] = int(data.get('minutes') or HOLD_MINUTES)
+        if not 1 <= values['minutes'] <= MAX_HOLD_MINUTES:
+            raise ValueError
+    except (TypeError, ValueError):
+        errors['minutes'] = [f'Between 1 and {MAX_HOLD_MINUTES}.']
+    if errors:
+        raise DjangoValidationError(errors)
+    return values
+
+
+def json_body(request):
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+# Holds keep a table for a guest for a few minutes while they fill in the
+# form, in the cache rather than the database, so a crowd racing for the
+# same slots costs cache.add() calls instead of failed INSERTs.
+@csrf_exempt
+@require_POST
+def holds(request):
+    data = json_body(request)
+    if data is None:
+        return JsonResponse({"error": "Expected a JSON object."}, status=400)
+    try:
+        values = parse_hold(data)
+        hold = hold_table(values['reservation_date'], values['reservation_slot'],
+                          values['party_size'], values['minutes'])
+    except DjangoValidationError as exc:
+        return JsonResponse({"error": exc.message_dict}, status=400)
+    except SlotFull as exc:
+        return JsonResponse({"error": str(exc)}, status=409)
+    return JsonResponse(hold, status=201)
+
+
+@csrf_exempt
+@require_http_methods(['GET', 'DELETE'])
+def hold_detail(request, token):
+    hold = get_hold(token)
+    if hold is None:
+        return JsonResponse({"error": "This hold has expired."}, status=404)
+    if request.method == 'DELETE':
+        release_hold(hold)
+        return HttpResponse(status=204)
+    return JsonResponse(hold)
+
+
+@csrf_exempt
+@require_POST
+def confirm_hold(request, token):
+    hold = get_hold(token)
+    if hold is None:
+        return JsonResponse({"error": "This hold has expired."}, status=404)
+    data = json_body(request)
+    if data is None:
+        return JsonResponse({"error": "Expected a JSON object."}, status=400)
+    try:
+        first_name = Booking._meta.get_field('first_name').clean(data.get('first_name'), None)
+    except DjangoValidationError as exc:
+        return JsonResponse({"error": {"first_name": exc.messages}}, status=400)
+    # The held table is set, so save() does not look for one; the unique
+    # constraint still guards against a booking that bypassed the hold.
+    booking = Booking(
+        first_name=first_name,
+        reservation_date=hold['reservation_date'],
+        reservation_slot=hold['reservation_slot'],
+        party_size=hold['party_size'],
+        table_id=hold['table'],
+    )
+    try:
+        booking.save()
+    except IntegrityError:
+        return JsonResponse({"error": "This reservation slot is already booked."}, status=409)
+    finally:
+        release_hold(hold)
+    row = Booking.objects.filter(pk=booking.pk).values('id', *BOOKING_FIELDS).get()
+    return HttpResponse(dumps([booking_envelope(row)]), content_type='application/json', status=201)
+
+
 # API Views
+@method_decorator(menu_condition, name='get')
 class MenuItemsView(generics.ListCreateAPIView):
     permission_classes = [IsAuthenticated]
     queryset = Menu.objects.all()
     serializer_class = MenuSerializer
 
+    def list(self, request, *args, **kwargs):
+        # Each page (cursor and page_size included) is cached until the menu changes.
+        def load():
+            return super(MenuItemsView, self).list(request, *args, **kwargs).data
+        return Response(menu_cache.get('api:' + request.build_absolute_uri(), load))
+
+
+@method_decorator(menu_condition, name='get')
+class MenuSearchView(generics.GenericAPIView):
+    """Search the menu by name and description (``q``, words or word
+    prefixes) within an optional ``min_price``/``max_price`` range, using
+    the in-process index of restaurant.search."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        params = request.query_params
+        try:
+            min_price = int(params['min_price']) if params.get('min_price') else None
+            max_price = int(params['max_price']) if params.get('max_price') else None
+            limit = int(params.get('limit', SEARCH_PAGE_SIZE))
+        except ValueError:
+            raise ValidationError({"detail": "min_price, max_price and limit must be integers."})
+        if not 1 <= limit <= SEARCH_MAX_PAGE_SIZE:
+            raise ValidationError({"limit": f"Must be between 1 and {SEARCH_MAX_PAGE_SIZE}."})
+        count, results = menu_index().search(
+            params.get('q', ''), min_price=min_price, max_price=max_price, limit=limit)
+        return Response({"count": count, "results": results})
 
+
+@method_decorator(menu_condition, name='get')
 class SingleMenuItemView(generics.RetrieveUpdateAPIView, generics.DestroyAPIView):
     permission_classes = [IsAuthenticated]
     queryset = Menu.objects.all()
     serializer_class = MenuSerializer
 
+    def retrieve(self, request, *args, **kwargs):
+        menu_item = cached_menu_item(kwargs['pk'])
+        if menu_item is None:
+            raise Http404
+        return Response(menu_item)
+
 
 class BookingViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     queryset = Booking.objects.all()
     serializer_class = BookingSerializer
+    pagination_class = BookingCursorPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action not in ('list', 'export'):
+            return queryset
+        try:
+            return filter_bookings(queryset, self.request.query_params)
+        except ValueError as exc:
+            raise ValidationError({"detail": str(exc)})
+
+    def list(self, request, *args, **kwargs):
+        group_by = request.query_params.get('group_by')
+        if group_by is None:
+            return super().list(request, *args, **kwargs)
+        field = BOOKING_GROUPS.get(group_by)
+        if field is None:
+            raise ValidationError({"group_by": f"Must be one of: {', '.join(BOOKING_GROUPS)}."})
+        # One GROUP BY over the filtered range instead of the rows.
+        counts = list(
+            self.get_queryset().order_by().values(field)
+            .annotate(count=Count('id')).order_by(field)
+        )
+        return Response({
+            "group_by": group_by,
+            "total": sum(row['count'] for row in counts),
+            "results": counts,
+        })
+
+    def create(self, request, *args, **kwargs):
+        if isinstance(request.data, list):
+            return self.create_many(request.data)
+        return super().create(request, *args, **kwargs)
+
+    def create_many(self, items):
+        """Create a list of bookings, reporting a result for each item."""
+        if len(items) > BULK_BOOKING_LIMIT:
+            return Response(
+                {"detail": f"At most {BULK_BOOKING_LIMIT} bookings per request."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        results = [None] * len(items)
+        pending = []
+        for index, item in enumerate(items):
+            serializer = self.get_serializer(data=item)
+            if not serializer.is_valid():
+                results[index] = {"index": index, "status": "invalid", "errors": serializer.errors}
+                continue
+            pending.append((index, Booking(**serializer.validated_data)))
+
+        # Tables are handed out in payload order, so earlier items win a
+        # slot's last table.
+        index_of = {id(booking): index for index, booking in pending}
+        created, taken, failed = insert_free_bookings([booking for _, booking in pending])
+        for booking in taken:
+            index = index_of[id(booking)]
+            results[index] = {"index": index, "status": "conflict",
+                              "reason": "This reservation slot is already booked."}
+        for booking in failed:
+            index = index_of[id(booking)]
+            results[index] = {"index": index, "status": "conflict",
+                              "reason": "Slots changed concurrently, please retry."}
+        for booking in created:
+            index = index_of[id(booking)]
+            results[index] = {"index": index, "status": "created",
+                              "booking": self.get_serializer(booking).data}
+
+        return Response(
+            {"results": results},
+            status=status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST,
+        )
+
+    @action(detail=False, renderer_classes=[CSVRenderer, NDJSONRenderer])
+    def export(self, request):
+        """Stream bookings as CSV or NDJSON (``?format=``), filtered like
+        the list, gzip-compressed if the client accepts it."""
+        # The rows are read while the response streams, after the routing
+        # middleware has returned: pin them to the database chosen now.
+        bookings = self.get_queryset().using(router.db_for_read(Booking))
+        export_format = request.accepted_renderer.format
+        compress = bool(ACCEPTS_GZIP.search(request.headers.get('Accept-Encoding', '')))
+        response = StreamingHttpResponse(
+            export_bookings(bookings, export_format, gzip=compress),
+            content_type=EXPORT_FORMATS[export_format],
+        )
+        response['Content-Disposition'] = f'attachment; filename="bookings.{export_format}"'
+        if compress:
+            response['Content-Encoding'] = 'gzip'
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
 
 
 class UserViewSet(viewsets.ModelViewSet):
@@ -104,3 +653,55 @@ class UserViewSet(viewsets.ModelViewSet):
 @permission_classes([IsAuthenticated])
 def msg(request):
     return Response({"message": "This view is protected"})
+
+
+@api_view()
+@permission_classes([IsAdminUser])
+def cache_stats(request):
+    return Response({
+        "menu": menu_cache.stats(),
+        "menu_pages": menu_page_cache.stats(),
+        "site_pages": site_page_cache.stats(),
+    })
+
+
+@api_view()
+@permission_classes([IsAdminUser])
+def occupancy_heatmap(request):
+    """Bookings per weekday and slot between ``from`` and ``to`` (the last
+    90 days by default), read from OccupancySummary only."""
+    try:
+        end = parse_date(request.query_params.get('to') or datetime.today().date().isoformat())
+        start = parse_date(request.query_params.get('from')
+                           or (end - timedelta(days=HEATMAP_DEFAULT_DAYS - 1)).isoformat())
+    except (ValueError, TypeError):
+        start = end = None
+    if start is None or end is None or start > end:
+        raise ValidationError({"detail": "from and to must be dates (YYYY-MM-DD), from not after to."})
+
+    totals = {}
+    rows = (
+        OccupancySummary.objects.filter(reservation_date__range=(start, end))
+        .values('weekday', 'reservation_slot')
+        .annotate(bookings=Sum('bookings'))
+        .order_by()
+    )
+    for row in rows:
+        totals[row['weekday'], row['reservation_slot']] = row['bookings']
+    slots = sorted(set(OPENING_SLOTS).union(slot for _, slot in totals))
+
+    # How many of each weekday the range covers, for per-day averages.
+    days = [0] * 7
+    span = (end - start).days + 1
+    for offset in range(min(span, 7)):
+        days[(start + timedelta(days=offset)).weekday()] += (span - offset + 6) // 7
+    weekdays = []
+    for index, name in enumerate(WEEKDAYS):
+        bookings = [totals.get((index + 1, slot), 0) for slot in slots]
+        weekdays.append({
+            "weekday": name,
+            "days": days[index],
+            "bookings": bookings,
+            "average": [round(count / days[index], 2) if days[index] else 0 for count in bookings],
+        })
+    return Response({"from": start, "to": end, "slots": slots, "weekdays": weekdays})
@@ -27,7 +27,10 @@ def run_tests():
         'tests.test_models',
         'tests.test_views', 
         'tests.test_static_templates',
-        'tests.test_integration'
+        'tests.test_integration',
+        'tests.test_commands',
+        'tests.test_pool',
+        'tests.test_routers'
     ]
     
     all_passed = True
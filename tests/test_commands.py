@@ -0,0 +1,310 @@
+import csv
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from datetime import date
+from io import StringIO
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import Count
+from django.test import SimpleTestCase, TestCase, override_settings
+from restaurant.bulk import insert_free_bookings
+from restaurant.checks import check_shared_cache
+from restaurant.cache import bookings_version_name, get_version, table_cache
+from restaurant.models import Booking, Menu, OccupancySummary, SlotAvailability, Table, mask_slots, slot_mask
+from restaurant.benchmark import compare, isolated_cache, percentile, summarize
+
+
+class BenchmarkHelpersTest(SimpleTestCase):
+    """Test cases for the bench command's statistics"""
+    
+    def test_percentile(self):
+        """Test nearest-rank percentiles"""
+        samples = [i / 1000 for i in range(1, 101)]
+        self.assertEqual(percentile(samples, 50), 0.05)
+        self.assertEqual(percentile(samples, 99), 0.099)
+        self.assertEqual(percentile([], 95), 0.0)
+    
+    def test_summarize(self):
+        """Test requests/sec, latency and queries per request"""
+        result = summarize([0.01] * 10, elapsed=0.5, errors=1, queries=20)
+        self.assertEqual(result['rps'], 20.0)
+        self.assertEqual(result['p95_ms'], 10.0)
+        self.assertEqual(result['queries_per_request'], 2.0)
+        self.assertEqual(result['errors'], 1)
+    
+    def test_compare_flags_regressions(self):
+        """Test that slower, lower-throughput or chattier routes are reported"""
+        baseline = {
+            'menu': {'p95_ms': 10.0, 'rps': 100.0, 'queries_per_request': 0.0},
+            'tables': {'p95_ms': 10.0, 'rps': 100.0, 'queries_per_request': 1.0},
+        }
+        results = {
+            'menu': {'p95_ms': 11.0, 'rps': 95.0, 'queries_per_request': 0.0},
+            'tables': {'p95_ms': 15.0, 'rps': 70.0, 'queries_per_request': 2.0},
+            'new-route': {'p95_ms': 1.0, 'rps': 1.0, 'queries_per_request': 9.0},
+        }
+        regressions = compare(results, baseline, tolerance=0.2)
+        self.assertEqual(len(regressions), 3)
+        self.assertTrue(all(r.startswith('tables:') for r in regressions))
+    
+    def test_isolated_cache(self):
+        """Test that clearing the benchmark cache leaves the shared one alone"""
+        cache.set('littlelemon:bench-test', 1)
+        self.addCleanup(cache.delete, 'littlelemon:bench-test')
+        with isolated_cache():
+            cache.set('littlelemon:bench-only', 2)
+            cache.clear()
+            self.assertIsNone(cache.get('littlelemon:bench-only'))
+        self.assertEqual(cache.get('littlelemon:bench-test'), 1)
+
+
+class PopulateCommandsTest(TestCase):
+    """Test cases for the populate_menu and populate_bookings commands"""
+    
+    def populate(self, command, *args):
+        call_command(command, *args, stdout=StringIO())
+    
+    def test_populate_menu(self):
+        """Test that the classics come first and generated names are distinct"""
+        Menu.objects.create(name='Old', price=1)
+        self.populate('populate_menu', '--count', '300', '--seed', '7', '--batch-size', '100')
+        names = list(Menu.objects.order_by('id').values_list('name', flat=True))
+        self.assertEqual(len(names), 300)
+        self.assertEqual(names[0], 'Greek Salad')
+        self.assertNotIn('Old', names)
+        self.assertEqual(len(set(names)), 300)
+        
+        self.populate('populate_menu', '--count', '300', '--seed', '7')
+        self.assertEqual(list(Menu.objects.order_by('id').values_list('name', flat=True)), names)
+    
+    def test_populate_bookings(self):
+        """Test count, date range, determinism and the availability index"""
+        Booking.objects.create(first_name='Old', reservation_date=date(2020, 1, 1), reservation_slot=12)
+        args = ('--count', '500', '--seed', '3', '--start', '2030-01-01', '--days', '90',
+                '--batch-size', '64')
+        self.populate('populate_bookings', *args)
+        rows = list(Booking.objects.order_by('reservation_date', 'reservation_slot')
+                    .values_list('first_name', 'reservation_date', 'reservation_slot'))
+        self.assertEqual(len(rows), 500)
+        self.assertGreaterEqual(rows[0][1], date(2030, 1, 1))
+        self.assertLessEqual(rows[-1][1], date(2030, 3, 31))
+        self.assertFalse(SlotAvailability.objects.filter(reservation_date=date(2020, 1, 1)).exists())
+        
+        booked = {}
+        for _, reservation_date, reservation_slot in rows:
+            booked.setdefault(reservation_date, []).append(reservation_slot)
+        self.assertEqual(
+            {row.reservation_date: row.booked() for row in SlotAvailability.objects.all()}, booked)
+        self.assertEqual(OccupancySummary.objects.filter(bookings=1).count(), 500)
+        self.assertFalse(OccupancySummary.objects.exclude(bookings=1).exists())
+        
+        self.populate('populate_bookings', *args)
+        self.assertEqual(list(Booking.objects.order_by('reservation_date', 'reservation_slot')
+                              .values_list('first_name', 'reservation_date', 'reservation_slot')), rows)
+    
+    def test_populate_bookings_bumps_replaced_dates(self):
+        """Test that dates whose bookings are deleted get a new version, even
+        when none of their slots was full"""
+        self.addCleanup(table_cache.invalidate)
+        Table.objects.create(number=2, seats=4)
+        insert_free_bookings([Booking(first_name='Old', reservation_date=date(2020, 1, 1), reservation_slot=12)])
+        self.assertFalse(SlotAvailability.objects.exists())
+        version = get_version(bookings_version_name(date(2020, 1, 1)))
+        self.populate('populate_bookings', '--count', '10', '--seed', '3', '--start', '2030-01-01', '--days', '5')
+        self.assertNotEqual(get_version(bookings_version_name(date(2020, 1, 1))), version)
+    
+    def test_evening_slots_are_busier(self):
+        """Test the slot distribution"""
+        self.populate('populate_bookings', '--count', '2000', '--days', '1000', '--seed', '1')
+        counts = dict(Booking.objects.values_list('reservation_slot').annotate(n=Count('id')))
+        self.assertGreater(counts[19], 3 * counts[10])
+    
+    def test_too_many_bookings(self):
+        """Test that a count beyond the slots in the range is rejected"""
+        with self.assertRaises(CommandError):
+            self.populate('populate_bookings', '--count', '11', '--days', '1')
+    
+    def test_invalid_occupancy(self):
+        """Test that an occupancy outside (0, 1] is rejected"""
+        for occupancy in ('0', '-0.5', '1.5'):
+            with self.subTest(occupancy=occupancy), self.assertRaises(CommandError):
+                self.populate('populate_bookings', '--count', '5', '--occupancy', occupancy)
+
+
+class RebuildOccupancyCommandTest(TestCase):
+    """Test cases for the rebuild_occupancy command"""
+    
+    def test_rebuild_in_chunks(self):
+        """Test that drifted and orphaned summary rows are recomputed"""
+        for day, slot in ((1, 12), (1, 18), (4, 12), (9, 19)):
+            Booking.objects.create(first_name='Guest', reservation_date=date(2025, 6, day), reservation_slot=slot)
+        OccupancySummary.objects.filter(reservation_date=date(2025, 6, 1), reservation_slot=12).update(bookings=5)
+        OccupancySummary.objects.create(reservation_date=date(2025, 6, 20), reservation_slot=10, weekday=5, bookings=2)
+        SlotAvailability.objects.filter(pk=date(2025, 6, 1)).update(booked_slots=slot_mask([13]))
+        SlotAvailability.objects.create(reservation_date=date(2025, 6, 20), booked_slots=slot_mask([10]))
+        out = StringIO()
+        call_command('rebuild_occupancy', '--chunk-days', '3', stdout=out)
+        self.assertIn('2025-06-01 to 2025-06-03', out.getvalue())
+        self.assertIn('Rebuilt occupancy from 2025-06-01 to 2025-06-20: 4 rows', out.getvalue())
+        self.assertEqual(
+            set(OccupancySummary.objects.values_list('reservation_date', 'reservation_slot', 'bookings')),
+            {(date(2025, 6, 1), 12, 1), (date(2025, 6, 1), 18, 1), (date(2025, 6, 4), 12, 1),
+             (date(2025, 6, 9), 19, 1)},
+        )
+        bitmaps = SlotAvailability.objects.values_list('reservation_date', 'booked_slots')
+        self.assertEqual(
+            {day: set(mask_slots(mask)) for day, mask in bitmaps},
+            {date(2025, 6, 1): {12, 18}, date(2025, 6, 4): {12}, date(2025, 6, 9): {19}},
+        )
+    
+    def test_invalid_range(self):
+        """Test that a reversed range is rejected"""
+        with self.assertRaises(CommandError):
+            call_command('rebuild_occupancy', '--from', '2025-06-02', '--to', '2025-06-01', stdout=StringIO())
+
+
+class ExportBookingsCommandTest(TestCase):
+    """Test cases for the export_bookings command"""
+    
+    def setUp(self):
+        """Spread 25 bookings over three days"""
+        Booking.objects.bulk_create([
+            Booking(first_name=f'Guest {i}', reservation_date=date(2024, 12, 24 + i // 10),
+                    reservation_slot=10 + i % 10)
+            for i in range(25)
+        ])
+        handle, self.path = tempfile.mkstemp()
+        os.close(handle)
+        self.addCleanup(os.remove, self.path)
+    
+    def test_csv_export(self):
+        """Test a filtered CSV export written in several chunks"""
+        call_command('export_bookings', '--from', '2024-12-25', '--chunk-size', '3',
+                     '--output', self.path, stdout=StringIO())
+        with open(self.path, newline='') as export:
+            rows = list(csv.reader(export))
+        self.assertEqual(rows[0], ['id', 'first_name', 'reservation_date', 'reservation_slot', 'party_size', 'table'])
+        self.assertEqual(len(rows), 16)
+        self.assertEqual(rows[1][1:5], ['Guest 10', '2024-12-25', '10', '2'])
+        self.assertEqual(rows[-1][1:5], ['Guest 24', '2024-12-26', '14', '2'])
+    
+    def test_gzip_ndjson_export(self):
+        """Test an NDJSON export compressed with gzip"""
+        call_command('export_bookings', '--format', 'ndjson', '--gzip', '--date', '2024-12-24',
+                     '--output', self.path, stdout=StringIO())
+        with gzip.open(self.path) as export:
+            rows = [json.loads(line) for line in export]
+        self.assertEqual(len(rows), 10)
+        self.assertEqual(rows[0]['first_name'], 'Guest 0')
+        self.assertEqual(rows[0]['reservation_date'], '2024-12-24')
+    
+    def test_invalid_date(self):
+        """Test that a malformed date is rejected"""
+        with self.assertRaises(CommandError):
+            call_command('export_bookings', '--date', 'tomorrow', stdout=StringIO())
+
+
+class ImportBookingsCommandTest(TestCase):
+    """Test cases for the import_bookings command"""
+    
+    def setUp(self):
+        """Book one slot before importing"""
+        Booking.objects.create(first_name='Existing', reservation_date=date(2024, 12, 25), reservation_slot=18)
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+    
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w') as source:
+            source.write(content)
+        return path
+    
+    def read_rejects(self, path):
+        with open(path + '.rejects.csv', newline='') as rejects:
+            return list(csv.DictReader(rejects))
+    
+    def test_csv_import_with_conflicts(self):
+        """Test rejects for bad rows, taken slots and repeats within the file"""
+        path = self.write('bookings.csv', '\n'.join([
+            'first_name,reservation_date,reservation_slot',
+            'Ann,2024-12-25,17',
+            'Bob,2024-12-25,18',
+            'Cid,2024-12-26,12',
+            'Dee,2024-12-26,12',
+            'Eve,not a date,12',
+            'Fay,2024-12-27,13',
+            'Gus,2024-12-25,17',
+        ]) + '\n')
+        out = StringIO()
+        call_command('import_bookings', path, '--chunk-size', '4', stdout=out)
+        
+        self.assertEqual(
+            sorted(Booking.objects.values_list('first_name', flat=True)),
+            ['Ann', 'Cid', 'Existing', 'Fay'])
+        self.assertEqual(SlotAvailability.objects.get(reservation_date=date(2024, 12, 26)).booked(), [12])
+        rejects = {row['first_name']: row for row in self.read_rejects(path)}
+        self.assertEqual(sorted(rejects), ['Bob', 'Dee', 'Eve', 'Gus'])
+        self.assertIn('already booked', rejects['Bob']['error'])
+        # Cid took the only table at 12 on 2024-12-26
+        self.assertIn('already booked', rejects['Dee']['error'])
+        self.assertIn('reservation_date', rejects['Eve']['error'])
+        # Ann was imported by an earlier chunk
+        self.assertIn('already booked', rejects['Gus']['error'])
+        self.assertEqual(rejects['Gus']['line'], '8')
+        self.assertIn('Imported 3 of 7 bookings', out.getvalue())
+        self.assertIn('rows/s', out.getvalue())
+    
+    def test_ndjson_gzip_import(self):
+        """Test a gzipped NDJSON file with a malformed line"""
+        path = os.path.join(self.directory, 'bookings.ndjson.gz')
+        with gzip.open(path, 'wt') as source:
+            source.write(json.dumps({'first_name': 'Ann', 'reservation_date': '2024-12-25',
+                                     'reservation_slot': 12}) + '\n')
+            source.write('{not json\n\n')
+            source.write(json.dumps({'first_name': 'Bob', 'reservation_date': '2024-12-25',
+                                     'reservation_slot': '13'}) + '\n')
+        call_command('import_bookings', path, stdout=StringIO())
+        self.assertEqual(Booking.objects.filter(first_name__in=['Ann', 'Bob']).count(), 2)
+        rejects = self.read_rejects(path)
+        self.assertEqual(len(rejects), 1)
+        self.assertEqual(rejects[0]['line'], '2')
+    
+    def test_no_rejects_file_when_clean(self):
+        """Test that the rejects file is removed when every row is imported"""
+        path = self.write('bookings.csv', 'first_name,reservation_date,reservation_slot\nAnn,2024-12-25,12\n')
+        call_command('import_bookings', path, stdout=StringIO())
+        self.assertFalse(os.path.exists(path + '.rejects.csv'))
+    
+    def test_missing_columns(self):
+        """Test that a CSV without the booking columns is refused"""
+        path = self.write('bookings.csv', 'name,date\nAnn,2024-12-25\n')
+        with self.assertRaises(CommandError):
+            call_command('import_bookings', path, stdout=StringIO())
+    
+    def test_invalid_chunk_size(self):
+        """Test that a chunk size below 1 is refused instead of importing nothing"""
+        path = self.write('bookings.csv', 'first_name,reservation_date,reservation_slot\nAnn,2024-12-25,12\n')
+        with self.assertRaises(CommandError):
+            call_command('import_bookings', path, '--chunk-size', '0', stdout=StringIO())
+
+
+class SharedCacheCheckTest(SimpleTestCase):
+    """Test cases for the shared cache system check"""
+    
+    @override_settings(DEBUG=False)
+    def test_per_process_cache_warns(self):
+        """Test that a LocMemCache outside DEBUG is reported"""
+        self.assertEqual([warning.id for warning in check_shared_cache(None)], ['restaurant.W001'])
+    
+    def test_shared_or_debug_cache_passes(self):
+        """Test that shared backends, and any backend under DEBUG, pass"""
+        shared = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+                              'LOCATION': 'redis://127.0.0.1:6379'}}
+        with override_settings(DEBUG=False, CACHES=shared):
+            self.assertEqual(check_shared_cache(None), [])
+        with override_settings(DEBUG=True):
+            self.assertEqual(check_shared_cache(None), [])
@@ -3,7 +3,7 @@ from django.contrib.auth.models import User
 from rest_framework.test import APITestCase, APIClient
 from rest_framework.authtoken.models import Token
 from rest_framework import status
-from restaurant.models import Menu, Booking
+from restaurant.models import Menu, Booking, Table
 from datetime import date, datetime
 import json
 
@@ -67,7 +67,7 @@ class IntegrationTest(APITestCase):
         # Step 5: Browse menu items
         menu_list_response = self.client.get('/restaurant/api/menu-items/')
         self.assertEqual(menu_list_response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(menu_list_response.data), 3)
+        self.assertEqual(len(menu_list_response.data['results']), 3)
         
         # Step 6: Make a table booking
         booking_data = {
@@ -81,8 +81,8 @@ class IntegrationTest(APITestCase):
         # Step 7: Verify booking was created
         bookings_response = self.client.get('/restaurant/api/tables/')
         self.assertEqual(bookings_response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(bookings_response.data), 1)
-        self.assertEqual(bookings_response.data[0]['first_name'], 'Integration Test User')
+        self.assertEqual(len(bookings_response.data['results']), 1)
+        self.assertEqual(bookings_response.data['results'][0]['first_name'], 'Integration Test User')
         
         # Step 8: Update booking
         updated_booking_data = {
@@ -90,7 +90,7 @@ class IntegrationTest(APITestCase):
             'reservation_date': '2024-12-25',
             'reservation_slot': 19
         }
-        booking_id = bookings_response.data[0]['id']
+        booking_id = bookings_response.data['results'][0]['id']
         update_response = self.client.put(f'/restaurant/api/tables/{booking_id}/', updated_booking_data)
         self.assertEqual(update_response.status_code, status.HTTP_200_OK)
         
@@ -197,6 +197,8 @@ class PerformanceTest(TransactionTestCase):
     
     def setUp(self):
         """Set up test environment"""
+        # Flushed between TransactionTestCase tests, unlike the migrations' data.
+        Table.objects.get_or_create(number=1, defaults={'seats': 8})
         self.user = User.objects.create_user(
             username='perf_user',
             password='testpass123'
@@ -221,7 +223,7 @@ class PerformanceTest(TransactionTestCase):
         
         # Verify all items were created
         list_response = self.client.get('/restaurant/api/menu-items/')
-        self.assertEqual(len(list_response.data), 10)
+        self.assertEqual(len(list_response.data['results']), 10)
     
     def test_bulk_booking_creation(self):
         """Test creating multiple bookings"""
@@ -239,4 +241,4 @@ class PerformanceTest(TransactionTestCase):
         
         # Verify all bookings were created
         list_response = self.client.get('/restaurant/api/tables/')
-        self.assertEqual(len(list_response.data), 5)
+        self.assertEqual(len(list_response.data['results']), 5)
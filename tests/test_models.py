@@ -1,5 +1,9 @@
+from django.db import IntegrityError
 from django.test import TestCase
-from restaurant.models import Menu, Booking
+from restaurant.bulk import insert_bookings
+from restaurant.cache import table_cache
+from restaurant.models import Menu, Booking, OccupancySummary, SlotAvailability, SlotFull, Table
+from restaurant.tables import FloorPlan
 from datetime import date
 
 
@@ -67,3 +71,163 @@ class BookingModelTest(TestCase):
             reservation_date=date(2024, 12, 26)
         )
         self.assertEqual(booking.reservation_slot, 10)
+
+    def test_slot_is_unique_per_date(self):
+        """Test that the database rejects a second booking for the same slot"""
+        with self.assertRaises(IntegrityError):
+            Booking.objects.create(
+                first_name="Jane Doe",
+                reservation_date=date(2024, 12, 25),
+                reservation_slot=18
+            )
+
+
+class SlotAvailabilityModelTest(TestCase):
+    """Test cases for the SlotAvailability index"""
+    
+    def test_mark_booked_many(self):
+        """Test that new and existing dates get their slots set"""
+        SlotAvailability.objects.mark_booked(date(2024, 12, 25), [10])
+        SlotAvailability.objects.mark_booked_many({
+            date(2024, 12, 25): [12, 18],
+            date(2024, 12, 26): [12, 18],
+            date(2024, 12, 27): [19],
+            date(2024, 12, 28): [],
+        })
+        booked = {row.reservation_date: row.booked() for row in SlotAvailability.objects.all()}
+        self.assertEqual(booked, {
+            date(2024, 12, 25): [10, 12, 18],
+            date(2024, 12, 26): [12, 18],
+            date(2024, 12, 27): [19],
+        })
+
+
+class OccupancySummaryModelTest(TestCase):
+    """Test cases for the incrementally maintained OccupancySummary"""
+    
+    def counts(self):
+        return {(row.reservation_date, row.reservation_slot): row.bookings
+                for row in OccupancySummary.objects.all()}
+    
+    def test_follows_booking_writes(self):
+        """Test that creating, moving and deleting bookings update the counts"""
+        booking = Booking.objects.create(first_name='Anna', reservation_date=date(2025, 5, 1), reservation_slot=12)
+        Booking.objects.create(first_name='Ben', reservation_date=date(2025, 5, 1), reservation_slot=18)
+        self.assertEqual(self.counts(), {(date(2025, 5, 1), 12): 1, (date(2025, 5, 1), 18): 1})
+        
+        booking = Booking.objects.get(pk=booking.pk)
+        booking.reservation_slot = 13
+        booking.save()
+        booking.first_name = 'Anna Rossi'
+        booking.save()
+        self.assertEqual(self.counts(), {
+            (date(2025, 5, 1), 12): 0, (date(2025, 5, 1), 13): 1, (date(2025, 5, 1), 18): 1})
+        
+        booking.delete()
+        self.assertEqual(self.counts()[date(2025, 5, 1), 13], 0)
+    
+    def test_bulk_inserts(self):
+        """Test that bulk-created bookings are counted"""
+        insert_bookings([
+            Booking(first_name='Guest', reservation_date=date(2025, 5, day), reservation_slot=slot)
+            for day in (1, 2) for slot in (12, 18)
+        ])
+        self.assertEqual(sum(self.counts().values()), 4)
+        self.assertEqual(self.counts()[date(2025, 5, 2), 18], 1)
+    
+    def test_add_and_rebuild(self):
+        """Test add() deltas and that rebuild() restores the true counts"""
+        Booking.objects.create(first_name='Anna', reservation_date=date(2025, 5, 1), reservation_slot=12)
+        OccupancySummary.objects.add({(date(2025, 5, 1), 12): 2, (date(2025, 5, 3), 10): 1})
+        self.assertEqual(self.counts(), {(date(2025, 5, 1), 12): 3, (date(2025, 5, 3), 10): 1})
+        written = OccupancySummary.objects.rebuild(date(2025, 5, 1), date(2025, 5, 3))
+        self.assertEqual(written, 1)
+        self.assertEqual(self.counts(), {(date(2025, 5, 1), 12): 1})
+
+
+class FloorPlanTest(TestCase):
+    """Test cases for best-fit table selection"""
+    
+    def setUp(self):
+        """Set up a floor plan of a 2-, a 4- and two 6-seat tables"""
+        self.plan = FloorPlan([
+            {'id': 1, 'number': 1, 'seats': 6},
+            {'id': 2, 'number': 2, 'seats': 2},
+            {'id': 3, 'number': 3, 'seats': 4},
+            {'id': 4, 'number': 4, 'seats': 6},
+        ])
+    
+    def test_best_fit(self):
+        """Test that the smallest free table seating the party is chosen"""
+        self.assertEqual(self.plan.best_fit(1)['id'], 2)
+        self.assertEqual(self.plan.best_fit(3)['id'], 3)
+        self.assertEqual(self.plan.best_fit(3, taken={3})['id'], 1)
+        self.assertEqual(self.plan.best_fit(5, taken={1})['id'], 4)
+        self.assertIsNone(self.plan.best_fit(5, taken={1, 4}))
+        self.assertIsNone(self.plan.best_fit(7))
+        self.assertEqual(self.plan.largest, 6)
+    
+    def test_free_slots(self):
+        """Test that a slot is free while a table seating the party is"""
+        taken = {10: {1, 4}, 11: {2, 3}}
+        self.assertEqual(self.plan.free_slots(taken, 2, [10, 11, 12]), [10, 11, 12])
+        self.assertEqual(self.plan.free_slots(taken, 5, [10, 11, 12]), [11, 12])
+
+
+class TableAllocationTest(TestCase):
+    """Test cases for giving bookings tables"""
+    
+    def setUp(self):
+        """Set up a 2-, a 4- and a 6-seat table"""
+        # The floor plan cache outlives the rolled-back test transaction.
+        self.addCleanup(table_cache.invalidate)
+        table = Table.objects.get(number=1)
+        table.seats = 2
+        table.save()
+        Table.objects.create(number=2, seats=4)
+        Table.objects.create(number=3, seats=6)
+    
+    def book(self, party_size, slot=18):
+        return Booking.objects.create(first_name='Guest', reservation_date=date(2025, 5, 1),
+                                      reservation_slot=slot, party_size=party_size)
+    
+    def test_parties_share_a_slot(self):
+        """Test that each party gets the smallest free table of its slot"""
+        self.assertEqual(self.book(3).table.number, 2)
+        self.assertEqual(self.book(2).table.number, 1)
+        self.assertEqual(self.book(2).table.number, 3)
+        with self.assertRaisesMessage(SlotFull, 'already booked'):
+            self.book(1)
+        self.assertEqual(self.book(1, slot=19).table.number, 1)
+    
+    def test_slot_full_only_when_all_tables_taken(self):
+        """Test that availability marks a slot once its last table is booked"""
+        self.book(2)
+        self.book(4)
+        self.assertEqual(SlotAvailability.objects.get(pk=date(2025, 5, 1)).booked(), [])
+        self.book(6)
+        self.assertEqual(SlotAvailability.objects.get(pk=date(2025, 5, 1)).booked(), [18])
+    
+    def test_party_too_large(self):
+        """Test that a party no table seats is rejected"""
+        with self.assertRaisesMessage(SlotFull, 'No table seats a party of 7.'):
+            self.book(7)
+    
+    def test_growing_party_changes_table(self):
+        """Test that a party outgrowing its table is moved to a larger one"""
+        booking = self.book(2)
+        booking.party_size = 5
+        booking.save()
+        self.assertEqual(Booking.objects.get(pk=booking.pk).table.number, 3)
+    
+    def test_bulk_create_assigns_tables(self):
+        """Test that bulk-created bookings get tables in order"""
+        bookings = Booking.objects.bulk_create([
+            Booking(first_name='Guest', reservation_date=date(2025, 5, 1), reservation_slot=18, party_size=size)
+            for size in (4, 2, 2)
+        ])
+        self.assertEqual([Table.objects.get(pk=b.table_id).number for b in bookings], [2, 1, 3])
+        with self.assertRaises(SlotFull):
+            Booking.objects.bulk_create([
+                Booking(first_name='Guest', reservation_date=date(2025, 5, 1), reservation_slot=18),
+            ])
@@ -0,0 +1,149 @@
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from django.core.management import call_command
+from django.db.utils import ConnectionHandler
+from django.test import SimpleTestCase, override_settings
+from io import StringIO
+from restaurant.db.pool import (
+    STATS_TIMEOUT, ConnectionPool, PoolTimeout, pool_stats, publish_stats, published_stats, worker_name,
+)
+
+
+class ConnectionPoolTest(SimpleTestCase):
+    """Test cases for the connection pool"""
+    
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(handle)
+        self.addCleanup(os.remove, self.path)
+    
+    def make_pool(self, **options):
+        return ConnectionPool(lambda: sqlite3.connect(self.path, check_same_thread=False),
+                              check=lambda raw: raw.execute('SELECT 1'), **options)
+    
+    def test_connections_are_reused(self):
+        """Test that a released connection is handed out again"""
+        pool = self.make_pool(max_size=2)
+        raw = pool.checkout()
+        pool.release(raw)
+        self.assertIs(pool.checkout(), raw)
+        stats = pool.stats()
+        self.assertEqual(stats['created'], 1)
+        self.assertEqual(stats['checkouts'], 2)
+        self.assertEqual(stats['in_use'], 1)
+    
+    def test_min_size_prefills(self):
+        """Test that min_size connections are opened on first use"""
+        pool = self.make_pool(min_size=3, max_size=5)
+        pool.checkout()
+        self.assertEqual(pool.stats()['size'], 3)
+        self.assertEqual(pool.stats()['idle'], 2)
+    
+    def test_overflow_connections_are_closed_on_release(self):
+        """Test that connections beyond max_size are not kept"""
+        pool = self.make_pool(max_size=1, max_overflow=1)
+        first, second = pool.checkout(), pool.checkout()
+        pool.release(second)
+        pool.release(first)
+        self.assertEqual(pool.stats()['size'], 1)
+        self.assertEqual(pool.stats()['closed'], 1)
+    
+    def test_timeout_when_exhausted(self):
+        """Test that checkout waits and then raises PoolTimeout"""
+        pool = self.make_pool(max_size=1, timeout=0.05)
+        pool.checkout()
+        with self.assertRaises(PoolTimeout):
+            pool.checkout()
+        stats = pool.stats()
+        self.assertEqual(stats['waits'], 1)
+        self.assertEqual(stats['timeouts'], 1)
+    
+    def test_waiter_gets_released_connection(self):
+        """Test that a waiting checkout is woken by a release"""
+        pool = self.make_pool(max_size=1, timeout=5)
+        raw = pool.checkout()
+        timer = threading.Timer(0.05, pool.release, args=(raw,))
+        timer.start()
+        self.assertIs(pool.checkout(), raw)
+        timer.join()
+        self.assertEqual(pool.stats()['waits'], 1)
+    
+    def test_unhealthy_connection_is_replaced(self):
+        """Test the health check on checkout"""
+        pool = self.make_pool(max_size=1)
+        raw = pool.checkout()
+        pool.release(raw)
+        raw.close()
+        replacement = pool.checkout()
+        self.assertIsNot(replacement, raw)
+        self.assertEqual(pool.stats()['failed_checks'], 1)
+    
+    def test_expired_connection_is_replaced(self):
+        """Test that connections older than max_lifetime are not reused"""
+        pool = self.make_pool(max_lifetime=0)
+        raw = pool.checkout()
+        pool.release(raw)
+        self.assertIsNot(pool.checkout(), raw)
+    
+    def test_leaks_are_reported(self):
+        """Test that long-held connections count as leaked"""
+        pool = self.make_pool(leak_timeout=0)
+        pool.checkout()
+        self.assertEqual(pool.stats()['leaked'], 1)
+
+
+class PooledBackendTest(SimpleTestCase):
+    """Test cases for the pooled database backends"""
+    
+    def test_sqlite_pool_backend(self):
+        """Test that closing a Django connection returns it to the pool"""
+        handle, path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(handle)
+        self.addCleanup(os.remove, path)
+        connections = ConnectionHandler({
+            'default': {},
+            'pooltest': {'ENGINE': 'restaurant.db.backends.sqlite_pool', 'NAME': path,
+                         'POOL': {'max_size': 2}},
+        })
+        connection = connections['pooltest']
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        raw = connection.connection
+        connection.close()
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        self.assertIs(connection.connection, raw)
+        connection.close()
+        stats = pool_stats()['pooltest']
+        self.assertEqual(stats['created'], 1)
+        self.assertEqual(stats['checkouts'], 2)
+        self.assertEqual(stats['idle'], 1)
+        
+        out = StringIO()
+        call_command('pool_stats', stdout=out)
+        self.assertIn('pooltest', out.getvalue())
+        connection.pool.closeall()
+    
+    def test_stats_are_shared_through_files(self):
+        """Test that pool_stats reads what other processes published"""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        stats = ConnectionPool(connect=lambda: sqlite3.connect(':memory:')).stats()
+        for name, age in (('otherhost:1', 0), ('stalehost:2', STATS_TIMEOUT + 1)):
+            with open(os.path.join(directory, f'{name.replace(":", "-")}.json'), 'w') as stats_file:
+                json.dump({'worker': name, 'time': time.time() - age, 'pools': {'default': stats}}, stats_file)
+        with override_settings(POOL_STATS_DIR=directory):
+            publish_stats(force=True)
+            workers = published_stats()
+            out = StringIO()
+            call_command('pool_stats', stdout=out)
+        self.assertIn(worker_name(), workers)
+        self.assertEqual(workers['otherhost:1']['pools'], {'default': stats})
+        self.assertNotIn('stalehost:2', workers)
+        self.assertIn('otherhost:1', out.getvalue())
+        self.assertNotIn('stalehost:2', out.getvalue())
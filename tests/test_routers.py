@@ -0,0 +1,140 @@
+import os
+import tempfile
+from asgiref.sync import SyncToAsync
+from django.core.handlers.asgi import ASGIHandler
+from django.contrib.auth.models import User
+from django.db import connections
+from django.test import AsyncClient, TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from restaurant import routers
+from restaurant.models import Booking, Menu, Table
+from datetime import date
+import json
+
+
+class ReplicaRouterTest(TestCase):
+    """Test cases for read-replica routing, with a second SQLite file as the replica"""
+    
+    def setUp(self):
+        """Register a 'replica' alias holding different rows than the primary"""
+        handle, self.path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(handle)
+        self.add_alias('replica', self.path)
+        connections['replica'].connect()
+        with connections['replica'].schema_editor() as editor:
+            editor.create_model(Table)
+            editor.create_model(Booking)
+            editor.create_model(Menu)
+        booking = Booking.objects.create(
+            first_name='Primary', reservation_date=date(2024, 12, 25), reservation_slot=12)
+        table = Table.objects.get(pk=booking.table_id)
+        table.save(using='replica')
+        Booking.objects.using('replica').bulk_create([
+            Booking(first_name='Replica', reservation_date=date(2024, 12, 25), reservation_slot=14,
+                    table_id=table.pk),
+        ])
+        routers._down_until.clear()
+        routers._checked_at.clear()
+        token = Token.objects.create(user=User.objects.create_user(username='staff', password='testpass123'))
+        self.auth = {'HTTP_AUTHORIZATION': 'Token ' + token.key}
+    
+    def tearDown(self):
+        for alias in ('replica', 'broken'):
+            if alias in connections.settings:
+                connections[alias].close()
+                del connections[alias]
+                del connections.settings[alias]
+        os.remove(self.path)
+    
+    def add_alias(self, alias, name):
+        configured = connections.configure_settings({
+            'default': {}, alias: {'ENGINE': 'django.db.backends.sqlite3', 'NAME': name}})
+        connections.settings[alias] = configured[alias]
+    
+    def names(self, response):
+        return [row['fields']['first_name'] for row in json.loads(response.content)]
+    
+    def test_without_replicas_reads_use_primary(self):
+        """Test that nothing changes when no replica is configured"""
+        response = self.client.get('/restaurant/bookings?date=2024-12-25')
+        self.assertEqual(self.names(response), ['Primary'])
+    
+    @override_settings(DATABASE_REPLICAS={'replica': 1})
+    def test_replica_views_read_from_replica(self):
+        """Test that GET on the bookings API reads from the replica"""
+        response = self.client.get('/restaurant/api/tables/?date=2024-12-25', **self.auth)
+        self.assertEqual([row['first_name'] for row in response.json()['results']], ['Replica'])
+    
+    @override_settings(DATABASE_REPLICAS={'replica': 1})
+    def test_streamed_export_reads_from_replica(self):
+        """Test that the export streams the replica's rows after the middleware returned"""
+        response = self.client.get('/restaurant/api/tables/export/?format=ndjson&date=2024-12-25', **self.auth)
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([row['first_name'] for row in rows], ['Replica'])
+    
+    @override_settings(DATABASE_REPLICAS={'replica': 1})
+    def test_versioned_views_read_from_primary(self):
+        """Test that views with ETags from the version counters never read a replica"""
+        response = self.client.get('/restaurant/bookings?date=2024-12-25')
+        self.assertEqual(self.names(response), ['Primary'])
+    
+    @override_settings(DATABASE_REPLICAS={'replica': 1})
+    async def test_async_requests(self):
+        """Test that the middleware keeps ASGI requests async and still routes them"""
+        self.assertNotIsInstance(ASGIHandler()._middleware_chain, SyncToAsync)
+        response = await AsyncClient().get('/restaurant/api/tables/?date=2024-12-25',
+                                           headers={'Authorization': self.auth['HTTP_AUTHORIZATION']})
+        self.assertEqual([row['first_name'] for row in response.json()['results']], ['Replica'])
+        response = await AsyncClient().post('/restaurant/bookings?date=2024-12-25', json.dumps({
+            'first_name': 'New', 'reservation_date': '2024-12-25', 'reservation_slot': 16,
+        }), content_type='application/json')
+        self.assertEqual(self.names(response), ['Primary', 'New'])
+    
+    @override_settings(DATABASE_REPLICAS={'replica': 1})
+    def test_writes_and_following_reads_use_primary(self):
+        """Test that a POST writes to and then reads from the primary"""
+        response = self.client.post('/restaurant/bookings?date=2024-12-25', json.dumps({
+            'first_name': 'New', 'reservation_date': '2024-12-25', 'reservation_slot': 16,
+        }), content_type='application/json')
+        self.assertEqual(self.names(response), ['Primary', 'New'])
+        self.assertFalse(Booking.objects.using('replica').filter(first_name='New').exists())
+    
+    @override_settings(DATABASE_REPLICAS={'replica': 1})
+    def test_write_pins_request_to_primary(self):
+        """Test that reads after a write in the same request use the primary"""
+        router = routers.ReplicaRouter()
+        routing = routers._Routing(replica_allowed=True)
+        token = routers._request_routing.set(routing)
+        try:
+            self.assertEqual(router.db_for_read(Booking), 'replica')
+            self.assertEqual(router.db_for_write(Booking), 'default')
+            self.assertIsNone(router.db_for_read(Booking))
+        finally:
+            routers._request_routing.reset(token)
+    
+    @override_settings(DATABASE_REPLICAS={'replica': 1})
+    def test_outside_requests_use_primary(self):
+        """Test that commands and shell code never read from a replica"""
+        self.assertIsNone(routers.ReplicaRouter().db_for_read(Booking))
+    
+    @override_settings(DATABASE_REPLICAS={'broken': 1, 'replica': 1})
+    def test_unhealthy_replica_fails_over(self):
+        """Test that an unreachable replica is skipped"""
+        self.add_alias('broken', '/nonexistent/directory/replica.sqlite3')
+        for _ in range(5):
+            self.assertEqual(routers.choose_replica(), 'replica')
+        self.assertFalse(routers.healthy('broken'))
+    
+    @override_settings(DATABASE_REPLICAS={'replica': 1})
+    def test_all_replicas_down_uses_primary(self):
+        """Test falling back to the primary when no replica is healthy"""
+        routers.mark_unhealthy('replica')
+        response = self.client.get('/restaurant/bookings?date=2024-12-25')
+        self.assertEqual(self.names(response), ['Primary'])
+    
+    @override_settings(DATABASE_REPLICAS={'replica': 1})
+    def test_no_migrations_on_replicas(self):
+        """Test that replicas are left to replication"""
+        router = routers.ReplicaRouter()
+        self.assertFalse(router.allow_migrate('replica', 'restaurant'))
+        self.assertIsNone(router.allow_migrate('default', 'restaurant'))
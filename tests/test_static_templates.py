@@ -2,7 +2,14 @@ from django.test import TestCase, Client
 from django.urls import reverse
 from django.contrib.staticfiles.testing import StaticLiveServerTestCase
 from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import override_settings
+from unittest import mock
 import os
+import shutil
+import tempfile
 
 
 class StaticFilesTest(TestCase):
@@ -31,6 +38,9 @@ class TemplateTest(TestCase):
     """Test cases for template functionality"""
     
     def setUp(self):
+        # Rendered pages are cached; start from an empty cache so the
+        # templates are rendered again.
+        cache.clear()
         self.client = Client()
     
     def test_home_template(self):
@@ -51,6 +61,18 @@ class TemplateTest(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, 'menu.html')
     
+    def test_deploy_rolls_over_cached_pages(self):
+        """Test that cached pages and fragments are keyed on the static manifest"""
+        self.client.get(reverse('about'))
+        response = self.client.get(reverse('about'))
+        self.assertTemplateNotUsed(response, 'about.html')
+        deployed = 'f' * 12
+        with mock.patch('restaurant.cache.static_version', return_value=deployed), \
+                mock.patch('restaurant.storage.static_version', return_value=deployed):
+            response = self.client.get(reverse('about'))
+        self.assertTemplateUsed(response, 'about.html')
+        self.assertTemplateUsed(response, 'partials/_header.html')
+    
     def test_book_template(self):
         """Test booking page template"""
         response = self.client.get(reverse('book'))
@@ -77,3 +99,85 @@ class URLTest(TestCase):
             with self.subTest(url=url):
                 response = self.client.get(url)
                 self.assertEqual(response.status_code, 200)
+
+
+class StaticPipelineTest(TestCase):
+    """Test cases for the collectstatic pipeline and the picture tag"""
+    
+    def setUp(self):
+        from PIL import Image
+        self.source = tempfile.mkdtemp()
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.source)
+        self.addCleanup(shutil.rmtree, self.root)
+        os.makedirs(os.path.join(self.source, 'img'))
+        os.makedirs(os.path.join(self.source, 'css'))
+        for name in ('dish.jpg', 'Greek salad.jpg'):
+            Image.new('RGB', (1200, 800), (200, 120, 40)).save(
+                os.path.join(self.source, 'img', name), quality=95)
+        with open(os.path.join(self.source, 'css', 'site.css'), 'w') as f:
+            f.write('body { color: #333; }\n' * 200)
+        overrides = override_settings(
+            STATICFILES_DIRS=[self.source],
+            STATIC_ROOT=self.root,
+            STATICFILES_FINDERS=['django.contrib.staticfiles.finders.FileSystemFinder'],
+            STORAGES={
+                **settings.STORAGES,
+                'staticfiles': {'BACKEND': 'restaurant.storage.OptimizedStaticFilesStorage'},
+            },
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        call_command('collectstatic', interactive=False, verbosity=0)
+    
+    def collected(self):
+        files = []
+        for directory, _, names in os.walk(self.root):
+            files += [os.path.relpath(os.path.join(directory, name), self.root) for name in names]
+        return files
+    
+    def test_variants_and_compressed_copies_are_written(self):
+        """Test that collectstatic writes image variants and precompressed text assets"""
+        from django.contrib.staticfiles.storage import staticfiles_storage
+        files = self.collected()
+        for width in (480, 960):
+            for extension in ('webp', 'jpg'):
+                with self.subTest(width=width, extension=extension):
+                    logical = f'img/dish.{width}w.{extension}'
+                    self.assertIn(staticfiles_storage.stored_name(logical), files)
+        # No variant wider than the original.
+        self.assertFalse(any('.1440w.' in name for name in files))
+        hashed_css = staticfiles_storage.stored_name('css/site.css')
+        self.assertIn(hashed_css + '.gz', files)
+        # Admin and DRF images are left alone.
+        self.assertFalse(any(name.startswith('admin/') for name in files))
+    
+    def test_static_version_follows_manifest(self):
+        """Test that the static version is a hash of the loaded manifest"""
+        from django.contrib.staticfiles.storage import staticfiles_storage
+        from restaurant.storage import static_version
+        version = static_version()
+        self.assertRegex(version, r'^[0-9a-f]{12}$')
+        staticfiles_storage.hashed_files = {**staticfiles_storage.hashed_files, 'css/new.css': 'css/new.123.css'}
+        self.assertNotEqual(static_version(), version)
+    
+    def test_picture_tag_renders_variants(self):
+        """Test that the picture tag offers the WebP and resized variants"""
+        html = Template("{% load images %}{% picture 'img/dish.jpg' alt='Dish' %}").render(Context())
+        self.assertIn('<picture><source type="image/webp"', html)
+        self.assertRegex(html, r'dish\.480w\.[0-9a-f]{12}\.webp 480w')
+        self.assertRegex(html, r'<img src="/restaurant/static/img/dish\.[0-9a-f]{12}\.jpg"')
+        self.assertIn('alt="Dish"', html)
+    
+    def test_picture_tag_encodes_spaces(self):
+        """Test that names with spaces render as single srcset candidates"""
+        html = Template("{% load images %}{% picture 'img/Greek salad.jpg' %}").render(Context())
+        self.assertRegex(html, r'Greek%20salad\.480w\.[0-9a-f]{12}\.webp 480w, ')
+        self.assertRegex(html, r'<img src="/restaurant/static/img/Greek%20salad\.[0-9a-f]{12}\.jpg"')
+        self.assertNotIn('Greek salad', html)
+    
+    def test_picture_tag_without_variants(self):
+        """Test that an image missing from the manifest renders as a plain img"""
+        html = Template("{% load images %}{% picture 'img/missing.jpg' %}").render(Context())
+        self.assertNotIn('<picture>', html)
+        self.assertIn('src="/restaurant/static/img/missing.jpg"', html)
@@ -1,13 +1,22 @@
-from django.test import TestCase, Client
+from django.core.cache import cache
+from django.db import connection
+from django.core import serializers
+from django.test import AsyncClient, Client, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.contrib.auth.models import User
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 from rest_framework.authtoken.models import Token
-from restaurant.models import Menu, Booking
+from restaurant.authentication import CachedTokenAuthentication
+from restaurant.cache import menu_cache, table_cache
+from restaurant.models import Menu, Booking, Table
 from restaurant.serializers import MenuSerializer, BookingSerializer
 from datetime import date
+from unittest import mock
+import gzip
 import json
+import time
 
 
 class MenuViewTest(TestCase):
@@ -40,6 +49,189 @@ class MenuViewTest(TestCase):
         self.assertEqual(response.status_code, 200)
 
 
+class MenuCacheTest(APITestCase):
+    """Test cases for the menu read cache"""
+    
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.user = User.objects.create_user(username='staff', password='testpass123', is_staff=True)
+        self.client.force_authenticate(self.user)
+        self.menu_item = Menu.objects.create(
+            name="Greek Salad",
+            price=12,
+            menu_item_description="Fresh Greek salad with feta cheese"
+        )
+    
+    def test_menu_page_served_without_queries(self):
+        """Test that repeated menu reads do not touch the database"""
+        self.client.get(reverse('menu'))
+        self.client.get(reverse('menu_item', kwargs={'pk': self.menu_item.id}))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('menu'))
+            self.client.get(reverse('menu_item', kwargs={'pk': self.menu_item.id}))
+        self.assertContains(response, 'Greek Salad')
+    
+    def test_api_reads_served_without_queries(self):
+        """Test that API menu reads are cached"""
+        first = self.client.get('/restaurant/api/menu-items/')
+        self.client.get(f'/restaurant/api/menu-items/{self.menu_item.id}/')
+        with self.assertNumQueries(0):
+            second = self.client.get('/restaurant/api/menu-items/')
+            item = self.client.get(f'/restaurant/api/menu-items/{self.menu_item.id}/')
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(item.data['name'], 'Greek Salad')
+    
+    def test_save_invalidates(self):
+        """Test that editing a menu item is visible on the next read"""
+        self.client.get(reverse('menu'))
+        self.menu_item.name = 'Village Salad'
+        self.menu_item.save()
+        self.assertContains(self.client.get(reverse('menu')), 'Village Salad')
+    
+    def test_delete_invalidates(self):
+        """Test that a deleted menu item is no longer served"""
+        url = reverse('menu_item', kwargs={'pk': self.menu_item.id})
+        self.client.get(url)
+        self.menu_item.delete()
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 404)
+    
+    def test_cache_stats(self):
+        """Test that hit and miss counters are reported"""
+        before = self.client.get('/restaurant/api/cache-stats/').data
+        self.client.get('/restaurant/api/menu-items/')
+        self.client.get('/restaurant/api/menu-items/')
+        self.client.get(reverse('menu'))
+        self.client.get(reverse('menu'))
+        after = self.client.get('/restaurant/api/cache-stats/').data
+        # The API list and the rows behind the menu page
+        self.assertEqual(after['menu']['misses'] - before['menu']['misses'], 2)
+        self.assertEqual(after['menu']['local_hits'] - before['menu']['local_hits'], 1)
+        self.assertEqual(after['menu_pages']['misses'] - before['menu_pages']['misses'], 1)
+        self.assertEqual(after['menu_pages']['local_hits'] - before['menu_pages']['local_hits'], 1)
+    
+    def test_cache_stats_requires_staff(self):
+        """Test that cache statistics are restricted to staff"""
+        self.client.force_authenticate(User.objects.create_user(username='guest', password='x'))
+        response = self.client.get('/restaurant/api/cache-stats/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class PageCacheTest(TestCase):
+    """Test cases for the rendered page cache"""
+    
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.menu_item = Menu.objects.create(name="Greek Salad", price=12,
+                                             menu_item_description="Fresh Greek salad")
+    
+    def test_pages_served_without_rendering(self):
+        """Test that repeated hits skip templates and queries"""
+        for name, kwargs in (('home', {}), ('about', {}), ('menu', {}),
+                             ('menu_item', {'pk': self.menu_item.id})):
+            url = reverse(name, kwargs=kwargs)
+            first = self.client.get(url)
+            self.assertTrue(first.templates)
+            with self.assertNumQueries(0):
+                second = self.client.get(url)
+            self.assertEqual(second.templates, [])
+            self.assertEqual(second.content, first.content)
+            self.assertEqual(second['Content-Type'], first['Content-Type'])
+    
+    def test_menu_edit_invalidates_pages(self):
+        """Test that saving a menu item re-renders the menu pages"""
+        item_url = reverse('menu_item', kwargs={'pk': self.menu_item.id})
+        self.client.get(reverse('menu'))
+        self.client.get(item_url)
+        self.menu_item.name = 'Village Salad'
+        self.menu_item.save()
+        self.assertContains(self.client.get(reverse('menu')), 'Village Salad')
+        self.assertContains(self.client.get(item_url), 'Village Salad')
+    
+    def test_query_string_is_part_of_key(self):
+        """Test that different query strings are cached separately"""
+        self.client.get(reverse('home'))
+        response = self.client.get(reverse('home') + '?utm=mail')
+        self.assertTrue(response.templates)
+    
+    def test_missing_item_not_cached(self):
+        """Test that a 404 is not served from the page cache"""
+        url = reverse('menu_item', kwargs={'pk': self.menu_item.id + 1})
+        self.assertEqual(self.client.get(url).status_code, 404)
+        Menu.objects.create(id=self.menu_item.id + 1, name='Lemon Dessert', price=5)
+        self.assertContains(self.client.get(url), 'Lemon Dessert')
+
+
+class ConditionalGetTest(APITestCase):
+    """Test cases for ETag/Last-Modified validators on polled reads"""
+    
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.user = User.objects.create_user(username='kiosk', password='testpass123')
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        self.menu_item = Menu.objects.create(name='Pasta', price=18, menu_item_description='Penne')
+        Booking.objects.create(first_name='Ann', reservation_date=date(2024, 12, 25), reservation_slot=18)
+    
+    def assertNotModified(self, url):
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertIn('Last-Modified', first)
+        self.client.get(url)  # warm the token cache
+        with self.assertNumQueries(0):
+            second = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 304)
+        return first['ETag']
+    
+    def test_menu_reads_not_modified(self):
+        """Test that unchanged menu reads answer 304 without queries"""
+        for url in ['/restaurant/menu/',
+                    f'/restaurant/menu_item/{self.menu_item.id}/',
+                    '/restaurant/api/menu-items/',
+                    f'/restaurant/api/menu-items/{self.menu_item.id}/']:
+            with self.subTest(url=url):
+                self.assertNotModified(url)
+    
+    def test_menu_change_updates_etag(self):
+        """Test that a menu edit invalidates the ETag"""
+        etag = self.assertNotModified('/restaurant/api/menu-items/')
+        self.menu_item.price = 20
+        self.menu_item.save()
+        response = self.client.get('/restaurant/api/menu-items/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+    
+    def test_bookings_etag_is_per_date(self):
+        """Test that only bookings on the polled date change its ETag"""
+        url = '/restaurant/bookings?date=2024-12-25'
+        etag = self.assertNotModified(url)
+        Booking.objects.create(first_name='Bob', reservation_date=date(2024, 12, 26), reservation_slot=18)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        Booking.objects.create(first_name='Cid', reservation_date=date(2024, 12, 25), reservation_slot=19)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+    
+    def test_bookings_etag_normalizes_date(self):
+        """Test that a date without zero padding shares the date's ETag"""
+        url = '/restaurant/bookings?date=2024-12-5'
+        etag = self.assertNotModified(url)
+        Booking.objects.create(first_name='Bob', reservation_date=date(2024, 12, 5), reservation_slot=18)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 1)
+        self.assertEqual(self.client.get('/restaurant/bookings?date=soon').status_code, 400)
+    
+    def test_moved_booking_updates_old_date(self):
+        """Test that moving a booking away changes the old date's ETag"""
+        url = '/restaurant/bookings?date=2024-12-25'
+        etag = self.assertNotModified(url)
+        booking = Booking.objects.get(first_name='Ann')
+        booking.reservation_date = date(2024, 12, 27)
+        booking.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
 class MenuAPITest(APITestCase):
     """Test cases for Menu API endpoints"""
     
@@ -67,7 +259,7 @@ class MenuAPITest(APITestCase):
         
         menu_items = Menu.objects.all()
         serializer = MenuSerializer(menu_items, many=True)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data['results'], serializer.data)
     
     def test_get_menu_item_by_id(self):
         """Test GET request to retrieve a specific menu item"""
@@ -116,6 +308,79 @@ class MenuAPITest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
+class MenuSearchAPITest(APITestCase):
+    """Test cases for the menu search endpoint"""
+    
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='searcher', password='testpass123')
+        self.client.force_authenticate(self.user)
+        self.url = reverse('menu-search')
+        Menu.objects.bulk_create([
+            Menu(name='Grilled Fish', price=20, menu_item_description='Sea bass with lemon'),
+            Menu(name='Greek Salad', price=12, menu_item_description='Feta, olives and grilled peppers'),
+            Menu(name='Lemon Dessert', price=8, menu_item_description='Crème brûlée with lemon zest'),
+            Menu(name='Bruschetta', price=9, menu_item_description='Toasted bread with tomato'),
+        ])
+        # bulk_create sends no post_save.
+        menu_cache.invalidate()
+    
+    def names(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item['name'] for item in response.data['results']]
+    
+    def test_name_matches_rank_first(self):
+        """Test that matches in the name outrank matches in the description"""
+        self.assertEqual(self.names(q='grilled'), ['Grilled Fish', 'Greek Salad'])
+        self.assertEqual(self.names(q='lemon'), ['Lemon Dessert', 'Grilled Fish'])
+    
+    def test_prefix_and_accent_insensitive_matching(self):
+        """Test that terms match word prefixes and ignore case and accents"""
+        self.assertEqual(self.names(q='BRUS'), ['Bruschetta'])
+        self.assertEqual(self.names(q='creme brulee'), ['Lemon Dessert'])
+    
+    def test_all_terms_must_match(self):
+        """Test that every term of the query must match"""
+        self.assertEqual(self.names(q='lemon bass'), ['Grilled Fish'])
+        self.assertEqual(self.names(q='lemon tomato'), [])
+    
+    def test_price_range(self):
+        """Test filtering by price with and without a query"""
+        self.assertEqual(self.names(q='lemon', max_price=10), ['Lemon Dessert'])
+        self.assertEqual(self.names(min_price=9, max_price=12), ['Bruschetta', 'Greek Salad'])
+        response = self.client.get(self.url, {'min_price': 9, 'limit': 1})
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual(len(response.data['results']), 1)
+    
+    def test_index_follows_menu_changes(self):
+        """Test that saved and deleted items are searchable right away"""
+        self.assertEqual(self.names(q='souvlaki'), [])
+        item = Menu.objects.create(name='Lamb Souvlaki', price=18)
+        self.assertEqual(self.names(q='souvlaki'), ['Lamb Souvlaki'])
+        item.delete()
+        self.assertEqual(self.names(q='souvlaki'), [])
+    
+    def test_search_runs_no_queries_once_indexed(self):
+        """Test that a warm index answers without database queries"""
+        self.names(q='grilled')
+        with self.assertNumQueries(0):
+            self.client.get(self.url, {'q': 'salad'})
+    
+    def test_invalid_parameters(self):
+        """Test that non-integer prices and bad limits are rejected"""
+        for params in ({'min_price': 'cheap'}, {'limit': 0}, {'limit': 1000}):
+            with self.subTest(params=params):
+                response = self.client.get(self.url, params)
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_requires_authentication(self):
+        """Test that the search requires authentication"""
+        self.client.force_authenticate(None)
+        response = self.client.get(self.url, {'q': 'fish'})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
 class BookingAPITest(APITestCase):
     """Test cases for Booking API endpoints"""
     
@@ -143,7 +408,48 @@ class BookingAPITest(APITestCase):
         
         bookings = Booking.objects.all()
         serializer = BookingSerializer(bookings, many=True)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data['results'], serializer.data)
+    
+    def test_rendered_json_matches_data(self):
+        """Test that the fast renderer emits the same JSON as the serializer data"""
+        response = self.client.get(f'/restaurant/api/tables/{self.booking.id}/')
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(json.loads(response.content), BookingSerializer(self.booking).data)
+        indented = self.client.get(f'/restaurant/api/tables/{self.booking.id}/',
+                                   HTTP_ACCEPT='application/json; indent=2')
+        self.assertIn(b'\n  "first_name"', indented.content)
+    
+    def test_bookings_cursor_pagination(self):
+        """Test that bookings are paged by date and slot with a cursor"""
+        for day, slot in [(24, 20), (25, 18), (26, 10), (25, 10)]:
+            Booking.objects.create(
+                first_name=f'Guest {day}-{slot}',
+                reservation_date=date(2024, 12, day),
+                reservation_slot=slot
+            )
+        seen = []
+        url = '/restaurant/api/tables/?page_size=2'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data['results']), 2)
+            seen += [(b['reservation_date'], b['reservation_slot']) for b in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(seen, [
+            ('2024-12-24', 20), ('2024-12-25', 10), ('2024-12-25', 18),
+            ('2024-12-25', 19), ('2024-12-26', 10),
+        ])
+    
+    def test_page_size_is_capped(self):
+        """Test that page_size cannot exceed the maximum"""
+        Booking.objects.bulk_create([
+            Booking(first_name=f'Guest {i}', reservation_date=date(2025, 1, 1 + i // 10),
+                    reservation_slot=10 + i % 10)
+            for i in range(210)
+        ])
+        response = self.client.get('/restaurant/api/tables/?page_size=1000')
+        self.assertEqual(len(response.data['results']), 200)
+        self.assertIsNotNone(response.data['next'])
     
     def test_create_booking(self):
         """Test POST request to create a new booking"""
@@ -156,6 +462,18 @@ class BookingAPITest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(Booking.objects.count(), 2)
     
+    def test_create_booking_slot_conflict(self):
+        """Test that booking a taken slot is rejected without a server error"""
+        data = {
+            'first_name': 'Jane Doe',
+            'reservation_date': '2024-12-25',
+            'reservation_slot': 19
+        }
+        response = self.client.post('/restaurant/api/tables/', data)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('non_field_errors', response.data)
+        self.assertEqual(Booking.objects.count(), 1)
+    
     def test_update_booking(self):
         """Test PUT request to update a booking"""
         data = {
@@ -177,6 +495,246 @@ class BookingAPITest(APITestCase):
         self.assertEqual(Booking.objects.count(), 0)
 
 
+class BookingFilterAPITest(APITestCase):
+    """Test cases for filtering and aggregating the bookings API"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(username='frontdesk', password='testpass123')
+        self.client.force_authenticate(self.user)
+        self.url = reverse('booking-list')
+        Booking.objects.bulk_create([
+            Booking(first_name='Anna Rossi', reservation_date=date(2025, 3, 3), reservation_slot=12),
+            Booking(first_name='Ben Lee', reservation_date=date(2025, 3, 3), reservation_slot=18),
+            Booking(first_name='anna Kim', reservation_date=date(2025, 3, 4), reservation_slot=18),
+            Booking(first_name='Carla Silva', reservation_date=date(2025, 3, 9), reservation_slot=19),
+            Booking(first_name='Dan Brown', reservation_date=date(2025, 3, 12), reservation_slot=18),
+        ])
+    
+    def names(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [booking['first_name'] for booking in response.data['results']]
+    
+    def test_filters(self):
+        """Test the date, range, slot and name prefix filters"""
+        self.assertEqual(self.names(date='2025-03-03'), ['Anna Rossi', 'Ben Lee'])
+        self.assertEqual(self.names(**{'from': '2025-03-04', 'to': '2025-03-10'}),
+                         ['anna Kim', 'Carla Silva'])
+        self.assertEqual(self.names(slot=18), ['Ben Lee', 'anna Kim', 'Dan Brown'])
+        self.assertEqual(self.names(name='ANNA'), ['Anna Rossi', 'anna Kim'])
+        self.assertEqual(self.names(name='anna', slot=18), ['anna Kim'])
+    
+    def test_invalid_filters(self):
+        """Test that malformed filters are rejected"""
+        for params in ({'date': 'soon'}, {'slot': '24'}, {'slot': 'dinner'}, {'group_by': 'name'}):
+            with self.subTest(params=params):
+                response = self.client.get(self.url, params)
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_group_by_date(self):
+        """Test per-day counts from a single query"""
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, {'group_by': 'date', 'from': '2025-03-01', 'to': '2025-03-10'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total'], 4)
+        self.assertEqual(
+            [(str(row['reservation_date']), row['count']) for row in response.data['results']],
+            [('2025-03-03', 2), ('2025-03-04', 1), ('2025-03-09', 1)],
+        )
+    
+    def test_group_by_slot(self):
+        """Test per-slot counts honour the other filters"""
+        response = self.client.get(self.url, {'group_by': 'slot', 'name': 'a'})
+        self.assertEqual(
+            [(row['reservation_slot'], row['count']) for row in response.data['results']],
+            [(12, 1), (18, 1)],
+        )
+    
+    def test_week_listing_uses_index_range(self):
+        """Test that a date range is read from the (date, slot) index"""
+        with CaptureQueriesContext(connection) as queries:
+            self.names(**{'from': '2025-03-03', 'to': '2025-03-09'})
+        sql = queries.captured_queries[-1]['sql']
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            plan = ' '.join(str(row) for row in cursor.fetchall())
+        # SQLite names the constraint's index sqlite_autoindex_restaurant_booking_1.
+        self.assertIn('SEARCH restaurant_booking USING INDEX', plan)
+        self.assertIn('reservation_date>? AND reservation_date<?', plan)
+    
+    def test_export_uses_the_same_filters(self):
+        """Test that the export honours the list filters"""
+        response = self.client.get(reverse('booking-export'), {'format': 'csv', 'slot': 18})
+        content = b''.join(response.streaming_content).decode()
+        self.assertEqual(len(content.strip().splitlines()), 4)
+
+
+class OccupancyHeatmapTest(APITestCase):
+    """Test cases for the occupancy heatmap endpoint"""
+    
+    def setUp(self):
+        self.staff = User.objects.create_user(username='manager', password='testpass123', is_staff=True)
+        self.client.force_authenticate(self.staff)
+        self.url = reverse('occupancy-heatmap')
+        # 2025-03-03 and 2025-03-10 are Mondays, 2025-03-08 a Saturday.
+        for day, slot in ((3, 12), (3, 18), (10, 18), (8, 19), (20, 18)):
+            Booking.objects.create(first_name='Guest', reservation_date=date(2025, 3, day), reservation_slot=slot)
+    
+    def test_heatmap(self):
+        """Test counts and averages per weekday and slot from one query"""
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, {'from': '2025-03-03', 'to': '2025-03-16'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['slots'], list(range(10, 20)))
+        monday, saturday = response.data['weekdays'][0], response.data['weekdays'][5]
+        self.assertEqual(monday['weekday'], 'Monday')
+        self.assertEqual(monday['days'], 2)
+        self.assertEqual(monday['bookings'][2], 1)
+        self.assertEqual(monday['bookings'][8], 2)
+        self.assertEqual(monday['average'][8], 1.0)
+        self.assertEqual(saturday['bookings'][9], 1)
+        # 2025-03-20 is outside the range.
+        self.assertEqual(sum(sum(row['bookings']) for row in response.data['weekdays']), 4)
+    
+    def test_days_per_weekday(self):
+        """Test that the range's weekdays are counted"""
+        response = self.client.get(self.url, {'from': '2025-03-05', 'to': '2025-03-14'})
+        self.assertEqual([row['days'] for row in response.data['weekdays']], [1, 1, 2, 2, 2, 1, 1])
+    
+    def test_staff_only_and_invalid_range(self):
+        """Test that other users are refused and bad ranges rejected"""
+        response = self.client.get(self.url, {'from': '2025-03-10', 'to': '2025-03-01'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.client.force_authenticate(User.objects.create_user(username='guest', password='x'))
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_403_FORBIDDEN)
+
+
+class BulkBookingAPITest(APITestCase):
+    """Test cases for creating bookings in bulk"""
+    
+    def setUp(self):
+        """Set up test data and authentication"""
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_authenticate(self.user)
+        Booking.objects.create(
+            first_name="John Smith",
+            reservation_date=date(2024, 12, 25),
+            reservation_slot=19
+        )
+    
+    def test_bulk_create_reports_each_item(self):
+        """Test that a list payload is created with per-item results"""
+        payload = [
+            {'first_name': 'Ann', 'reservation_date': '2024-12-25', 'reservation_slot': 18},
+            {'first_name': 'Bob', 'reservation_date': '2024-12-25', 'reservation_slot': 19},
+            {'first_name': 'Cid', 'reservation_date': '2024-12-26', 'reservation_slot': 18},
+            {'first_name': 'Dee', 'reservation_date': '2024-12-26', 'reservation_slot': 18},
+            {'first_name': 'Eve', 'reservation_date': 'not a date'},
+        ]
+        response = self.client.post('/restaurant/api/tables/', payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        results = response.data['results']
+        self.assertEqual([r['status'] for r in results],
+                         ['created', 'conflict', 'created', 'conflict', 'invalid'])
+        self.assertEqual(results[0]['booking']['first_name'], 'Ann')
+        self.assertIn('reservation_date', results[4]['errors'])
+        self.assertEqual(Booking.objects.count(), 3)
+    
+    def test_bulk_create_returns_ids_without_returning(self):
+        """Test that created items carry their ids on backends whose bulk
+        INSERT cannot return rows (MySQL)"""
+        payload = [
+            {'first_name': 'Ann', 'reservation_date': '2025-02-01', 'reservation_slot': 18},
+            {'first_name': 'Bob', 'reservation_date': '2025-02-02', 'reservation_slot': 19},
+        ]
+        with mock.patch.object(type(connection.features), 'can_return_rows_from_bulk_insert',
+                               new_callable=mock.PropertyMock, return_value=False):
+            response = self.client.post('/restaurant/api/tables/', payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        for result in response.data['results']:
+            booking = Booking.objects.get(pk=result['booking']['id'])
+            self.assertEqual(booking.first_name, result['booking']['first_name'])
+    
+    def test_bulk_create_updates_availability(self):
+        """Test that bulk-created bookings are reflected in availability"""
+        payload = [
+            {'first_name': f'Guest {slot}', 'reservation_date': '2024-12-27', 'reservation_slot': slot}
+            for slot in (11, 12, 13)
+        ]
+        self.client.post('/restaurant/api/tables/', payload, format='json')
+        response = self.client.get('/restaurant/availability', {'date': '2024-12-27'})
+        self.assertEqual(response.json()['booked'], [11, 12, 13])
+    
+    def test_bulk_conflicts_checked_in_one_query(self):
+        """Test that slot conflicts for the whole batch cost one SELECT"""
+        payload = [
+            {'first_name': f'Guest {i}', 'reservation_date': f'2025-01-{1 + i // 10:02d}',
+             'reservation_slot': 10 + i % 10}
+            for i in range(50)
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/restaurant/api/tables/', payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        selects = [q for q in queries
+                   if q['sql'].startswith('SELECT') and 'restaurant_booking' in q['sql']]
+        self.assertEqual(len(selects), 1)
+        self.assertEqual(Booking.objects.count(), 51)
+    
+    def test_all_conflicts_is_bad_request(self):
+        """Test that a batch with nothing created is rejected"""
+        payload = [{'first_name': 'Bob', 'reservation_date': '2024-12-25', 'reservation_slot': 19}]
+        response = self.client.post('/restaurant/api/tables/', payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['results'][0]['status'], 'conflict')
+
+
+class BookingExportAPITest(APITestCase):
+    """Test cases for the streaming bookings export"""
+    
+    def setUp(self):
+        """Set up test data and authentication"""
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_authenticate(self.user)
+        Booking.objects.bulk_create([
+            Booking(first_name=f'Guest {i}', reservation_date=date(2024, 12, 25 + i // 10),
+                    reservation_slot=10 + i % 10)
+            for i in range(15)
+        ])
+    
+    def test_csv_is_default(self):
+        """Test that the export streams CSV filtered by date"""
+        response = self.client.get('/restaurant/api/tables/export/?date=2024-12-26')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'id,first_name,reservation_date,reservation_slot,party_size,table')
+        self.assertEqual(len(lines), 6)
+        self.assertIn(',Guest 10,2024-12-26,10,2,', lines[1])
+    
+    def test_ndjson_gzip(self):
+        """Test NDJSON output compressed for clients that accept gzip"""
+        response = self.client.get('/restaurant/api/tables/export/?format=ndjson',
+                                   HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        body = gzip.decompress(b''.join(response.streaming_content))
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual(len(rows), 15)
+        self.assertEqual(rows[-1]['reservation_slot'], 14)
+    
+    def test_invalid_filter(self):
+        """Test that a malformed date is rejected"""
+        response = self.client.get('/restaurant/api/tables/export/?from=soon')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_requires_authentication(self):
+        """Test that anonymous clients cannot export"""
+        self.client.force_authenticate(None)
+        response = self.client.get('/restaurant/api/tables/export/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
 class BookingViewTest(TestCase):
     """Test cases for booking views and functionality"""
     
@@ -218,6 +776,37 @@ class BookingViewTest(TestCase):
         # Should return error
         self.assertContains(response, 'error')
     
+    def test_duplicate_booking_single_query(self):
+        """Test that a full slot costs one table lookup and no INSERT"""
+        Booking.objects.create(
+            first_name='Existing User',
+            reservation_date=date(2024, 12, 25),
+            reservation_slot=18
+        )
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                '/restaurant/bookings',
+                data=json.dumps(self.booking_data),
+                content_type='application/json'
+            )
+        booking_queries = [q for q in queries if 'restaurant_booking' in q['sql']]
+        self.assertEqual(len(booking_queries), 1)
+        self.assertTrue(booking_queries[0]['sql'].startswith('SELECT'))
+        self.assertContains(response, 'error')
+        self.assertEqual(Booking.objects.count(), 1)
+    
+    def test_book_form_slot_conflict(self):
+        """Test that the booking form reports a taken slot"""
+        Booking.objects.create(
+            first_name='Existing User',
+            reservation_date=date(2024, 12, 25),
+            reservation_slot=18
+        )
+        response = self.client.post(reverse('book'), self.booking_data)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['form'].errors)
+        self.assertEqual(Booking.objects.count(), 1)
+    
     def test_bookings_get_request(self):
         """Test GET request to bookings endpoint"""
         # Create a booking
@@ -230,6 +819,354 @@ class BookingViewTest(TestCase):
         response = self.client.get('/restaurant/bookings')
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response['Content-Type'], 'application/json')
+    
+    def test_bookings_get_matches_serializer_output(self):
+        """Test that the endpoint keeps the django serializer JSON shape"""
+        Booking.objects.create(
+            first_name='Test User',
+            reservation_date=date(2024, 12, 25),
+            reservation_slot=18
+        )
+        response = self.client.get('/restaurant/bookings', {'date': '2024-12-25'})
+        expected = serializers.serialize('json', Booking.objects.filter(reservation_date=date(2024, 12, 25)))
+        self.assertEqual(json.loads(response.content), json.loads(expected))
+
+
+class AsyncBookingViewTest(TransactionTestCase):
+    """Test cases for the async public endpoints under an ASGI request"""
+    
+    def setUp(self):
+        """Set up the table the migrations create, flushed between tests"""
+        Table.objects.get_or_create(number=1, defaults={'seats': 8})
+    
+    async def test_async_post_and_get(self):
+        """Test booking and reading back through AsyncClient"""
+        client = AsyncClient()
+        payload = {'first_name': 'Async User', 'reservation_date': '2024-12-25', 'reservation_slot': 18}
+        response = await client.post('/restaurant/bookings?date=2024-12-25',
+                                     data=json.dumps(payload), content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)[0]['fields']['first_name'], 'Async User')
+        
+        duplicate = await client.post('/restaurant/bookings',
+                                      data=json.dumps(payload), content_type='application/json')
+        self.assertContains(duplicate, 'error')
+        
+        availability = await client.get('/restaurant/availability', {'date': '2024-12-25'})
+        self.assertEqual(availability.json()['booked'], [18])
+    
+    async def test_async_menu_pages(self):
+        """Test the menu pages through AsyncClient"""
+        item = await Menu.objects.acreate(name='Pasta', price=18, menu_item_description='Penne')
+        client = AsyncClient()
+        self.assertContains(await client.get('/restaurant/menu/'), 'Pasta')
+        self.assertContains(await client.get(f'/restaurant/menu_item/{item.pk}/'), 'Penne')
+        self.assertEqual((await client.get('/restaurant/menu_item/999999/')).status_code, 404)
+
+
+class ReservationsViewTest(TestCase):
+    """Test cases for the reservations page and dump"""
+    
+    def setUp(self):
+        """Set up test data"""
+        self.client = Client()
+        for day, slot in [(24, 18), (25, 12), (25, 18), (26, 11), (27, 19)]:
+            Booking.objects.create(
+                first_name=f'Guest {day}-{slot}',
+                reservation_date=date(2024, 12, day),
+                reservation_slot=slot
+            )
+    
+    def names(self, response):
+        return [b['fields']['first_name'] for b in response.context['bookings']]
+    
+    def test_date_filter(self):
+        """Test that the date parameter is applied"""
+        response = self.client.get(reverse('reservations'), {'date': '2024-12-25'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.names(response), ['Guest 25-12', 'Guest 25-18'])
+    
+    def test_date_range_filter(self):
+        """Test that from/to restrict the listing to a range"""
+        response = self.client.get(reverse('reservations'), {'from': '2024-12-25', 'to': '2024-12-26'})
+        self.assertEqual(self.names(response), ['Guest 25-12', 'Guest 25-18', 'Guest 26-11'])
+    
+    def test_keyset_pagination(self):
+        """Test that pages follow each other without gaps or repeats"""
+        seen = []
+        query = 'limit=2'
+        while query:
+            response = self.client.get(reverse('reservations') + '?' + query)
+            seen += self.names(response)
+            query = response.context['next_query']
+        self.assertEqual(seen, [
+            'Guest 24-18', 'Guest 25-12', 'Guest 25-18', 'Guest 26-11', 'Guest 27-19'
+        ])
+    
+    def test_invalid_filter(self):
+        """Test that an invalid date is rejected"""
+        response = self.client.get(reverse('reservations'), {'from': 'yesterday'})
+        self.assertEqual(response.status_code, 400)
+    
+    def test_limit_is_clamped(self):
+        """Test that a zero or negative limit shows one booking per page"""
+        for limit in (0, -5):
+            response = self.client.get(reverse('reservations'), {'limit': limit})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(self.names(response), ['Guest 24-18'])
+            self.assertIsNotNone(response.context['next_query'])
+    
+    def test_streaming_dump(self):
+        """Test that the dump streams every matching booking"""
+        response = self.client.get(reverse('reservations-dump'), {'from': '2024-12-26'})
+        self.assertTrue(response.streaming)
+        data = json.loads(b''.join(response.streaming_content))
+        self.assertEqual([b['fields']['first_name'] for b in data], ['Guest 26-11', 'Guest 27-19'])
+        self.assertEqual(data[0]['model'], 'restaurant.booking')
+        self.assertEqual(data[0]['fields']['reservation_date'], '2024-12-26')
+    
+    def test_dump_reads_in_keyset_chunks(self):
+        """Test that the dump reads one bounded query per chunk"""
+        with mock.patch('restaurant.views.DUMP_CHUNK_SIZE', 2):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse('reservations-dump'))
+                data = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(len(data), 5)
+        selects = [q['sql'] for q in queries if 'restaurant_booking' in q['sql']]
+        self.assertEqual(len(selects), 3)
+        self.assertTrue(all('LIMIT 2' in sql for sql in selects))
+
+
+class AvailabilityTest(TestCase):
+    """Test cases for the per-date slot availability index"""
+    
+    def setUp(self):
+        """Set up test data"""
+        self.client = Client()
+        self.booking = Booking.objects.create(
+            first_name='Test User',
+            reservation_date=date(2024, 12, 25),
+            reservation_slot=18
+        )
+    
+    def get_availability(self, day='2024-12-25'):
+        response = self.client.get('/restaurant/availability', {'date': day})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+    
+    def test_booked_slot_is_not_free(self):
+        """Test that a created booking marks its slot as taken"""
+        data = self.get_availability()
+        self.assertEqual(data['booked'], [18])
+        self.assertNotIn(18, data['free'])
+        self.assertIn(19, data['free'])
+    
+    def test_post_updates_availability(self):
+        """Test that bookings made through the public endpoint are indexed"""
+        self.client.post(
+            '/restaurant/bookings',
+            data=json.dumps({
+                'first_name': 'Other User',
+                'reservation_date': '2024-12-25',
+                'reservation_slot': '12'
+            }),
+            content_type='application/json'
+        )
+        self.assertEqual(self.get_availability()['booked'], [12, 18])
+    
+    def test_update_moves_slot(self):
+        """Test that moving a booking frees the old slot"""
+        booking = Booking.objects.get(pk=self.booking.pk)
+        booking.reservation_date = date(2024, 12, 26)
+        booking.reservation_slot = 11
+        booking.save()
+        self.assertEqual(self.get_availability()['booked'], [])
+        self.assertEqual(self.get_availability('2024-12-26')['booked'], [11])
+    
+    def test_delete_frees_slot(self):
+        """Test that deleting a booking frees its slot"""
+        Booking.objects.all().delete()
+        self.assertEqual(self.get_availability()['booked'], [])
+    
+    def test_single_query(self):
+        """Test that availability is answered by one lookup"""
+        with self.assertNumQueries(1):
+            self.client.get('/restaurant/availability', {'date': '2024-12-25'})
+    
+    def test_party_size(self):
+        """Test that availability for a party counts the tables that seat it"""
+        self.addCleanup(table_cache.invalidate)
+        Table.objects.create(number=2, seats=4)
+        response = self.client.get('/restaurant/availability', {'date': '2024-12-25', 'party_size': 4})
+        self.assertEqual(response.json()['booked'], [])
+        response = self.client.get('/restaurant/availability', {'date': '2024-12-25', 'party_size': 6})
+        self.assertEqual(response.json()['party_size'], 6)
+        self.assertEqual(response.json()['booked'], [18])
+        self.assertIn(19, response.json()['free'])
+        self.assertEqual(self.get_availability()['booked'], [])
+    
+    def test_invalid_party_size(self):
+        """Test that party sizes outside 1 to MAX_PARTY_SIZE are rejected"""
+        for party_size in ('abc', 0, -4, 21):
+            response = self.client.get('/restaurant/availability',
+                                       {'date': '2024-12-25', 'party_size': party_size})
+            self.assertEqual(response.status_code, 400)
+            response = self.client.post('/restaurant/bookings', data=json.dumps({
+                'first_name': 'Guest', 'reservation_date': '2024-12-26', 'reservation_slot': 12,
+                'party_size': party_size,
+            }), content_type='application/json')
+            self.assertContains(response, 'error')
+        self.assertFalse(Booking.objects.filter(reservation_date=date(2024, 12, 26)).exists())
+    
+    def test_party_too_large_is_rejected(self):
+        """Test that the bookings API reports a party no table seats"""
+        user = User.objects.create_user(username='staff', password='testpass123')
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.post('/restaurant/api/tables/', {
+            'first_name': 'Big Party', 'reservation_date': '2024-12-26',
+            'reservation_slot': 12, 'party_size': 12,
+        })
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('No table seats a party of 12.', str(response.data))
+    
+    def test_invalid_date(self):
+        """Test that an invalid date is rejected"""
+        for value in ('2024-13-45', 'tomorrow', '12/25'):
+            with self.subTest(date=value):
+                response = self.client.get('/restaurant/availability', {'date': value})
+                self.assertEqual(response.status_code, 400)
+
+
+class NextAvailableTest(TestCase):
+    """Test cases for the next available slot search"""
+    
+    def setUp(self):
+        """Set up test data"""
+        self.client = Client()
+        for day, slot in [(25, 18), (25, 19), (26, 18)]:
+            Booking.objects.create(first_name=f'Guest {day}-{slot}',
+                                   reservation_date=date(2024, 12, day), reservation_slot=slot)
+    
+    def search(self, **params):
+        response = self.client.get('/restaurant/availability/next', {'date': '2024-12-25', **params})
+        self.assertEqual(response.status_code, 200)
+        return [(row['date'], row['slot']) for row in response.json()['results']]
+    
+    def test_preferred_slots_in_order(self):
+        """Test that the nearest dates come first, slots in preference order"""
+        self.assertEqual(self.search(slots='18,19', limit=3), [
+            ('2024-12-26', 19), ('2024-12-27', 18), ('2024-12-27', 19)])
+        self.assertEqual(self.search(slots='19,18', limit=2), [('2024-12-26', 19), ('2024-12-27', 19)])
+        self.assertEqual(self.search(limit=1), [('2024-12-25', 10)])
+    
+    def test_horizon(self):
+        """Test that no option past the horizon is returned"""
+        self.assertEqual(self.search(slots='18', days=2), [])
+        response = self.client.get('/restaurant/availability/next', {'date': '2024-12-25', 'days': 2})
+        self.assertEqual(response.json()['to'], '2024-12-26')
+    
+    def test_party_size(self):
+        """Test that a slot is offered while a table seating the party is free"""
+        self.addCleanup(table_cache.invalidate)
+        Table.objects.create(number=2, seats=4)
+        self.assertEqual(self.search(slots='18', party_size=3, limit=2),
+                         [('2024-12-25', 18), ('2024-12-26', 18)])
+        self.assertEqual(self.search(slots='18', party_size=6, limit=1), [('2024-12-27', 18)])
+    
+    def test_single_query(self):
+        """Test that a 90-day search costs one range query"""
+        with self.assertNumQueries(1):
+            self.search(slots='18,19', days=90, limit=50)
+        self.search(party_size=2)
+        with self.assertNumQueries(1):
+            self.search(slots='18,19', days=90, limit=50, party_size=2)
+    
+    def test_invalid_parameters(self):
+        """Test that out-of-range or malformed parameters are rejected"""
+        for params in ({'days': 91}, {'limit': 0}, {'slots': '9'}, {'slots': 'dinner'}, {'date': '2024-13-45'},
+                       {'date': 'tomorrow'}, {'party_size': 0}, {'party_size': -4}, {'party_size': 21}):
+            response = self.client.get('/restaurant/availability/next', params)
+            self.assertEqual(response.status_code, 400)
+
+
+class SlotHoldTest(TestCase):
+    """Test cases for short-lived slot holds"""
+    
+    def setUp(self):
+        """Set up a second, 4-seat table next to the migrations' 8-seat one"""
+        cache.clear()
+        self.addCleanup(table_cache.invalidate)
+        Table.objects.create(number=2, seats=4)
+        self.client = Client()
+    
+    def hold(self, **data):
+        payload = {'reservation_date': '2024-12-25', 'reservation_slot': 18, 'party_size': 2, **data}
+        return self.client.post('/restaurant/holds', data=json.dumps(payload), content_type='application/json')
+    
+    def free(self, **params):
+        return self.client.get('/restaurant/availability', {'date': '2024-12-25', **params}).json()['free']
+    
+    def test_hold_and_confirm(self):
+        """Test that a confirmed hold becomes a booking at the held table"""
+        response = self.hold()
+        self.assertEqual(response.status_code, 201)
+        hold = response.json()
+        self.assertEqual(Table.objects.get(pk=hold['table']).seats, 4)
+        self.assertEqual(self.client.get(f'/restaurant/holds/{hold["hold"]}').json()['table'], hold['table'])
+        
+        response = self.client.post(f'/restaurant/holds/{hold["hold"]}/confirm',
+                                    data=json.dumps({'first_name': 'Held Guest'}),
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(json.loads(response.content)[0]['fields']['table'], hold['table'])
+        booking = Booking.objects.get(first_name='Held Guest')
+        self.assertEqual((booking.reservation_slot, booking.party_size), (18, 2))
+        self.assertEqual(self.client.get(f'/restaurant/holds/{hold["hold"]}').status_code, 404)
+        self.assertEqual(self.client.post(f'/restaurant/holds/{hold["hold"]}/confirm',
+                                          data=json.dumps({'first_name': 'Again'}),
+                                          content_type='application/json').status_code, 404)
+    
+    def test_holds_count_as_booked(self):
+        """Test that availability, allocation and new holds skip held tables"""
+        self.hold()
+        self.assertIn(18, self.free())
+        self.assertIn(18, self.free(party_size=6))
+        self.assertEqual(self.hold(party_size=6).status_code, 201)
+        self.assertNotIn(18, self.free())
+        self.assertNotIn(18, self.free(party_size=2))
+        self.assertEqual(self.hold().status_code, 409)
+        response = self.client.post('/restaurant/bookings', data=json.dumps({
+            'first_name': 'Walk In', 'reservation_date': '2024-12-25', 'reservation_slot': 18,
+        }), content_type='application/json')
+        self.assertContains(response, 'error')
+        next_free = self.client.get('/restaurant/availability/next',
+                                    {'date': '2024-12-25', 'slots': '18', 'limit': 1}).json()
+        self.assertEqual(next_free['results'], [{'date': '2024-12-26', 'slot': 18}])
+    
+    def test_release_and_expiry(self):
+        """Test that released and expired holds free their table"""
+        token = self.hold().json()['hold']
+        self.assertEqual(self.client.post(f'/restaurant/holds/{token}').status_code, 405)
+        self.assertEqual(self.client.put(f'/restaurant/holds/{token}').status_code, 405)
+        self.assertEqual(self.client.delete(f'/restaurant/holds/{token}').status_code, 204)
+        self.assertEqual(self.client.get(f'/restaurant/holds/{token}').status_code, 404)
+        
+        token = self.hold(party_size=6, minutes=1).json()['hold']
+        self.assertNotIn(18, self.free(party_size=6))
+        with mock.patch('time.time', return_value=time.time() + 61):
+            self.assertEqual(self.client.get(f'/restaurant/holds/{token}').status_code, 404)
+            self.assertIn(18, self.free(party_size=6))
+    
+    def test_invalid_holds(self):
+        """Test that malformed holds and parties no table seats are rejected"""
+        self.assertEqual(self.hold(reservation_slot=9).status_code, 400)
+        self.assertEqual(self.hold(reservation_date='soon').status_code, 400)
+        self.assertEqual(self.hold(minutes=30).status_code, 400)
+        self.assertEqual(self.hold(party_size=0).status_code, 400)
+        response = self.hold(party_size=9)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['error'], 'No table seats a party of 9.')
 
 
 class AuthenticationTest(APITestCase):
@@ -271,6 +1208,40 @@ class AuthenticationTest(APITestCase):
         self.assertEqual(protected_response.status_code, status.HTTP_200_OK)
         self.assertEqual(protected_response.data['message'], "This view is protected")
     
+    def test_token_resolution_is_cached(self):
+        """Test that repeat requests with a token skip the token query"""
+        user = User.objects.create_user(**self.user_data)
+        token = Token.objects.create(user=user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+        self.client.get('/restaurant/api/message/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/restaurant/api/message/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+    
+    def test_cached_users_are_not_shared(self):
+        """Test that every request gets its own copy of the cached user"""
+        user = User.objects.create_user(**self.user_data)
+        token = Token.objects.create(user=user)
+        auth = CachedTokenAuthentication()
+        first, _ = auth.authenticate_credentials(token.key)
+        first.first_name = 'Changed'
+        second, second_token = auth.authenticate_credentials(token.key)
+        self.assertIsNot(second, first)
+        self.assertEqual(second.first_name, '')
+        self.assertIsNot(auth.authenticate_credentials(token.key)[0], second)
+        self.assertEqual(second_token.key, token.key)
+    
+    def test_deactivated_user_is_rejected(self):
+        """Test that deactivating a user revokes their cached token"""
+        user = User.objects.create_user(**self.user_data)
+        token = Token.objects.create(user=user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+        self.assertEqual(self.client.get('/restaurant/api/message/').status_code, status.HTTP_200_OK)
+        user.is_active = False
+        user.save()
+        response = self.client.get('/restaurant/api/message/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+    
     def test_token_logout(self):
         """Test token logout functionality"""
         # Create user and get token
@@ -290,3 +1261,70 @@ class AuthenticationTest(APITestCase):
         # Try to access protected endpoint after logout
         protected_response = self.client.get('/restaurant/api/message/')
         self.assertEqual(protected_response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+@override_settings(METRICS_TOKEN='scraper-secret')
+class MetricsTest(TestCase):
+    """Test cases for the request metrics endpoint"""
+    
+    def setUp(self):
+        """Log in as staff, who may read the metrics"""
+        staff = User.objects.create_user(username='manager', password='testpass123', is_staff=True)
+        self.client.force_login(staff)
+    
+    def test_metrics_require_staff_or_token(self):
+        """Test that anonymous and non-staff clients are refused"""
+        self.assertEqual(Client().get('/metrics').status_code, 403)
+        self.assertEqual(Client().get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code, 403)
+        guest = Client()
+        guest.force_login(User.objects.create_user(username='guest', password='testpass123'))
+        self.assertEqual(guest.get('/metrics').status_code, 403)
+        response = Client().get('/metrics', headers={'Authorization': 'Bearer scraper-secret'})
+        self.assertEqual(response.status_code, 200)
+    
+    def test_metrics_exposed_per_url_name(self):
+        """Test that served requests appear in the /metrics output"""
+        Booking.objects.create(first_name='Ann', reservation_date=date(2024, 12, 25), reservation_slot=18)
+        self.client.get('/restaurant/bookings?date=2024-12-25')
+        self.client.get('/restaurant/about/')
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        body = response.content.decode()
+        self.assertIn('littlelemon_http_request_duration_seconds_count{view="bookings"}', body)
+        self.assertIn('littlelemon_http_request_duration_seconds_bucket{view="about",le="+Inf"}', body)
+        self.assertIn('littlelemon_db_queries_total{view="bookings"}', body)
+        self.assertIn('littlelemon_http_response_size_bytes_total{view="about"}', body)
+        self.assertIn('littlelemon_http_requests_in_flight 1', body)
+    
+    def test_metrics_count_queries(self):
+        """Test that DB queries are attributed to the view that ran them"""
+        def queries(body):
+            for line in body.splitlines():
+                if line.startswith('littlelemon_db_queries_total{view="availability"}'):
+                    return int(line.split()[-1])
+            return 0
+        # The first request also loads the floor plan into the cache.
+        self.client.get('/restaurant/availability?date=2024-12-24')
+        before = queries(self.client.get('/metrics').content.decode())
+        self.client.get('/restaurant/availability?date=2024-12-25')
+        after = queries(self.client.get('/metrics').content.decode())
+        self.assertEqual(after - before, 1)
+    
+    async def test_async_requests(self):
+        """Test that requests and queries of async requests are counted"""
+        async def metric(name):
+            response = await AsyncClient().get('/metrics', headers={'Authorization': 'Bearer scraper-secret'})
+            body = response.content.decode()
+            for line in body.splitlines():
+                if line.startswith(f'littlelemon_{name}{{view="availability"}}'):
+                    return int(line.split()[-1])
+            return 0
+        # The first request also loads the floor plan into the cache.
+        await AsyncClient().get('/restaurant/availability?date=2024-12-24')
+        requests = await metric('http_request_duration_seconds_count')
+        queries = await metric('db_queries_total')
+        response = await AsyncClient().get('/restaurant/availability?date=2024-12-25')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(await metric('http_request_duration_seconds_count') - requests, 1)
+        self.assertEqual(await metric('db_queries_total') - queries, 1)